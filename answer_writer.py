@@ -0,0 +1,236 @@
+# answer_writer.py
+# Mode write-behind untuk jawaban kuis: baris UserAnswer dan delta skor masuk
+# antrean, lalu thread latar belakang menulisnya sekaligus (satu transaksi per
+# batch) begitu batch penuh atau interval flush tercapai.
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+
+class AnswerWriter:
+    """Antrean tulis jawaban; ``flush_fn(rows, deltas)`` menulis satu batch ke DB.
+
+    ``rows`` adalah list dict kolom UserAnswer, ``deltas`` dict user_id -> delta
+    skor. Batch yang tetap gagal setelah ``max_retries`` percobaan tidak
+    dibuang: batch disimpan dan dicoba lagi di siklus flush berikutnya (delta
+    skornya tetap dihitung di ``pending_delta``). Yang masih gagal saat
+    ``close()``, atau yang melebihi ``max_retained`` baris, ditulis ke
+    ``spill_path`` (JSON Lines, satu jawaban + ``score_delta`` per baris) agar
+    bisa diputar ulang (``flask answers replay``).
+    """
+
+    def __init__(
+        self,
+        flush_fn,
+        batch_size=200,
+        flush_interval=0.5,
+        max_retries=3,
+        spill_path=None,
+        max_retained=10000,
+    ):
+        self._flush_fn = flush_fn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.spill_path = spill_path
+        self.max_retained = max_retained
+        self._queue = queue.Queue()
+        # batch yang gagal ditulis, menunggu percobaan berikutnya
+        self._failed = []
+        self._failed_lock = threading.Lock()
+        self.spilled = 0
+        self._pending = Counter()
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="answer-writer", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, row, score_delta=0):
+        if score_delta:
+            with self._pending_lock:
+                self._pending[row["user_id"]] += score_delta
+        self._queue.put((row, score_delta))
+        self._ensure_thread()
+
+    def pending_delta(self, user_id):
+        # skor yang sudah dihitung tapi belum tertulis ke DB
+        with self._pending_lock:
+            return self._pending.get(user_id, 0)
+
+    def _drain(self, limit):
+        items = []
+        while len(items) < limit:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._retry_failed()
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch):
+        self._retry_failed()
+        try:
+            if not self._try_write(batch, self.max_retries):
+                self._retain(batch)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _try_write(self, batch, tries):
+        rows = [row for row, _ in batch]
+        deltas = Counter()
+        for row, delta in batch:
+            if delta:
+                deltas[row["user_id"]] += delta
+        for attempt in range(1, tries + 1):
+            try:
+                with self._flush_lock:
+                    self._flush_fn(rows, dict(deltas))
+            except Exception:
+                log.exception("answer flush failed (attempt %d, %d rows)", attempt, len(rows))
+                time.sleep(min(0.1 * attempt, 1.0))
+                continue
+            self._settle(deltas)
+            return True
+        return False
+
+    def _settle(self, deltas):
+        # delta sudah tertulis (atau di-spill): tidak lagi ditambahkan ke skor DB
+        with self._pending_lock:
+            for uid, delta in deltas.items():
+                self._pending[uid] -= delta
+                if not self._pending[uid]:
+                    del self._pending[uid]
+
+    def _retain(self, batch):
+        with self._failed_lock:
+            self._failed.append(batch)
+            retained = sum(len(b) for b in self._failed)
+            overflow = []
+            while retained > self.max_retained and len(self._failed) > 1:
+                old = self._failed.pop(0)
+                retained -= len(old)
+                overflow.append(old)
+        log.error("answer flush: %d rows kept for the next flush (%d retained)", len(batch), retained)
+        for old in overflow:
+            self._spill(old)
+
+    def _retry_failed(self):
+        # satu percobaan per batch yang tertahan; urutan tulis tetap yang terlama dulu
+        with self._failed_lock:
+            failed, self._failed = self._failed, []
+        for i, batch in enumerate(failed):
+            if not self._try_write(batch, 1):
+                with self._failed_lock:
+                    self._failed[:0] = failed[i:]
+                return False
+        return True
+
+    def _spill(self, batch):
+        deltas = Counter()
+        for row, delta in batch:
+            if delta:
+                deltas[row["user_id"]] += delta
+        if self.spill_path is None:
+            log.error("answer flush: %d rows lost (no spill path configured)", len(batch))
+        else:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.spill_path)), exist_ok=True)
+                with open(self.spill_path, "a", encoding="utf-8") as f:
+                    for row, delta in batch:
+                        f.write(json.dumps(dict(row, score_delta=delta), default=_json_default))
+                        f.write("\n")
+            except OSError:
+                log.exception("answer flush: could not spill %d rows", len(batch))
+            else:
+                log.error(
+                    "answer flush: %d rows spilled to %s; replay with `flask answers replay`",
+                    len(batch),
+                    self.spill_path,
+                )
+        self.spilled += len(batch)
+        self._settle(deltas)
+
+    def retained(self):
+        with self._failed_lock:
+            return sum(len(b) for b in self._failed)
+
+    def flush(self):
+        """Tulis semua isi antrean sekarang juga, termasuk batch yang sedang diproses thread."""
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                break
+            self._write(batch)
+        self._queue.join()
+
+    def close(self):
+        # dipanggil pemilik writer (app._shutdown) sebelum bus invalidasi ditutup
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout=self.flush_interval * 2 + 1)
+        self.flush()
+        if not self._retry_failed():
+            # proses berhenti: yang masih gagal disimpan ke disk, bukan dibuang
+            with self._failed_lock:
+                failed, self._failed = self._failed, []
+            for batch in failed:
+                self._spill(batch)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"not JSON serializable: {type(value).__name__}")
+
+
+def read_spill(path):
+    """Baris dari file spill -> (row, score_delta), ``created_at`` kembali jadi datetime."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            delta = row.pop("score_delta", 0)
+            if row.get("created_at"):
+                row["created_at"] = datetime.fromisoformat(row["created_at"])
+            yield row, delta
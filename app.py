@@ -1,8 +1,33 @@
+import atexit
+import logging
 import os
+import secrets
+import time
+import click
+from collections import Counter
 from datetime import datetime, timedelta
+from functools import wraps
+from itertools import chain, islice
 from dotenv import load_dotenv
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+from flask import (
+    Flask,
+    current_app,
+    render_template,
+    request,
+    redirect,
+    url_for,
+    flash,
+    session,
+    jsonify,
+    abort,
+    make_response,
+    Response,
+)
+from flask.cli import AppGroup
+from markupsafe import Markup
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError, ProgrammingError
 from flask_login import (
     LoginManager,
     UserMixin,
@@ -11,32 +36,244 @@ from flask_login import (
     login_required,
     current_user,
 )
-from werkzeug.security import generate_password_hash, check_password_hash
-import requests
-import random
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from answer_writer import AnswerWriter, read_spill
+import db_profile
+from fragment_cache import FragmentCache
+import history
+import http_cache
+import invalidation
+import migrations
+import question_editor
+from identity import IdentityCache, UserSnapshot
+from instrumentation import Instrumentation, SamplingProfiler
+from leaderboard import Leaderboard, LeaderboardEntry, make_backend
+from leaderboard_stream import LeaderboardStream, StreamFull
+from passwords import HashPolicy, HasherBusy, PasswordHasher
+from question_bank import QuestionBank
+from question_import import import_questions, make_record, read_questions, read_stream
+from quiz_store import MemoryAttemptStore, QuizAttempt, RedisAttemptStore, SqlAttemptStore
+import rate_limit
+import retention
+from sampler import AdaptivePolicy
+from static_assets import StaticAssets
+from weather import (
+    CircuitBreaker,
+    CityNotFound,
+    UpstreamUnavailable,
+    WeatherError,
+    WeatherFetcher,
+    WeatherService,
+)
 
 # app.py (atas)
 from pathlib import Path
 
-env_path = Path(__file__).resolve().parent / ".env"
+BASE_DIR = Path(__file__).resolve().parent
+env_path = BASE_DIR / ".env"
 load_dotenv(dotenv_path=env_path)
 
-
-app = Flask(__name__)
-app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev-secret")
-app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL", "sqlite:///app.db")
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret")
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///app.db")
+db_profile.install_sqlite_pragmas(os.environ)
+# replika baca opsional untuk leaderboard dan bank soal
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+# bacaan mana yang boleh diarahkan ke replika
+READ_REPLICA_PURPOSES = set(
+    filter(
+        None, os.getenv("READ_REPLICA_PURPOSES", "questions,leaderboard,export").split(",")
+    )
+)
 
 MAX_QUESTIONS = 20
+# seberapa sering (detik) versi bank soal dicek ulang ke DB
+QUESTION_BANK_CHECK_INTERVAL = float(os.getenv("QUESTION_BANK_CHECK_INTERVAL", "5"))
+LEADERBOARD_SIZE = 20
+# HTML /leaderboard yang sudah dirender dipakai ulang selama ini (detik) per versi + user
+LEADERBOARD_HTML_TTL = float(os.getenv("LEADERBOARD_HTML_TTL", "5"))
+# "memory" (per proses) atau "redis" (bersama antar worker, pakai REDIS_URL)
+LEADERBOARD_BACKEND = os.getenv("LEADERBOARD_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL")
+# thread request per proses (serve.py mengisinya; waitress: total semua thread)
+WEB_THREADS = int(os.getenv("WEB_THREADS") or 4)
+# gevent/eventlet: koneksi yang menunggu hanya memegang greenlet, bukan thread
+ASYNC_WORKER = os.getenv("WEB_WORKER_CLASS", "gthread") in ("gevent", "eventlet")
+# SSE /leaderboard/stream: batas penonton per worker (0 = mati), jeda heartbeat
+# dan umur maksimal satu koneksi (detik) sebelum browser menyambung ulang.
+# Dengan worker thread setiap penonton memegang satu thread sampai MAX_AGE, jadi
+# batasnya default separuh WEB_THREADS dan tidak pernah lebih dari WEB_THREADS - 1;
+# penonton lain memakai polling ETag /leaderboard setiap LEADERBOARD_POLL_INTERVAL detik
+_STREAM_THREADS = max(WEB_THREADS - 1, 0)
+LEADERBOARD_STREAM_MAX = int(
+    os.getenv("LEADERBOARD_STREAM_MAX") or (100 if ASYNC_WORKER else WEB_THREADS // 2)
+)
+if not ASYNC_WORKER and LEADERBOARD_STREAM_MAX > _STREAM_THREADS:
+    logging.getLogger(__name__).warning(
+        "LEADERBOARD_STREAM_MAX=%d capped to %d (WEB_THREADS=%d); use an async worker class "
+        "(WEB_WORKER_CLASS=gevent) for more watchers",
+        LEADERBOARD_STREAM_MAX,
+        _STREAM_THREADS,
+        WEB_THREADS,
+    )
+    LEADERBOARD_STREAM_MAX = _STREAM_THREADS
+LEADERBOARD_POLL_INTERVAL = float(os.getenv("LEADERBOARD_POLL_INTERVAL", "15"))
+LEADERBOARD_STREAM_HEARTBEAT = float(os.getenv("LEADERBOARD_STREAM_HEARTBEAT", "15"))
+LEADERBOARD_STREAM_MAX_AGE = float(os.getenv("LEADERBOARD_STREAM_MAX_AGE", "300"))
+# "sync" (commit per jawaban) atau "write-behind" (antrean + flush batch)
+ANSWER_WRITE_MODE = os.getenv("ANSWER_WRITE_MODE", "sync")
+ANSWER_BATCH_SIZE = int(os.getenv("ANSWER_BATCH_SIZE", "200"))
+ANSWER_FLUSH_INTERVAL = float(os.getenv("ANSWER_FLUSH_INTERVAL", "0.5"))
+# batch write-behind yang tetap gagal saat shutdown disimpan di sini (flask answers replay)
+ANSWER_SPILL_PATH = os.getenv(
+    "ANSWER_SPILL_PATH", str(BASE_DIR / "instance" / "answer_spill.jsonl")
+)
+# penyimpanan sesi kuis di server: "memory", "sql" (tabel DB aplikasi) atau "redis"
+QUIZ_STORE = os.getenv("QUIZ_STORE", "memory")
+# attempt yang idle lebih lama dari ini (detik) dibuang
+QUIZ_ATTEMPT_TTL = int(os.getenv("QUIZ_ATTEMPT_TTL", str(6 * 3600)))
+# mode plan: urutan soal + opsi ditentukan sekali (dari seed) saat attempt dimulai
+QUIZ_PLAN_MODE = os.getenv("QUIZ_PLAN_MODE", "0").lower() in ("1", "true", "yes")
+# pemilihan soal: "uniform" (acak merata) atau "adaptive" (berbobot dari riwayat user:
+# soal baru dan yang sering salah lebih sering muncul; selalu memakai plan)
+QUIZ_SELECTION = os.getenv("QUIZ_SELECTION", "uniform")
+# anggaran byte cache form soal yang sudah dirender (0 = mati)
+FRAGMENT_CACHE_BYTES = int(os.getenv("FRAGMENT_CACHE_BYTES", str(4 * 1024 * 1024)))
+# shell halaman kuis (navbar, meta, footer) per user (detik; 0 = mati)
+QUIZ_SHELL_CACHE_TTL = float(os.getenv("QUIZ_SHELL_CACHE_TTL", "60"))
+# berapa lama (detik) snapshot user yang login dipakai ulang tanpa query
+IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", "10"))
+# jawaban per halaman di /me/history
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "20"))
+# username (dipisah koma) yang boleh mengakses /admin/*
+ADMIN_USERS = set(filter(None, os.getenv("ADMIN_USERS", "").split(",")))
+# soal per halaman di editor bank soal (/admin/questions)
+ADMIN_QUESTIONS_PAGE_SIZE = int(os.getenv("ADMIN_QUESTIONS_PAGE_SIZE", "50"))
+# jawaban lebih tua dari ini (hari) dipindah ke arsip oleh `flask answers archive`
+ANSWER_RETENTION_DAYS = int(os.getenv("ANSWER_RETENTION_DAYS", "180"))
+ANSWER_ARCHIVE_DIR = os.getenv(
+    "ANSWER_ARCHIVE_DIR", str(BASE_DIR / "archive")
+)
+# baris per fetch dari cursor server-side saat ekspor jawaban
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
 OWM_API_KEY = os.getenv("OWM_API_KEY")
-OWM_GEOCODE_URL = "https://api.openweathermap.org/geo/1.0/direct"
-OWM_FORECAST_URL = "https://api.openweathermap.org/data/2.5/forecast"
-
-db = SQLAlchemy(app)
-login_manager = LoginManager(app)
+OWM_GEOCODE_URL = os.getenv("OWM_GEOCODE_URL", "https://api.openweathermap.org/geo/1.0/direct")
+OWM_FORECAST_URL = os.getenv("OWM_FORECAST_URL", "https://api.openweathermap.org/data/2.5/forecast")
+# cache hasil forecast (detik) dan berapa lama data lama masih boleh disajikan
+WEATHER_CACHE_TTL = int(os.getenv("WEATHER_CACHE_TTL", "600"))
+WEATHER_STALE_TTL = int(os.getenv("WEATHER_STALE_TTL", "3600"))
+# anggaran waktu total (geocode + forecast) dan batas lookup paralel
+WEATHER_TIMEOUT_BUDGET = float(os.getenv("WEATHER_TIMEOUT_BUDGET", "8"))
+WEATHER_MAX_CONCURRENCY = int(os.getenv("WEATHER_MAX_CONCURRENCY", "4"))
+WEATHER_MAX_PENDING = int(os.getenv("WEATHER_MAX_PENDING", "16"))
+# kebijakan hash password (format Werkzeug); hash dengan parameter lama di-rehash saat login
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+# proses untuk hashing (0 = di thread request), batas antrean dan waktu tunggu (detik);
+# default: satu CPU disisakan untuk thread request (mesin 1 CPU -> tanpa pool)
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", str(max(0, min(4, (os.cpu_count() or 1) - 1))))
+)
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "8"))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+# rate limit token bucket "jumlah/detik" (kosong = mati); "memory" atau "redis"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+# login gagal per (akun, IP); login berhasil mengosongkan hitungannya
+LOGIN_FAILURE_RATE = os.getenv(
+    "LOGIN_FAILURE_RATE", os.getenv("LOGIN_RATE_PER_ACCOUNT", "10/60")
+)
+# login + registrasi per IP, opt-in: satu kelas di balik NAT berbagi satu IP
+AUTH_RATE_PER_IP = os.getenv("AUTH_RATE_PER_IP", "")
+# jumlah reverse proxy di depan app, agar IP klien dibaca dari X-Forwarded-For
+PROXY_COUNT = int(os.getenv("PROXY_COUNT", "0"))
+# tanpa proxy: "1" bila klien benar-benar terhubung langsung ke app (REMOTE_ADDR
+# = IP klien); selain itu limit per IP tidak diaktifkan, karena semua klien akan
+# tampak dengan IP proxy yang sama
+AUTH_RATE_DIRECT = os.getenv("AUTH_RATE_DIRECT", "0").lower() in ("1", "true", "yes")
+# instrumentasi opsional: header Server-Timing, /metrics, log request lambat
+INSTRUMENTATION = os.getenv("INSTRUMENTATION", "0").lower() in ("1", "true", "yes")
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+# bila diisi, /metrics hanya menerima "Authorization: Bearer <token>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+# profil 1 dari N request (0 = mati; butuh INSTRUMENTATION=1)
+PROFILE_SAMPLE_RATE = int(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_BACKEND = os.getenv("PROFILE_BACKEND", "cprofile")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+# startup: jalankan migrasi yang tertinggal (default: hanya log error, jalankan
+# `flask schema upgrade` saat deploy) dan isi cache sebelum menerima traffic
+SCHEMA_AUTO_UPGRADE = os.getenv("SCHEMA_AUTO_UPGRADE", "0").lower() in ("1", "true", "yes")
+WARM_UP = os.getenv("WARM_UP", "1").lower() in ("1", "true", "yes")
+# kanal invalidasi cache per proses antar worker: "none" (satu proses), "sql"
+# (tabel di DB aplikasi; ideal untuk SQLite) atau "redis" (pakai REDIS_URL)
+INVALIDATION_BACKEND = os.getenv("INVALIDATION_BACKEND", "none")
+# backend "sql": jeda (detik) antara tulis antrean event dan cek event baru
+INVALIDATION_POLL_INTERVAL = float(os.getenv("INVALIDATION_POLL_INTERVAL", "0.5"))
+
+# ekstensi dibuat tanpa app; create_app() memanggil init_app
+db = SQLAlchemy()
+# URL static bersidik jari (?v=hash) + varian .gz/.br hasil `flask assets compress`
+static_assets = StaticAssets(str(BASE_DIR / "static"))
+TEMPLATE_FINGERPRINT = http_cache.fingerprint_tree(str(BASE_DIR / "templates"))
+login_manager = LoginManager()
 login_manager.login_view = "login"
 
-ID_DAYS = ["Senin", "Selasa", "Rabu", "Kamis", "Jumat", "Sabtu", "Minggu"]
+# route dikumpulkan di sini dan didaftarkan ke app oleh create_app(); nama
+# endpoint tetap nama fungsinya, sama seperti @app.route
+_routes = []
+
+
+def route(rule, **options):
+    def decorator(view):
+        _routes.append((rule, view, options))
+        return view
+
+    return decorator
+
+weather_service = WeatherService(
+    OWM_API_KEY,
+    OWM_GEOCODE_URL,
+    OWM_FORECAST_URL,
+    budget=WEATHER_TIMEOUT_BUDGET,
+    forecast_ttl=WEATHER_CACHE_TTL,
+    stale_ttl=WEATHER_STALE_TTL,
+    breaker=CircuitBreaker(failure_threshold=5, reset_timeout=30),
+    # forecast yang dimuat satu worker dibagikan ke worker lain
+    on_load=lambda key, rows: invalidation_bus.publish("weather", {"k": key, "rows": rows}),
+)
+instrumentation = Instrumentation(
+    slow_request_ms=SLOW_REQUEST_MS,
+    profiler=(
+        SamplingProfiler(PROFILE_SAMPLE_RATE, PROFILE_DIR, backend=PROFILE_BACKEND)
+        if PROFILE_SAMPLE_RATE > 0
+        else None
+    ),
+)
+password_hasher = PasswordHasher(
+    HashPolicy(PASSWORD_HASH_METHOD),
+    workers=PASSWORD_HASH_WORKERS,
+    max_pending=PASSWORD_HASH_MAX_PENDING,
+    timeout=PASSWORD_HASH_TIMEOUT,
+)
+_rate_limit_backend = rate_limit.make_backend(RATE_LIMIT_BACKEND, REDIS_URL)
+auth_ip_limiter = (
+    rate_limit.RateLimiter(_rate_limit_backend, "auth-ip", AUTH_RATE_PER_IP)
+    if AUTH_RATE_PER_IP and (PROXY_COUNT or AUTH_RATE_DIRECT)
+    else None
+)
+if AUTH_RATE_PER_IP and auth_ip_limiter is None:
+    logging.getLogger(__name__).warning(
+        "AUTH_RATE_PER_IP ignored: set PROXY_COUNT (behind a proxy) or AUTH_RATE_DIRECT=1"
+    )
+login_failure_limiter = (
+    rate_limit.RateLimiter(_rate_limit_backend, "login-fail", LOGIN_FAILURE_RATE)
+    if LOGIN_FAILURE_RATE
+    else None
+)
+weather_fetcher = WeatherFetcher(
+    weather_service,
+    max_workers=WEATHER_MAX_CONCURRENCY,
+    max_pending=WEATHER_MAX_PENDING,
+    wait_timeout=WEATHER_TIMEOUT_BUDGET,
+)
 
 
 # models
@@ -48,10 +285,25 @@ class User(UserMixin, db.Model):
     total_score = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # urutan leaderboard: skor tertinggi dulu, seri -> yang daftar lebih awal
+    __table_args__ = (
+        db.Index("ix_user_score_rank", total_score.desc(), created_at),
+    )
+
 
 class Question(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     text = db.Column(db.String(512), nullable=False)
+    # sha1 teks + opsi, untuk dedupe saat import
+    content_hash = db.Column(db.String(40), unique=True, index=True)
+    # metadata opsional dari file import: nama bank/topik dan tingkat kesulitan 1-5
+    topic = db.Column(db.String(64), index=True)
+    difficulty = db.Column(db.SmallInteger)
+    # soft delete dari editor admin: soal pensiun tidak dimuat ke bank, tapi
+    # baris dan opsinya tetap ada untuk foreign key user_answer
+    retired_at = db.Column(db.DateTime)
+    # versi bank saat soal terakhir diubah lewat editor (lihat question_editor.py)
+    version = db.Column(db.Integer, nullable=False, default=0)
 
 
 class AnswerOption(db.Model):
@@ -79,121 +331,560 @@ class UserAnswer(db.Model):
     is_correct = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # riwayat per user (keyset created_at, id) dan rebuild statistik per soal
+    __table_args__ = (
+        db.Index("ix_user_answer_user_created", user_id, created_at, id),
+        db.Index("ix_user_answer_question", question_id, is_correct),
+        # retensi: rentang created_at per hari
+        db.Index("ix_user_answer_created", created_at),
+    )
 
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
 
+# statistik per soal, diperbarui inkremental setiap jawaban tercatat
+class QuestionStat(db.Model):
+    question_id = db.Column(
+        db.Integer, db.ForeignKey("question.id", ondelete="CASCADE"), primary_key=True
+    )
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
 
-# Helper sesi kuis
-def ensure_quiz_session():
-    if "quiz_count" not in session:
-        session["quiz_count"] = 0
-        session["quiz_correct"] = 0
-        session["quiz_ids"] = []
 
+# agregat jawaban yang sudah diarsip (lihat retention.py)
+class QuestionDailyStat(db.Model):
+    question_id = db.Column(
+        db.Integer, db.ForeignKey("question.id", ondelete="CASCADE"), primary_key=True
+    )
+    day = db.Column(db.Date, primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
 
-def pick_random_question_excluding(ids):
-    q = Question.query
-    if ids:
-        q = q.filter(~Question.id.in_(ids))
-    return q.order_by(db.func.random()).first()
 
+class UserDailyStat(db.Model):
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    day = db.Column(db.Date, primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
 
-# Weather helpers
-def get_weather(city_name):
-    if not OWM_API_KEY or not city_name:
-        return None
 
-    try:
-        # Geocoding
-        geo_params = {"q": city_name, "limit": 1, "appid": OWM_API_KEY}
-        g = requests.get(OWM_GEOCODE_URL, params=geo_params, timeout=10)
-        if g.status_code != 200:
-            print(f"Geocoding error: {g.status_code} - {g.text}")
-            return None
-        results = g.json()
-        if not results:
-            print("City not found in geocoding")
-            return None
-        lat = results[0]["lat"]
-        lon = results[0]["lon"]
-
-        forecast_params = {
-            "lat": lat,
-            "lon": lon,
-            "units": "metric",
-            "appid": OWM_API_KEY,
-        }
-        r = requests.get(OWM_FORECAST_URL, params=forecast_params, timeout=10)
-        if r.status_code != 200:
-            print(f"Forecast error: {r.status_code} - {r.text}")
-            return None
+# satu baris per file arsip (nama relatif terhadap ANSWER_ARCHIVE_DIR)
+class AnswerArchiveFile(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, index=True)
+    filename = db.Column(db.String(255), nullable=False, unique=True)
+    rows = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-        data = r.json()
-        forecast_list = data.get("list", [])
-        if not forecast_list:
-            return None
 
-        from collections import defaultdict
+retention_tables = retention.RetentionTables(
+    UserAnswer.__table__,
+    QuestionDailyStat.__table__,
+    UserDailyStat.__table__,
+    AnswerArchiveFile.__table__,
+)
 
-        daily_data = defaultdict(list)
 
-        for item in forecast_list:
-            dt = datetime.fromtimestamp(item["dt"])
-            date_key = dt.date()
-            daily_data[date_key].append({"temp": item["main"]["temp"], "hour": dt.hour})
+# versi data bersama (mis. bank soal) untuk invalidasi cache antar proses
+class AppMeta(db.Model):
+    key = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+BANK_VERSION_KEY = "question_bank"
+
+
+class InvalidationEvent(db.Model):
+    # antrean event backend INVALIDATION_BACKEND=sql; baris lama dihapus oleh poller
+    id = db.Column(db.Integer, primary_key=True)
+    origin = db.Column(db.String(32), nullable=False)
+    channel = db.Column(db.String(32), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.Float, nullable=False, index=True)
 
-        rows = []
-        for date_key in sorted(daily_data.keys())[:3]:
-            temps = daily_data[date_key]
 
-            # cari suhu siang (12:00-15:00) dan malam (21:00-03:00)
-            day_temps = [t["temp"] for t in temps if 12 <= t["hour"] <= 15]
-            night_temps = [
-                t["temp"] for t in temps if t["hour"] >= 21 or t["hour"] <= 3
-            ]
+def _bus_engine():
+    # dipanggil juga dari thread tanpa app context (write-behind, poller)
+    with get_app().app_context():
+        return db.engine
 
-            # jika tidak ada data spesifik, gunakan max/min dari hari itu
-            day_temp = (
-                round(max(day_temps))
-                if day_temps
-                else round(max(t["temp"] for t in temps))
+
+invalidation_bus = invalidation.make_bus(
+    INVALIDATION_BACKEND,
+    table=InvalidationEvent.__table__,
+    engine_fn=_bus_engine,
+    redis_url=REDIS_URL,
+    interval=INVALIDATION_POLL_INTERVAL,
+)
+
+
+def get_meta_version(key):
+    # Core, bukan session.get: objek ORM di identity map bisa lebih tua dari bump di sesi ini
+    return db.session.execute(db.select(AppMeta.version).where(AppMeta.key == key)).scalar() or 0
+
+
+def bump_meta_version(key):
+    # dipanggil dalam transaksi yang sama dengan perubahan datanya. Naik atomik di sisi DB
+    # (seperti score_increment_statement): dua bump bersamaan menghasilkan dua versi berbeda
+    meta = AppMeta.__table__
+    stmt = meta.update().where(meta.c.key == key).values(version=meta.c.version + 1)
+    if db.session.get_bind().dialect.update_returning:
+        version = db.session.execute(stmt.returning(meta.c.version)).scalar()
+    else:
+        version = None
+        if db.session.execute(stmt).rowcount:
+            version = get_meta_version(key)
+    if version is None:
+        # baris belum ada: upsert, karena worker lain bisa membuatnya di saat yang sama
+        history.upsert_add(
+            db.session.connection(), meta, ("key",), [{"key": key, "version": 1}], ("version",)
+        )
+        version = get_meta_version(key)
+    return version
+
+
+def read_engine(purpose):
+    # hook routing baca: arahkan ke replika bila dikonfigurasi untuk keperluan ini
+    if DATABASE_REPLICA_URL and purpose in READ_REPLICA_PURPOSES:
+        return db.engines["replica"]
+    return db.engine
+
+
+def load_question_rows():
+    # versi bank lalu seluruh bank (soal + opsi, terurut per soal) dari koneksi yang sama:
+    # replika yang tertinggal memberi versi lama bersama baris lama, bukan versi baru
+    with read_engine("questions").connect() as conn:
+        meta = AppMeta.__table__
+        version = conn.execute(
+            db.select(meta.c.version).where(meta.c.key == BANK_VERSION_KEY)
+        ).scalar()
+        rows = conn.execute(
+            db.select(
+                Question.id,
+                Question.text,
+                Question.topic,
+                Question.difficulty,
+                Question.version,
+                AnswerOption.id,
+                AnswerOption.text,
+                AnswerOption.is_correct,
             )
-            night_temp = (
-                round(min(night_temps))
-                if night_temps
-                else round(min(t["temp"] for t in temps))
+            .join(AnswerOption, AnswerOption.question_id == Question.id)
+            .where(Question.retired_at.is_(None))
+            .order_by(Question.id, AnswerOption.id)
+        ).all()
+    return version or 0, rows
+
+
+adaptive_policy = AdaptivePolicy()
+
+
+question_bank = QuestionBank(
+    load_question_rows,
+    lambda: get_meta_version(BANK_VERSION_KEY),
+    check_interval=QUESTION_BANK_CHECK_INTERVAL,
+)
+
+
+fragment_cache = FragmentCache(max_bytes=FRAGMENT_CACHE_BYTES)
+quiz_shell_cache = http_cache.PageCache(ttl=QUIZ_SHELL_CACHE_TTL, maxsize=1024)
+
+
+def bump_bank_version():
+    # fragment_cache tidak perlu dikosongkan: snapshot baru hanya membuat objek
+    # baru untuk soal yang berubah, entri soal lain tetap valid
+    version = bump_meta_version(BANK_VERSION_KEY)
+    question_bank.invalidate()
+    # dicek ulang setelah commit (lihat _invalidate_changed_scores) dan worker lain diberi tahu
+    db.session.info["bank_changed"] = True
+    return version
+
+
+def _created_ts(created_at):
+    return created_at.timestamp() if created_at else 0.0
+
+
+def load_leaderboard_entries(primary=False):
+    # primary: muat ulang setelah event terlewat; replika bisa belum memuat perubahan itu
+    engine = db.engine if primary else read_engine("leaderboard")
+    with engine.connect() as conn:
+        # urutan index ix_user_score_rank: data sudah terurut saat dimuat ke backend
+        rows = conn.execute(
+            db.select(User.id, User.username, User.total_score, User.created_at).order_by(
+                User.total_score.desc(), User.created_at
+            )
+        ).all()
+    return [
+        LeaderboardEntry(uid, username, score or 0, _created_ts(created_at))
+        for uid, username, score, created_at in rows
+    ]
+
+
+def load_leaderboard_rows(user_ids):
+    # selalu dari DB utama: nilai yang baru di-commit mungkin belum sampai di replika
+    with db.engine.connect() as conn:
+        rows = conn.execute(
+            db.select(User.id, User.username, User.total_score, User.created_at).where(
+                User.id.in_(user_ids)
             )
+        ).all()
+    return [
+        LeaderboardEntry(uid, username, score or 0, _created_ts(created_at))
+        for uid, username, score, created_at in rows
+    ]
+
+
+leaderboard_store = Leaderboard(
+    make_backend(LEADERBOARD_BACKEND, REDIS_URL),
+    load_leaderboard_entries,
+    size=LEADERBOARD_SIZE,
+    entries_fn=load_leaderboard_rows,
+)
+
+
+leaderboard_html_cache = http_cache.PageCache(ttl=LEADERBOARD_HTML_TTL)
 
-            # nama hari dalam bahasa
-            dayname = ID_DAYS[date_key.weekday()]
-            date_str = date_key.strftime("%Y-%m-%d")
-
-            rows.append(
-                {
-                    "day": dayname,
-                    "date": date_str,
-                    "day_temp": day_temp,
-                    "night_temp": night_temp,
-                }
+
+def _stream_read(fn):
+    # dipanggil dari thread produsen stream; loader leaderboard butuh app context
+    def read():
+        with get_app().app_context():
+            return fn()
+
+    return read
+
+
+leaderboard_feed = LeaderboardStream(
+    _stream_read(leaderboard_store.top),
+    _stream_read(leaderboard_store.state),
+    max_subscribers=LEADERBOARD_STREAM_MAX,
+    heartbeat=LEADERBOARD_STREAM_HEARTBEAT,
+    max_age=LEADERBOARD_STREAM_MAX_AGE,
+)
+leaderboard_store.listeners.append(leaderboard_feed.notify)
+
+
+# backend "redis" sudah dibagi semua worker; backend memori disinkronkan lewat bus
+SHARE_LEADERBOARD = LEADERBOARD_BACKEND != "redis"
+
+
+def sync_leaderboard(user):
+    # panggil setelah commit yang mengubah total_score user
+    entry = [user.id, user.username, user.total_score or 0, _created_ts(user.created_at)]
+    leaderboard_store.update(*entry)
+    publish_scores([user.id])
+
+
+def publish_scores(user_ids):
+    # worker lain membaca ulang skor user ini dari DB (lihat _on_leaderboard_event):
+    # event yang terlambat atau terulang tidak bisa menghitung skor dua kali
+    if SHARE_LEADERBOARD and user_ids:
+        invalidation_bus.publish("leaderboard", {"u": sorted(user_ids)})
+
+
+def increment_leaderboard(user_id, delta):
+    # Redis: satu sorted set bersama, increment atomik sekali untuk semua worker.
+    # Memory: mode sync memakai total yang di-commit (lihat _write_score_deltas);
+    # write-behind menambah di sini sebagai tampilan awal, lalu dikoreksi dari DB
+    # setelah batch tertulis (flush_answer_batch)
+    if not SHARE_LEADERBOARD or write_behind_enabled():
+        leaderboard_store.increment(user_id, delta)
+
+
+def load_user_snapshot(user_id):
+    # hanya kolom yang dipakai route/template, tanpa email dan password hash
+    row = db.session.execute(
+        db.select(User.id, User.username, User.total_score, User.created_at).where(
+            User.id == user_id
+        )
+    ).first()
+    return UserSnapshot(*row) if row else None
+
+
+identity_cache = IdentityCache(load_user_snapshot, ttl=IDENTITY_CACHE_TTL)
+
+
+def score_increment_statement():
+    # UPDATE user SET total_score = total_score + :delta, atomik di sisi DB (tanpa read-modify-write)
+    user_table = User.__table__
+    return (
+        user_table.update()
+        .where(user_table.c.id == db.bindparam("b_user_id"))
+        .values(
+            total_score=db.func.coalesce(user_table.c.total_score, 0) + db.bindparam("b_delta")
+        )
+    )
+
+
+def _score_params(deltas):
+    return [{"b_user_id": uid, "b_delta": d} for uid, d in deltas.items() if d]
+
+
+def add_score(user_id, delta):
+    # dikumpulkan per sesi, ditulis sekali saat commit (lihat _write_score_deltas)
+    db.session.info.setdefault("score_deltas", Counter())[user_id] += delta
+
+
+def set_score(user_id, score):
+    db.session.info.get("score_deltas", {}).pop(user_id, None)
+    user_table = User.__table__
+    db.session.execute(
+        user_table.update().where(user_table.c.id == user_id).values(total_score=score)
+    )
+    db.session.info.setdefault("score_changed", set()).add(user_id)
+
+
+def record_answer_stat(question_id, is_correct):
+    # seperti add_score: ditulis sekali saat commit lewat upsert
+    db.session.info.setdefault("question_stats", history.StatDeltas()).add(
+        question_id, is_correct
+    )
+
+
+@event.listens_for(db.session, "before_commit")
+def _write_score_deltas(session):
+    deltas = session.info.pop("score_deltas", None)
+    params = _score_params(deltas or {})
+    if params:
+        stmt = score_increment_statement()
+        if len(params) == 1 and session.get_bind().dialect.update_returning:
+            # total yang ditulis transaksi ini, tanpa query tambahan
+            user_table = User.__table__
+            row = session.execute(
+                stmt.returning(user_table.c.id, user_table.c.total_score), params[0]
+            ).first()
+            session.info["score_totals"] = {row.id: row.total_score or 0} if row else {}
+        elif not SHARE_LEADERBOARD:
+            session.execute(stmt, params)
+        else:
+            session.execute(stmt, params)
+            ids = [p["b_user_id"] for p in params]
+            session.info["score_totals"] = dict(
+                session.execute(db.select(User.id, User.total_score).where(User.id.in_(ids))).all()
             )
+        session.info.setdefault("score_changed", set()).update(p["b_user_id"] for p in params)
+    stats = session.info.pop("question_stats", None)
+    if stats:
+        history.upsert_question_stats(session.connection(), QuestionStat.__table__, stats)
+
+
+@event.listens_for(db.session, "after_commit")
+def _invalidate_changed_scores(session):
+    # snapshot user yang skornya berubah dimuat ulang di request berikutnya, kecuali
+    # totalnya sudah diketahui dari commit ini (jawaban berikutnya tanpa SELECT user)
+    changed = session.info.pop("score_changed", None)
+    totals = session.info.pop("score_totals", None) or {}
+    if changed:
+        for user_id in changed & totals.keys():
+            identity_cache.update_score(user_id, totals[user_id])
+        identity_cache.invalidate(*(changed - totals.keys()))
+        invalidation_bus.publish("identity", {"ids": sorted(changed)})
+    if totals and SHARE_LEADERBOARD:
+        for user_id, total in totals.items():
+            leaderboard_store.set_total(user_id, total or 0)
+        publish_scores(totals)
+    if session.info.pop("bank_changed", False):
+        # request lain bisa saja membaca versi lama sebelum commit ini selesai
+        question_bank.invalidate()
+        invalidation_bus.publish("question_bank")
+
+
+@event.listens_for(db.session, "after_rollback")
+def _discard_score_deltas(session):
+    session.info.pop("score_deltas", None)
+    session.info.pop("score_changed", None)
+    session.info.pop("score_totals", None)
+    session.info.pop("question_stats", None)
+    session.info.pop("bank_changed", None)
+
+
+def flush_answer_batch(rows, deltas):
+    # satu transaksi per batch: executemany untuk insert jawaban, update skor dan statistik soal
+    stats = history.StatDeltas()
+    for row in rows:
+        stats.add(row["question_id"], row["is_correct"])
+    with get_app().app_context():
+        with db.engine.begin() as conn:
+            conn.execute(UserAnswer.__table__.insert(), rows)
+            params = _score_params(deltas)
+            if params:
+                conn.execute(score_increment_statement(), params)
+            history.upsert_question_stats(conn, QuestionStat.__table__, stats)
+    # skor di DB sudah termasuk delta ini: snapshot lama harus dimuat ulang
+    identity_cache.invalidate(*deltas)
+    if deltas:
+        invalidation_bus.publish("identity", {"ids": sorted(deltas)})
+        if SHARE_LEADERBOARD:
+            # ganti tampilan awal dari increment_leaderboard dengan total yang tersimpan;
+            # batch sudah di-commit, jadi error di sini tidak boleh membuat batch diulang
+            with get_app().app_context():
+                try:
+                    leaderboard_store.refresh(list(deltas))
+                except Exception:
+                    current_app.logger.exception("leaderboard refresh after answer flush failed")
+            publish_scores(deltas)
+
+
+answer_writer = AnswerWriter(
+    flush_answer_batch,
+    batch_size=ANSWER_BATCH_SIZE,
+    flush_interval=ANSWER_FLUSH_INTERVAL,
+    spill_path=ANSWER_SPILL_PATH,
+)
+
+
+def write_behind_enabled():
+    return ANSWER_WRITE_MODE == "write-behind"
+
+
+def current_score(user):
+    # skor di DB ditambah delta yang masih antre di write-behind
+    score = user.total_score or 0
+    if write_behind_enabled():
+        score += answer_writer.pending_delta(user.id)
+    return score
+
+
+def user_in_leaderboard(user):
+    return leaderboard_store.in_top(user.id) and current_score(user) > 0
+
+
+# state sesi kuis untuk backend QUIZ_STORE=sql
+class QuizAttemptState(db.Model):
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False
+    )
+    data = db.Column(db.Text, nullable=False)
+    updated_at = db.Column(db.Float, nullable=False, index=True)
+
+
+def make_attempt_store():
+    if QUIZ_STORE == "sql":
+        return SqlAttemptStore(
+            QuizAttemptState.__table__, lambda: db.engine, ttl=QUIZ_ATTEMPT_TTL
+        )
+    if QUIZ_STORE == "redis":
+        return RedisAttemptStore(
+            REDIS_URL or "redis://localhost:6379/0", ttl=QUIZ_ATTEMPT_TTL
+        )
+    return MemoryAttemptStore(ttl=QUIZ_ATTEMPT_TTL)
+
+
+attempt_store = make_attempt_store()
+
+
+# Event dari worker lain (INVALIDATION_BACKEND); worker pengirim sudah
+# memperbarui cache-nya sendiri
+def _on_leaderboard_event(payload):
+    with get_app().app_context():
+        leaderboard_store.refresh(payload.get("u", ()))
+
+
+def _on_bank_event(payload):
+    question_bank.invalidate()
+
+
+def _on_resync():
+    # event mungkin terlewat: muat ulang semua yang biasanya diperbarui lewat bus
+    _on_bank_event(None)
+    identity_cache.clear()
+    if SHARE_LEADERBOARD and leaderboard_store.backend.loaded:
+        with get_app().app_context():
+            leaderboard_store.reload(lambda: load_leaderboard_entries(primary=True))
+
+
+if SHARE_LEADERBOARD:
+    invalidation_bus.subscribe("leaderboard", _on_leaderboard_event)
+invalidation_bus.subscribe("identity", lambda p: identity_cache.invalidate(*p["ids"]))
+invalidation_bus.subscribe("question_bank", _on_bank_event)
+invalidation_bus.subscribe("weather", lambda p: weather_service.prime(p["k"], p["rows"]))
+invalidation_bus.on_resync(_on_resync)
+
+
+@atexit.register
+def _shutdown():
+    # batch jawaban terakhir ditulis (dan event-nya dipublish) sebelum bus ditutup
+    answer_writer.close()
+    invalidation_bus.close()
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    # Flask-Login menyimpan hasilnya per request; antar request dipakai snapshot cache
+    return identity_cache.get(int(user_id))
 
-        return rows
 
-    except Exception as e:
-        print(f"Weather API error: {e}")
+# Helper sesi kuis
+def current_attempt():
+    # attempt milik user yang sedang login, atau None (cookie hanya berisi id-nya)
+    attempt_id = session.get("quiz_attempt")
+    if not attempt_id:
+        return None
+    attempt = attempt_store.get(attempt_id)
+    if attempt is None or attempt.user_id != current_user.id:
+        return None
+    return attempt
+
+
+def ensure_quiz_session():
+    attempt = current_attempt()
+    if attempt is None:
+        attempt = QuizAttempt.new(current_user.id, topic=session.get("quiz_topic"))
+        if plan_enabled():
+            # plan ikut tersimpan di penyimpanan pertama, bukan disimpan ulang oleh next_question
+            build_attempt_plan(attempt)
+        attempt_store.save(attempt)
+        session["quiz_attempt"] = attempt.id
+    return attempt
+
+
+def clear_quiz_session():
+    attempt_id = session.pop("quiz_attempt", None)
+    if attempt_id:
+        attempt_store.delete(attempt_id)
+
+
+def pick_random_question_excluding(ids, topic=None):
+    return question_bank.pick(ids, topic=topic)
+
+
+def rate_limited(limiter, key, consume=True):
+    # hasil RateLimitResult bila ditolak, None bila boleh lanjut (atau limiter mati);
+    # consume=False hanya mengecek, token dipakai terpisah lewat limiter.hit
+    if limiter is None:
         return None
+    result = limiter.hit(key) if consume else limiter.check(key)
+    return None if result.allowed else result
+
+
+def too_many_attempts(template, result):
+    flash(
+        f"Terlalu banyak percobaan. Coba lagi dalam {rate_limit.retry_after_header(result)} detik.",
+        "danger",
+    )
+    return render_template(template), 429, {"Retry-After": rate_limit.retry_after_header(result)}
+
+
+def hasher_busy(template):
+    flash("Server sedang sibuk, coba lagi sebentar.", "warning")
+    return render_template(template), 503, {"Retry-After": "5"}
+
+
+# Weather helpers
+def get_weather(city_name):
+    return weather_service.get_forecast(city_name)
 
 
 # Routes
-@app.route("/", methods=["GET", "POST"])
+@route("/", methods=["GET", "POST"])
 def index():
     weather = None
     city = ""
     if request.method == "POST":
         city = request.form.get("city", "").strip()
-        weather = get_weather(city)
+        with instrumentation.timer("weather"):
+            weather = get_weather(city)
         if not weather:
             flash(
                 "Kota tidak ditemukan atau terjadi error. Pastikan nama kota benar dan API key aktif.",
@@ -203,8 +894,30 @@ def index():
     return render_template("index.html", weather=weather, city=city, today=today)
 
 
+@route("/api/weather")
+def weather_api():
+    # dipanggil dari static/js/weather.js agar halaman beranda tidak menunggu upstream
+    city = request.args.get("city", "").strip()
+    if not city:
+        return jsonify(error="Nama kota wajib diisi."), 400
+    try:
+        with instrumentation.timer("weather"):
+            rows = weather_fetcher.fetch(city)
+    except CityNotFound:
+        return jsonify(error="Kota tidak ditemukan. Pastikan nama kota benar."), 404
+    except UpstreamUnavailable:
+        return (
+            jsonify(error="Layanan cuaca sedang tidak tersedia, coba lagi sebentar."),
+            503,
+            {"Retry-After": "30"},
+        )
+    except WeatherError:
+        return jsonify(error="Terjadi error saat mengambil data cuaca."), 502
+    return jsonify(city=city, rows=rows)
+
+
 # app.py (route register yang diperbarui)
-@app.route("/register", methods=["GET", "POST"])
+@route("/register", methods=["GET", "POST"])
 def register():
     if request.method == "POST":
         # Email: selalu disimpan dalam lowercase (case-insensitive)
@@ -226,13 +939,23 @@ def register():
             flash("Username sudah dipakai.", "danger")
             return redirect(url_for("register"))
 
+        # hashing mahal: dibatasi per IP seperti login
+        limited = rate_limited(auth_ip_limiter, request.remote_addr)
+        if limited:
+            return too_many_attempts("register.html", limited)
+        try:
+            password_hash = password_hasher.hash(password)
+        except HasherBusy:
+            return hasher_busy("register.html")
+
         user = User(
             email=email,
             username=username,
-            password_hash=generate_password_hash(password),
+            password_hash=password_hash,
         )
         db.session.add(user)
         db.session.commit()
+        sync_leaderboard(user)
         # tandai bahwa akun baru dibuat agar sesi direset setelah login
         session["new_account"] = True
         flash("Registrasi berhasil, silakan login.", "success")
@@ -241,11 +964,21 @@ def register():
 
 
 # app.py (route login yang diperbarui)
-@app.route("/login", methods=["GET", "POST"])
+@route("/login", methods=["GET", "POST"])
 def login():
     if request.method == "POST":
         email_or_username = request.form.get("email_or_username", "").strip()
         password = request.form.get("password", "")
+        # hanya login gagal yang dihitung, per akun DAN IP: orang lain tidak bisa
+        # mengunci akun korban dengan sengaja salah password dari IP-nya sendiri
+        failure_key = f"{email_or_username.lower()}|{request.remote_addr}"
+
+        # batasi sebelum query dan hashing: per IP, lalu login gagal per akun
+        limited = rate_limited(auth_ip_limiter, request.remote_addr) or rate_limited(
+            login_failure_limiter, failure_key, consume=False
+        )
+        if limited:
+            return too_many_attempts("login.html", limited)
         
         # Cek apakah input adalah email (mengandung @) atau username
         if "@" in email_or_username:
@@ -255,7 +988,24 @@ def login():
             # Login dengan username (CASE-SENSITIVE: harus sesuai huruf besar/kecil)
             user = User.query.filter_by(username=email_or_username).first()
         
-        if user and check_password_hash(user.password_hash, password):
+        try:
+            with instrumentation.timer("auth"):
+                valid = user is not None and password_hasher.verify(user.password_hash, password)
+        except HasherBusy:
+            return hasher_busy("login.html")
+        if login_failure_limiter is not None:
+            if valid:
+                login_failure_limiter.reset(failure_key)
+            else:
+                login_failure_limiter.hit(failure_key)
+        if valid:
+            if password_hasher.needs_rehash(user.password_hash):
+                # kebijakan hash berubah: simpan hash baru selagi password asli tersedia
+                try:
+                    user.password_hash = password_hasher.hash(password)
+                    db.session.commit()
+                except HasherBusy:
+                    pass
             login_user(user, remember=True)
             # Jika akun baru tadi, reset sesi kuis lalu lanjut ke quiz
             if session.pop("new_account", False):
@@ -265,54 +1015,165 @@ def login():
     return render_template("login.html")
 
 
-@app.route("/logout")
+@route("/logout")
 @login_required
 def logout():
-    logout_user()
     # Clear quiz session data to prevent leakage to next user
-    session.pop("quiz_count", None)
-    session.pop("quiz_correct", None)
-    session.pop("quiz_ids", None)
+    clear_quiz_session()
+    logout_user()
     flash("Kamu telah logout.", "info")
     return redirect(url_for("index"))
 
 
-def get_random_question():
-    ensure_quiz_session()
-    remaining = pick_random_question_excluding(session.get("quiz_ids", []))
+def get_random_question(attempt):
+    remaining = pick_random_question_excluding(attempt.seen, attempt.topic)
     if not remaining:
         return None, []
-    options = AnswerOption.query.filter_by(question_id=remaining.id).all()
-    random.shuffle(options)
-    return remaining, options
+    return remaining, question_bank.shuffled_options(remaining)
 
 
-@app.route("/quiz", methods=["GET", "POST"])
-@login_required
-def quiz():
-    ensure_quiz_session()
+def load_answer_history(user_id):
+    # {qid: (attempts, correct)} dari tabel hot, untuk bobot seleksi adaptif
+    rows = db.session.execute(
+        db.select(
+            UserAnswer.question_id,
+            db.func.count(),
+            db.func.sum(db.case((UserAnswer.is_correct, 1), else_=0)),
+        )
+        .where(UserAnswer.user_id == user_id)
+        .group_by(UserAnswer.question_id)
+    )
+    return {qid: (attempts, correct or 0) for qid, attempts, correct in rows}
 
-    # jika sudah 20 pertanyaan, langsung ke halaman hasil
-    if session["quiz_count"] >= MAX_QUESTIONS:
-        return redirect(url_for("quiz_finish"))
 
-    # Cek leaderboard HANYA jika kuis baru dimulai (quiz_count == 0)
-    # Jika user sedang di tengah kuis (quiz_count > 0), jangan dialihkan.
-    if session["quiz_count"] == 0:
-        top_users = (
-            User.query.order_by(User.total_score.desc(), User.created_at.asc())
-            .limit(20)
-            .all()
-        )
-        if any(u.id == current_user.id for u in top_users) and (current_user.total_score or 0) > 0:
-            return redirect(url_for("quiz_finish"))
+def plan_enabled():
+    return QUIZ_PLAN_MODE or QUIZ_SELECTION == "adaptive"
 
-    if request.method == "POST":
-        qid = int(request.form.get("question_id"))
-        chosen = int(request.form.get("option_id"))
-        opt = AnswerOption.query.get(chosen)
-        is_correct = bool(opt and opt.is_correct)
 
+def build_attempt_plan(attempt):
+    # plan dibuat sekali per attempt; langkah berikutnya cukup membaca indeks plan
+    attempt.seed = secrets.randbits(63)
+    adaptive = QUIZ_SELECTION == "adaptive"
+    attempt.bank_version, attempt.plan = question_bank.build_plan(
+        attempt.seed,
+        MAX_QUESTIONS,
+        topic=attempt.topic,
+        history=load_answer_history(attempt.user_id) if adaptive else None,
+        policy=adaptive_policy if adaptive else None,
+    )
+    attempt.plan_pos = 0
+
+
+def get_planned_question(attempt):
+    start = attempt.plan_pos
+    if attempt.plan is None:
+        # attempt dari sebelum mode plan diaktifkan
+        build_attempt_plan(attempt)
+        start = None
+    try:
+        while True:
+            item = attempt.current_plan_item()
+            if item is None:
+                return None, []
+            q, options = question_bank.planned_question(item, attempt.bank_version)
+            if q is not None:
+                return q, options
+            # soal sudah dihapus/dipensiunkan sejak plan dibuat: lewati
+            attempt.plan_pos += 1
+    finally:
+        # satu penyimpanan untuk plan baru dan semua soal yang dilewati
+        if attempt.plan_pos != start:
+            attempt_store.save(attempt)
+
+
+# penanda tempat isi kartu kuis di shell halaman yang di-cache
+QUIZ_CARD_SLOT = "<!--quiz-card-->"
+
+
+def render_question_form(question, options):
+    # bergantung hanya pada soal dan urutan opsinya
+    if not FRAGMENT_CACHE_BYTES or current_app.debug:
+        return render_template("_question_form.html", question=question, options=options)
+    key = (question.id, tuple(o.id for o in options))
+    html = fragment_cache.get(key, question)
+    if html is None:
+        html = render_template("_question_form.html", question=question, options=options)
+        fragment_cache.set(key, question, html)
+    return html
+
+
+def render_quiz_page(question, options, progress):
+    card = render_template(
+        "_quiz_card.html",
+        question_form=Markup(render_question_form(question, options)),
+        progress=progress,
+        max_questions=MAX_QUESTIONS,
+    )
+    # pesan flash hanya tampil sekali: shell-nya tidak di-cache
+    if not QUIZ_SHELL_CACHE_TTL or current_app.debug or session.get("_flashes"):
+        return render_template("quiz.html", quiz_card=Markup(card))
+    # shell (navbar, meta, footer) hanya bergantung pada user yang login
+    key = (current_user.id, current_user.username)
+    shell = quiz_shell_cache.get(key)
+    if shell is None:
+        shell = render_template("quiz.html", quiz_card=Markup(QUIZ_CARD_SLOT))
+        quiz_shell_cache.set(key, shell)
+    return shell.replace(QUIZ_CARD_SLOT, card, 1)
+
+
+def next_question(attempt):
+    if plan_enabled():
+        return get_planned_question(attempt)
+    return get_random_question(attempt)
+
+
+def quiz_gate(attempt):
+    """URL tujuan bila attempt tidak boleh menjawab lagi, selain itu None."""
+    # jika sudah 20 pertanyaan, langsung ke halaman hasil
+    if attempt.count >= MAX_QUESTIONS:
+        return url_for("quiz_finish")
+    # Cek leaderboard HANYA jika kuis baru dimulai (attempt.count == 0)
+    # Jika user sedang di tengah kuis (attempt.count > 0), jangan dialihkan.
+    if attempt.count == 0 and user_in_leaderboard(current_user):
+        return url_for("quiz_finish")
+    return None
+
+
+def submit_answer(attempt, qid, chosen):
+    """Catat satu jawaban; kembalikan is_correct, atau None bila jawaban ditolak."""
+    # cek jawaban dari cache bank soal, tanpa query ke DB
+    opt = question_bank.get_option(chosen)
+    if opt is None or opt.question_id != qid:
+        # opsi tidak dikenal, atau soal dipensiunkan/diedit saat sedang dijawab
+        return None
+    if plan_enabled():
+        # hanya terima jawaban untuk soal plan yang sedang aktif (mis. bukan kiriman ulang)
+        item = attempt.current_plan_item()
+        if item is None or item[0] != qid:
+            return None
+        attempt.plan_pos += 1
+    is_correct = opt.is_correct
+
+    # update skor dan progres sesi (set: duplikasi ID otomatis terhindar)
+    if is_correct:
+        attempt.correct += 1
+    attempt.seen.add(qid)
+    attempt.count += 1
+    attempt_store.save(attempt)
+
+    if write_behind_enabled():
+        # catat jawaban lewat antrean
+        answer_writer.submit(
+            {
+                "user_id": current_user.id,
+                "question_id": qid,
+                "chosen_option_id": chosen,
+                "is_correct": is_correct,
+                "created_at": datetime.utcnow(),
+            },
+            score_delta=1 if is_correct else 0,
+        )
+    else:
         # catat jawaban di DB
         ua = UserAnswer(
             user_id=current_user.id,
@@ -321,85 +1182,141 @@ def quiz():
             is_correct=is_correct,
         )
         db.session.add(ua)
-
-        # update skor total user (leaderboard) dan skor sesi
+        # update skor total user (leaderboard)
         if is_correct:
-            current_user.total_score = (current_user.total_score or 0) + 1
-            session["quiz_correct"] = session.get("quiz_correct", 0) + 1
+            add_score(current_user.id, 1)
+        record_answer_stat(qid, is_correct)
+        db.session.commit()
 
-        # update progres sesi (hindari duplikasi ID)
-        ids = session.get("quiz_ids", [])
-        if qid not in ids:
-            ids.append(qid)
-        session["quiz_ids"] = ids
-        session["quiz_count"] = session.get("quiz_count", 0) + 1
+    if is_correct:
+        increment_leaderboard(current_user.id, 1)
+    return is_correct
 
-        db.session.commit()
 
-        if session["quiz_count"] >= MAX_QUESTIONS:
+@route("/quiz", methods=["GET", "POST"])
+@login_required
+def quiz():
+    attempt = ensure_quiz_session()
+    target = quiz_gate(attempt)
+    if target:
+        return redirect(target)
+
+    if request.method == "POST":
+        qid = int(request.form.get("question_id"))
+        chosen = int(request.form.get("option_id"))
+        submit_answer(attempt, qid, chosen)
+
+        if attempt.count >= MAX_QUESTIONS:
             return redirect(url_for("quiz_finish"))
         return redirect(url_for("quiz"))
 
     # GET: tampilkan pertanyaan berikutnya
-    q, options = get_random_question()
+    q, options = next_question(attempt)
 
     # jika kehabisan soal sebelum 20 (mis. bank soal < 20), akhiri lebih cepat
     if not q:
         return redirect(url_for("quiz_finish"))
 
-    total_score = current_user.total_score or 0
-    progress = session["quiz_count"]
-    return render_template(
-        "quiz.html",
-        question=q,
-        options=options,
-        total_score=total_score,
-        progress=progress,
+    return render_quiz_page(q, options, attempt.count)
+
+
+def quiz_state(attempt, result=None):
+    # satu respons berisi hasil jawaban terakhir + soal berikutnya (static/js/quiz.js)
+    redirect_to = quiz_gate(attempt)
+    question = None
+    if redirect_to is None:
+        q, options = next_question(attempt)
+        if q:
+            question = {
+                "id": q.id,
+                "text": q.text,
+                "options": [{"id": o.id, "text": o.text} for o in options],
+            }
+        else:
+            redirect_to = url_for("quiz_finish")
+    return jsonify(
+        result=result,
+        progress=attempt.count,
         max_questions=MAX_QUESTIONS,
+        question=question,
+        redirect=redirect_to,
     )
 
 
-@app.route("/quiz/finish")
+@route("/api/quiz")
+@login_required
+def quiz_api():
+    return quiz_state(ensure_quiz_session())
+
+
+@route("/api/quiz/answer", methods=["POST"])
+@login_required
+def quiz_answer_api():
+    data = request.get_json(silent=True) or request.form
+    try:
+        qid = int(data["question_id"])
+        chosen = int(data["option_id"])
+    except (KeyError, TypeError, ValueError):
+        return jsonify(error="question_id dan option_id wajib diisi."), 400
+
+    attempt = ensure_quiz_session()
+    result = None
+    if quiz_gate(attempt) is None:
+        is_correct = submit_answer(attempt, qid, chosen)
+        # jawaban ditolak (kiriman ulang, soal berubah): klien cukup menampilkan soal aktif
+        if is_correct is not None:
+            result = {"question_id": qid, "is_correct": is_correct}
+    return quiz_state(attempt, result)
+
+
+@route("/quiz/finish")
 @login_required
 def quiz_finish():
     # If there is an active session with progress, show that.
     # Otherwise (e.g. redirected from start because already on leaderboard), show total score.
-    if session.get("quiz_count", 0) > 0:
-        attempt_correct = session.get("quiz_correct", 0)
-        attempt_count = session.get("quiz_count", 0)
+    attempt = current_attempt()
+    if attempt is not None and attempt.count > 0:
+        attempt_correct = attempt.correct
+        attempt_count = attempt.count
     else:
-        attempt_correct = current_user.total_score
+        attempt_correct = current_score(current_user)
         attempt_count = MAX_QUESTIONS
 
-    ensure_quiz_session() # Re-ensure session (though we might not need it if we are done)
-    
     return render_template(
         "quiz_finished.html",
         attempt_correct=attempt_correct,
         attempt_count=attempt_count,
+        topics=question_bank.topics(),
+        current_topic=session.get("quiz_topic"),
     )
 
 
-@app.route("/quiz/reset")
+@route("/quiz/reset")
 @login_required
 def quiz_reset():
+    user = current_user
+    if write_behind_enabled():
+        # pastikan jawaban yang masih antre sudah tertulis sebelum skor direset
+        answer_writer.flush()
+        user = identity_cache.get(user.id)
+
     # Check if user is in leaderboard (top 20)
-    top_users = (
-        User.query.order_by(User.total_score.desc(), User.created_at.asc())
-        .limit(20)
-        .all()
-    )
-    
-    in_leaderboard = any(u.id == current_user.id for u in top_users) and (current_user.total_score or 0) > 0
+    in_leaderboard = user_in_leaderboard(user)
     
     if in_leaderboard:
-        current_user.total_score = 0
+        set_score(user.id, 0)
         db.session.commit()
+        sync_leaderboard(user.with_score(0))
         flash("Skor leaderboard kamu direset untuk bermain kembali.", "warning")
 
-    session.pop("quiz_count", None)
-    session.pop("quiz_correct", None)
-    session.pop("quiz_ids", None)
+    clear_quiz_session()
+    # ?topic=<nama> memilih bank soal untuk attempt berikutnya; ?topic= kembali ke semua topik
+    if "topic" in request.args:
+        topic = request.args["topic"]
+        if topic in question_bank.topics():
+            session["quiz_topic"] = topic
+        else:
+            session.pop("quiz_topic", None)
 
     if not in_leaderboard:
          flash("Sesi kuis direset. Selamat bermain lagi!", "info")
@@ -407,17 +1324,748 @@ def quiz_reset():
     return redirect(url_for("quiz"))
 
 
-@app.route("/leaderboard")
+def render_leaderboard():
+    return render_template(
+        "leaderboard.html",
+        users=leaderboard_store.top(),
+        stream=LEADERBOARD_STREAM_MAX > 0,
+        poll_interval=LEADERBOARD_POLL_INTERVAL,
+    )
+
+
+@route("/leaderboard")
 def leaderboard():
-    top = (
-        User.query.order_by(User.total_score.desc(), User.created_at.asc())
-        .limit(20)
-        .all()
+    # pesan flash hanya tampil sekali: halaman dengan flash tidak di-cache
+    if session.get("_flashes"):
+        return render_leaderboard()
+
+    # HTML bergantung pada isi top N dan user di navbar. ETag dari hash isinya, bukan
+    # dari versi per proses: worker mana pun yang isinya sama menjawab 304
+    state = leaderboard_store.state()
+    digest = leaderboard_store.digest()
+    viewer = current_user.username if current_user.is_authenticated else ""
+    etag = http_cache.make_etag("leaderboard", TEMPLATE_FINGERPRINT, digest, viewer)
+    last_modified = http_cache.http_date(state.modified_at)
+    if http_cache.is_not_modified(request, etag, last_modified):
+        return http_cache.set_validators(Response(status=304), etag, last_modified)
+
+    key = (digest, viewer)
+    body = leaderboard_html_cache.get(key)
+    if body is None:
+        body = render_leaderboard()
+        leaderboard_html_cache.set(key, body)
+    return http_cache.set_validators(make_response(body), etag, last_modified)
+
+
+@route("/leaderboard/stream")
+def leaderboard_stream():
+    """SSE: snapshot top N saat tersambung, lalu diff peringkat setiap kali skor berubah."""
+    if not LEADERBOARD_STREAM_MAX:
+        abort(404)
+    try:
+        sub = leaderboard_feed.subscribe()
+    except StreamFull:
+        # leaderboard.js beralih ke polling /leaderboard dan mencoba lagi nanti
+        return Response(
+            "stream full\n", status=503, mimetype="text/plain", headers={"Retry-After": "30"}
+        )
+    return Response(
+        leaderboard_feed.events(sub),
+        mimetype="text/event-stream",
+        # X-Accel-Buffering: nginx meneruskan event tanpa menunggu buffer penuh
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    return render_template("leaderboard.html", users=top)
+
+
+def admin_required(view):
+    @wraps(view)
+    @login_required
+    def wrapped(*args, **kwargs):
+        if current_user.username not in ADMIN_USERS:
+            abort(403)
+        return view(*args, **kwargs)
+
+    return wrapped
+
+
+answer_archive = retention.ArchiveReader(ANSWER_ARCHIVE_DIR)
+
+
+def load_history_page(user_id, cursor, limit):
+    """Satu halaman riwayat (terbaru dulu) + cursor halaman berikutnya.
+
+    Keyset (created_at, id) mengikuti index ix_user_answer_user_created, jadi
+    biaya per halaman tetap sama sedalam apa pun user menggulir. Bila tabel
+    hot habis, halaman dilanjutkan dari arsip dengan cursor yang sama.
+    """
+    stmt = (
+        db.select(
+            UserAnswer.id,
+            UserAnswer.created_at,
+            UserAnswer.is_correct,
+            Question.text.label("question"),
+            AnswerOption.text.label("chosen"),
+            QuestionStat.attempts,
+            QuestionStat.correct,
+        )
+        .join(Question, Question.id == UserAnswer.question_id)
+        .join(AnswerOption, AnswerOption.id == UserAnswer.chosen_option_id)
+        .outerjoin(QuestionStat, QuestionStat.question_id == UserAnswer.question_id)
+        .where(UserAnswer.user_id == user_id)
+        .order_by(UserAnswer.created_at.desc(), UserAnswer.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        stmt = stmt.where(history.keyset_before(UserAnswer.created_at, UserAnswer.id, cursor))
+    items = [
+        {
+            "id": r.id,
+            "created_at": r.created_at,
+            "question": r.question,
+            "chosen": r.chosen,
+            "is_correct": bool(r.is_correct),
+            "percent_correct": history.percent_correct(r.attempts, r.correct),
+        }
+        for r in db.session.execute(stmt)
+    ]
+    if len(items) <= limit:
+        items += load_archived_history(user_id, cursor, limit + 1 - len(items))
+        items.sort(key=lambda i: (i["created_at"], i["id"]), reverse=True)
+
+    next_cursor = None
+    if len(items) > limit:
+        last = items[limit - 1]
+        next_cursor = history.encode_cursor(last["created_at"], last["id"])
+    return items[:limit], next_cursor
+
+
+def load_archived_history(user_id, cursor, limit):
+    rows = retention.archived_history(
+        db.session.connection(), retention_tables, answer_archive, user_id, cursor, limit
+    )
+    if not rows:
+        return []
+    # teks soal/opsi dari cache bank soal; persen benar dari question_stat
+    stats = {
+        qid: (attempts, correct)
+        for qid, attempts, correct in db.session.execute(
+            db.select(QuestionStat.question_id, QuestionStat.attempts, QuestionStat.correct).where(
+                QuestionStat.question_id.in_({r.question_id for r in rows})
+            )
+        )
+    }
+    items = []
+    for r in rows:
+        q = question_bank.get(r.question_id)
+        opt = question_bank.get_option(r.chosen_option_id)
+        items.append(
+            {
+                "id": r.id,
+                "created_at": r.created_at,
+                "question": q.text if q else "(soal sudah dihapus)",
+                "chosen": opt.text if opt else "-",
+                "is_correct": r.is_correct,
+                "percent_correct": history.percent_correct(*stats.get(r.question_id, (0, 0))),
+            }
+        )
+    return items
+
+
+def history_cursor():
+    raw = request.args.get("cursor")
+    if not raw:
+        return None
+    cursor = history.decode_cursor(raw)
+    if cursor is None:
+        abort(400)
+    return cursor
+
+
+@route("/me/history")
+@login_required
+def my_history():
+    items, next_cursor = load_history_page(current_user.id, history_cursor(), HISTORY_PAGE_SIZE)
+    return render_template(
+        "history.html",
+        items=items,
+        next_cursor=next_cursor,
+        first_page="cursor" not in request.args,
+    )
+
+
+@route("/api/me/history")
+@login_required
+def my_history_api():
+    items, next_cursor = load_history_page(current_user.id, history_cursor(), HISTORY_PAGE_SIZE)
+    for item in items:
+        item["created_at"] = item["created_at"].isoformat()
+    return jsonify(items=items, next_cursor=next_cursor)
+
+
+EXPORT_FORMATS = {
+    "csv": (history.stream_csv, "text/csv"),
+    "jsonl": (history.stream_jsonl, "application/x-ndjson"),
+}
+
+
+@route("/admin/export/answers.<fmt>")
+@admin_required
+def admin_export_answers(fmt):
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+    write, mimetype = EXPORT_FORMATS[fmt]
+    engine = read_engine("export")
+    stmt = (
+        db.select(
+            UserAnswer.id,
+            UserAnswer.user_id,
+            User.username,
+            UserAnswer.question_id,
+            UserAnswer.chosen_option_id,
+            UserAnswer.is_correct,
+            UserAnswer.created_at,
+        )
+        .join(User, User.id == UserAnswer.user_id)
+        .order_by(UserAnswer.id)
+    )
+
+    def rows():
+        with engine.connect() as conn:
+            # jawaban yang sudah diarsip dulu (lebih lama), file per file
+            archived = conn.execute(
+                db.select(AnswerArchiveFile.filename).order_by(
+                    AnswerArchiveFile.day, AnswerArchiveFile.id
+                )
+            ).scalars().all()
+            # username dicari per EXPORT_BATCH_SIZE baris arsip, bukan dimuat semua di awal
+            archive_rows = chain.from_iterable(answer_archive.rows(f) for f in archived)
+            while True:
+                chunk = list(islice(archive_rows, EXPORT_BATCH_SIZE))
+                if not chunk:
+                    break
+                usernames = dict(
+                    conn.execute(
+                        db.select(User.id, User.username).where(
+                            User.id.in_({r.user_id for r in chunk})
+                        )
+                    ).all()
+                )
+                for r in chunk:
+                    yield (r.id, r.user_id, usernames.get(r.user_id), *r[2:])
+            # cursor server-side: baris diambil per EXPORT_BATCH_SIZE, tidak dimuat sekaligus
+            result = conn.execution_options(
+                stream_results=True, yield_per=EXPORT_BATCH_SIZE
+            ).execute(stmt)
+            yield from result
+
+    filename = f"answers-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    return Response(
+        write(rows()),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+# Editor bank soal (question_editor.py). Setiap perubahan menaikkan versi bank
+# di transaksi yang sama dan menandai soal yang diubah dengan versi itu; setelah
+# commit semua worker memuat ulang snapshot (lewat invalidation_bus), dan hanya
+# soal yang berubah yang fragment HTML-nya dirender ulang.
+editor_tables = question_editor.EditorTables(
+    Question.__table__, AnswerOption.__table__, UserAnswer.__table__
+)
+# baris opsi di form editor
+EDITOR_MAX_OPTIONS = 6
+
+
+def apply_bank_change(change):
+    """Jalankan ``change(conn, version)`` dengan versi bank baru.
+
+    Commit bila ``change`` mengembalikan nilai truthy (jumlah/ID yang berubah),
+    selain itu rollback sehingga versi bank tidak naik sia-sia.
+    """
+    version = bump_bank_version()
+    try:
+        result = change(db.session.connection(), version)
+    except Exception:
+        db.session.rollback()
+        raise
+    if result:
+        db.session.commit()
+    else:
+        db.session.rollback()
+    return result
+
+
+def editor_form_record(form):
+    """QuestionRecord + id opsi (sejajar dengan record.options) dari form editor.
+
+    Baris opsi yang kosong diabaikan (opsi lamanya ikut dihapus); ValueError
+    bila isinya tidak valid.
+    """
+    correct_row = form.get("correct", type=int)
+    options, option_ids, correct = [], [], -1
+    rows = zip(form.getlist("option_id"), form.getlist("option_text"))
+    for row, (oid, text) in enumerate(rows):
+        if not text.strip():
+            continue
+        if row == correct_row:
+            correct = len(options)
+        options.append(text)
+        option_ids.append(int(oid) if oid else None)
+    record = make_record(
+        form.get("text", ""), options, correct, form.get("topic"), form.get("difficulty")
+    )
+    return record, option_ids
+
+
+def admin_questions_url(form):
+    # kembali ke daftar dengan filter yang sama
+    args = {k: form[k] for k in ("q", "topic", "status", "before") if form.get(k)}
+    return url_for("admin_questions", **args)
+
+
+@route("/admin/questions")
+@admin_required
+def admin_questions():
+    search = request.args.get("q", "").strip()
+    topic = request.args.get("topic", "").strip()
+    status = request.args.get("status", "active")
+    before = request.args.get("before", type=int)
+    stmt = db.select(
+        Question.id,
+        Question.text,
+        Question.topic,
+        Question.difficulty,
+        Question.version,
+        Question.retired_at,
+        QuestionStat.attempts,
+        QuestionStat.correct,
+    ).outerjoin(QuestionStat, QuestionStat.question_id == Question.id)
+    if status == "retired":
+        stmt = stmt.where(Question.retired_at.is_not(None))
+    elif status != "all":
+        status = "active"
+        stmt = stmt.where(Question.retired_at.is_(None))
+    if search:
+        stmt = stmt.where(Question.text.icontains(search, autoescape=True))
+    if topic:
+        stmt = stmt.where(Question.topic == topic)
+    if before:
+        # keyset: soal terbaru dulu, halaman berikutnya dimulai sebelum id terakhir
+        stmt = stmt.where(Question.id < before)
+    rows = db.session.execute(
+        stmt.order_by(Question.id.desc()).limit(ADMIN_QUESTIONS_PAGE_SIZE + 1)
+    ).all()
+    next_before = None
+    if len(rows) > ADMIN_QUESTIONS_PAGE_SIZE:
+        rows = rows[:ADMIN_QUESTIONS_PAGE_SIZE]
+        next_before = rows[-1].id
+    topics = db.session.execute(
+        db.select(Question.topic)
+        .where(Question.topic.is_not(None))
+        .distinct()
+        .order_by(Question.topic)
+    ).scalars().all()
+    return render_template(
+        "admin_questions.html",
+        rows=rows,
+        search=search,
+        topic=topic,
+        status=status,
+        before=before,
+        next_before=next_before,
+        topics=topics,
+        bank_version=get_meta_version(BANK_VERSION_KEY),
+    )
+
+
+@route("/admin/questions/bulk", methods=["POST"])
+@admin_required
+def admin_questions_bulk():
+    ids = sorted({int(i) for i in request.form.getlist("ids") if i.isdigit()})
+    action = request.form.get("action")
+    back = admin_questions_url(request.form)
+    if not ids:
+        flash("Pilih minimal satu soal.", "warning")
+        return redirect(back)
+
+    if action == "retire":
+        now = datetime.utcnow()
+        changed = apply_bank_change(
+            lambda conn, version: question_editor.set_retired(
+                conn, editor_tables, ids, now, version
+            )
+        )
+        flash(f"{changed} soal dipensiunkan.", "success")
+    elif action == "restore":
+        changed = apply_bank_change(
+            lambda conn, version: question_editor.set_retired(
+                conn, editor_tables, ids, None, version
+            )
+        )
+        flash(f"{changed} soal diaktifkan kembali.", "success")
+    elif action == "retag":
+        values = {}
+        topic = request.form.get("new_topic", "").strip()
+        if topic:
+            values["topic"] = topic
+        difficulty = request.form.get("new_difficulty", "").strip()
+        if difficulty:
+            if not difficulty.isdigit() or not 1 <= int(difficulty) <= 5:
+                flash("Tingkat kesulitan harus 1-5.", "danger")
+                return redirect(back)
+            values["difficulty"] = int(difficulty)
+        if not values:
+            flash("Isi topik dan/atau tingkat kesulitan baru.", "warning")
+            return redirect(back)
+        changed = apply_bank_change(
+            lambda conn, version: question_editor.retag_questions(
+                conn, editor_tables, ids, version, **values
+            )
+        )
+        flash(f"{changed} soal diperbarui.", "success")
+    else:
+        abort(400)
+    return redirect(back)
+
+
+@route("/admin/questions/import", methods=["POST"])
+@admin_required
+def admin_questions_import():
+    upload = request.files.get("file")
+    if upload is None or not upload.filename:
+        flash("Pilih file JSON Lines atau CSV.", "warning")
+        return redirect(url_for("admin_questions"))
+    fmt = "csv" if upload.filename.lower().endswith(".csv") else "jsonl"
+    # chunk yang sudah di-commit (juga sebelum baris yang gagal): dasar kenaikan versi bank
+    committed = {"changed": 0}
+
+    def progress(read, inserted, updated):
+        committed["changed"] = inserted + updated
+
+    # dibaca langsung dari stream upload, tanpa file sementara
+    try:
+        stats = import_questions(
+            db.engine,
+            read_stream(upload.stream, fmt),
+            Question.__table__,
+            AnswerOption.__table__,
+            progress=progress,
+        )
+    except KeyError as e:
+        stats = None
+        flash(f"Import berhenti, kolom {e} tidak ada.", "danger")
+    except ValueError as e:
+        stats = None
+        flash(f"Import berhenti, baris tidak valid: {e}", "danger")
+    if committed["changed"]:
+        bump_bank_version()
+        db.session.commit()
+    if stats is not None:
+        flash(
+            f"{stats.inserted} soal baru, {stats.skipped} sudah ada "
+            f"({stats.updated} diperbarui topik/kesulitannya).",
+            "success",
+        )
+    return redirect(url_for("admin_questions"))
+
+
+@route("/admin/questions/new", methods=["GET", "POST"])
+@route("/admin/questions/<int:qid>", methods=["GET", "POST"])
+@admin_required
+def admin_question_edit(qid=None):
+    question = None
+    if qid is not None:
+        question = db.session.get(Question, qid)
+        if question is None:
+            abort(404)
+
+    if request.method == "POST":
+        try:
+            record, option_ids = editor_form_record(request.form)
+            if question is None:
+                qid = apply_bank_change(
+                    lambda conn, version: question_editor.create_question(
+                        conn, editor_tables, record, version
+                    )
+                )
+                flash("Soal ditambahkan.", "success")
+            else:
+                apply_bank_change(
+                    lambda conn, version: question_editor.update_question(
+                        conn, editor_tables, qid, record, option_ids, version
+                    )
+                )
+                flash("Soal disimpan.", "success")
+            return redirect(url_for("admin_question_edit", qid=qid))
+        except question_editor.EditError as e:
+            flash(str(e), "danger")
+        except ValueError:
+            flash(
+                "Soal tidak valid: isi pertanyaan, minimal dua opsi, pilih satu jawaban "
+                "benar, dan tingkat kesulitan 1-5.",
+                "danger",
+            )
+        # tampilkan lagi isian admin
+        form = request.form
+        options = list(zip(form.getlist("option_id"), form.getlist("option_text")))
+        correct_row = form.get("correct", type=int)
+        values = {k: form.get(k, "") for k in ("text", "topic", "difficulty")}
+    else:
+        options, correct_row = [], None
+        values = {"text": "", "topic": "", "difficulty": ""}
+        if question is not None:
+            values = {
+                "text": question.text,
+                "topic": question.topic or "",
+                "difficulty": question.difficulty or "",
+            }
+            rows = db.session.execute(
+                db.select(AnswerOption.id, AnswerOption.text, AnswerOption.is_correct)
+                .where(AnswerOption.question_id == qid)
+                .order_by(AnswerOption.id)
+            ).all()
+            options = [(oid, text) for oid, text, _ in rows]
+            correct_row = next((i for i, r in enumerate(rows) if r.is_correct), None)
+    # baris kosong untuk opsi baru
+    options += [("", "")] * max(EDITOR_MAX_OPTIONS - len(options), 0)
+    return render_template(
+        "admin_question_form.html",
+        question=question,
+        values=values,
+        options=options,
+        correct_row=correct_row,
+    )
+
+
+@route("/metrics")
+def metrics():
+    # format teks Prometheus; angka per proses worker
+    if not INSTRUMENTATION:
+        abort(404)
+    if METRICS_TOKEN and not secrets.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {METRICS_TOKEN}"
+    ):
+        abort(403)
+    return Response(
+        instrumentation.render_metrics(), mimetype="text/plain; version=0.0.4"
+    )
+
+
+# CLI: flask --app app schema upgrade
+schema_cli = AppGroup("schema", help="Kelola skema database.")
+
+
+def init_schema():
+    db.create_all()
+    return migrations.upgrade(db.engine, AppMeta.__table__)
+
+
+@schema_cli.command("upgrade")
+def schema_upgrade():
+    """Buat tabel baru dan jalankan migrasi yang belum diterapkan."""
+    applied = init_schema()
+    click.echo(f"Schema up to date (applied: {applied or 'none'}).")
+
+
+# CLI: flask --app app questions import soal.jsonl soal.csv
+questions_cli = AppGroup("questions", help="Kelola bank soal.")
+
+
+@questions_cli.command("import")
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(["jsonl", "csv"]), help="Default: dari ekstensi file.")
+@click.option("--chunk-size", default=500, show_default=True, help="Soal per transaksi.")
+def questions_import(paths, fmt, chunk_size):
+    """Import soal dari file JSON Lines/CSV (soal yang sudah ada dilewati)."""
+    init_schema()
+    total_changed = 0
+    for path in paths:
+        stats = import_questions(
+            db.engine,
+            read_questions(path, fmt),
+            Question.__table__,
+            AnswerOption.__table__,
+            chunk_size=chunk_size,
+        )
+        rate = stats.read / stats.seconds if stats.seconds else 0
+        click.echo(
+            f"{path}: {stats.read} read, {stats.inserted} inserted, "
+            f"{stats.skipped} skipped ({stats.updated} retagged) in {stats.seconds:.2f}s "
+            f"({rate:,.0f} rows/s)"
+        )
+        total_changed += stats.inserted + stats.updated
+    if total_changed:
+        bump_bank_version()
+        db.session.commit()
+
+
+# CLI: flask --app app answers archive --days 180
+answers_cli = AppGroup("answers", help="Kelola data jawaban kuis.")
+
+
+@answers_cli.command("archive")
+@click.option("--days", default=ANSWER_RETENTION_DAYS, show_default=True, help="Jendela hot (hari).")
+@click.option("--dry-run", is_flag=True, help="Hanya hitung baris yang akan diarsip.")
+def answers_archive(days, dry_run):
+    """Ringkas dan arsipkan jawaban lama, lalu hapus dari tabel user_answer."""
+    init_schema()
+    cutoff = retention.retention_cutoff(days)
+
+    def progress(day, count, filename):
+        click.echo(f"{day}: {count} rows" + (f" -> {filename}" if filename else ""))
+
+    stats = retention.archive_answers(
+        db.engine, retention_tables, ANSWER_ARCHIVE_DIR, cutoff, dry_run=dry_run, progress=progress
+    )
+    click.echo(
+        f"{'Would archive' if dry_run else 'Archived'} {stats.rows} rows over {stats.days} day(s) "
+        f"before {cutoff:%Y-%m-%d} ({stats.files} file(s), {stats.seconds:.2f}s)."
+    )
+
+
+@answers_cli.command("replay")
+@click.argument("path", default=ANSWER_SPILL_PATH, type=click.Path(dir_okay=False))
+def answers_replay(path):
+    """Tulis ulang jawaban write-behind yang di-spill ke file saat flush gagal."""
+    if not os.path.exists(path):
+        click.echo(f"{path}: nothing to replay.")
+        return
+    init_schema()
+    items = list(read_spill(path))
+    users = set()
+    for start in range(0, len(items), ANSWER_BATCH_SIZE):
+        chunk = items[start : start + ANSWER_BATCH_SIZE]
+        deltas = Counter()
+        for row, delta in chunk:
+            if delta:
+                deltas[row["user_id"]] += delta
+        flush_answer_batch([row for row, _ in chunk], dict(deltas))
+        users.update(deltas)
+    # skor baru masuk DB: entri leaderboard (semua worker) diset ke total yang tersimpan
+    for user_id in sorted(users):
+        user = db.session.get(User, user_id)
+        if user is not None:
+            sync_leaderboard(user)
+    done = f"{path}.replayed-{datetime.utcnow():%Y%m%d-%H%M%S}"
+    os.replace(path, done)
+    click.echo(f"Replayed {len(items)} answers for {len(users)} user(s); file moved to {done}.")
+
+
+# CLI: flask --app app assets compress
+assets_cli = AppGroup("assets", help="Kelola file static.")
+
+
+@assets_cli.command("compress")
+@click.option("--min-size", default=256, show_default=True, help="File lebih kecil dilewati.")
+def assets_compress(min_size):
+    """Buat varian .gz (dan .br bila paket brotli terpasang) untuk CSS/JS."""
+    results = static_assets.compress(min_size=min_size)
+    for filename, encoding, size, compressed in results:
+        click.echo(f"{filename} [{encoding}]: {size:,} -> {compressed:,} bytes")
+    click.echo(f"{len(results)} variant(s) written.")
+
+
+def create_app():
+    """Bangun Flask app: config, ekstensi, route dan perintah CLI.
+
+    Cache, store dan pool di modul ini dibagi per proses, jadi satu proses
+    cukup memakai satu app (lihat get_app).
+    """
+    app = Flask(__name__)
+    app.config["SECRET_KEY"] = SECRET_KEY
+    app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE_URL
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # profil engine: pragma SQLite / pool MySQL (DB_PROFILE=plain untuk default SQLAlchemy)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = db_profile.engine_options(DATABASE_URL, os.environ)
+    if DATABASE_REPLICA_URL:
+        app.config["SQLALCHEMY_BINDS"] = {"replica": DATABASE_REPLICA_URL}
+    if PROXY_COUNT:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_COUNT)
+
+    db.init_app(app)
+    login_manager.init_app(app)
+    static_assets.init_app(app)
+    if INSTRUMENTATION:
+        instrumentation.init_app(app)
+    for rule, view, options in _routes:
+        app.add_url_rule(rule, view_func=view, **options)
+    for group in (schema_cli, questions_cli, assets_cli, answers_cli):
+        app.cli.add_command(group)
+    return app
+
+
+_app = None
+
+
+def get_app():
+    global _app
+    if _app is None:
+        _app = create_app()
+    return _app
+
+
+def __getattr__(name):
+    # `from app import app` (wsqi.py, bench, `flask --app app`) tetap berfungsi;
+    # app baru dibuat saat pertama diminta
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def check_schema():
+    """Bandingkan versi skema tercatat dengan migrasi terakhir (satu query).
+
+    Dijalankan sekali saat startup, bukan di jalur request. Bila tertinggal:
+    upgrade otomatis dengan SCHEMA_AUTO_UPGRADE=1, selain itu log error.
+    Kembalikan True bila skema (sekarang) sudah terbaru.
+    """
+    try:
+        with db.engine.connect() as conn:
+            version = migrations.current_version(conn, AppMeta.__table__)
+    except (OperationalError, ProgrammingError):
+        version = None  # database baru: tabel app_meta belum ada
+    latest = migrations.latest_version()
+    if version is not None and version >= latest:
+        return True
+    if SCHEMA_AUTO_UPGRADE:
+        init_schema()
+        return True
+    current_app.logger.error(
+        "database schema at version %s, code expects %s: run `flask --app app schema upgrade`",
+        version,
+        latest,
+    )
+    return False
+
+
+def warm_up(app):
+    """Isi cache yang biasanya dibangun request pertama: bank soal, leaderboard,
+    template Jinja dan pool hashing."""
+    started = time.perf_counter()
+    question_bank.snapshot()
+    leaderboard_store.ensure_loaded()
+    for name in app.jinja_env.list_templates(filter_func=lambda n: n.endswith(".html")):
+        app.jinja_env.get_template(name)
+    password_hasher.warm_up()
+    app.logger.info("warm-up done in %.0f ms", (time.perf_counter() - started) * 1000)
+
+
+def startup(app=None):
+    """Persiapan worker sebelum menerima traffic (dipanggil wsqi.py)."""
+    app = app or get_app()
+    with app.app_context():
+        # tanpa skema terbaru warm-up akan gagal; request tetap dilayani seperti biasa
+        if check_schema():
+            # bus dimulai sebelum warm-up agar tidak ada event yang terlewat di antaranya
+            invalidation_bus.start()
+            if WARM_UP:
+                warm_up(app)
+    return app
 
 
 if __name__ == "__main__":
+    app = get_app()
     with app.app_context():
-        db.create_all()
+        init_schema()
     app.run(debug=True)
@@ -0,0 +1,103 @@
+# bench/forecast_bench.py
+# Micro-benchmark agregasi forecast: implementasi lama (defaultdict +
+# datetime.fromtimestamp per item) vs summarize_forecast di weather.py.
+#
+#   python bench/forecast_bench.py                      # semua payload di bench/payloads
+#   python bench/forecast_bench.py --record Makassar    # simpan payload asli (butuh OWM_API_KEY)
+import argparse
+import json
+import os
+import sys
+import timeit
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from weather import HAS_NUMPY, ID_DAYS, summarize_forecast  # noqa: E402
+
+PAYLOAD_DIR = Path(__file__).resolve().parent / "payloads"
+
+
+def legacy_summarize(forecast_list):
+    # salinan loop lama dari get_weather, sebagai pembanding
+    daily_data = defaultdict(list)
+    for item in forecast_list:
+        dt = datetime.fromtimestamp(item["dt"])
+        daily_data[dt.date()].append({"temp": item["main"]["temp"], "hour": dt.hour})
+    rows = []
+    for date_key in sorted(daily_data.keys())[:3]:
+        temps = daily_data[date_key]
+        day_temps = [t["temp"] for t in temps if 12 <= t["hour"] <= 15]
+        night_temps = [t["temp"] for t in temps if t["hour"] >= 21 or t["hour"] <= 3]
+        day_temp = round(max(day_temps)) if day_temps else round(max(t["temp"] for t in temps))
+        night_temp = round(min(night_temps)) if night_temps else round(min(t["temp"] for t in temps))
+        rows.append(
+            {
+                "day": ID_DAYS[date_key.weekday()],
+                "date": date_key.strftime("%Y-%m-%d"),
+                "day_temp": day_temp,
+                "night_temp": night_temp,
+            }
+        )
+    return rows
+
+
+def record(city):
+    import requests
+
+    key = os.environ["OWM_API_KEY"]
+    geo = requests.get(
+        "https://api.openweathermap.org/geo/1.0/direct",
+        params={"q": city, "limit": 1, "appid": key},
+        timeout=10,
+    ).json()
+    data = requests.get(
+        "https://api.openweathermap.org/data/2.5/forecast",
+        params={"lat": geo[0]["lat"], "lon": geo[0]["lon"], "units": "metric", "appid": key},
+        timeout=10,
+    ).json()
+    path = PAYLOAD_DIR / f"forecast_{city.lower().replace(' ', '_')}.json"
+    path.write_text(json.dumps(data, indent=1))
+    print(f"saved {path}")
+
+
+def bench(path, number):
+    data = json.loads(Path(path).read_text())
+    forecast_list = data["list"]
+    # legacy memakai zona waktu server, jadi bandingkan hasil dengan offset yang sama
+    assert summarize_forecast(forecast_list) == legacy_summarize(forecast_list)
+
+    cases = [
+        ("legacy", lambda: legacy_summarize(forecast_list)),
+        ("python", lambda: summarize_forecast(forecast_list, data["city"]["timezone"], use_numpy=False)),
+    ]
+    if HAS_NUMPY:
+        cases.append(
+            ("numpy", lambda: summarize_forecast(forecast_list, data["city"]["timezone"], use_numpy=True))
+        )
+    print(f"{Path(path).name} ({len(forecast_list)} items, {number} runs)")
+    base = None
+    for name, fn in cases:
+        per_call = min(timeit.repeat(fn, number=number, repeat=5)) / number
+        base = base or per_call
+        print(f"  {name:<8} {per_call * 1e6:8.1f} us/call  x{base / per_call:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark agregasi forecast cuaca")
+    parser.add_argument("payloads", nargs="*", help="file JSON respons /data/2.5/forecast")
+    parser.add_argument("-n", "--number", type=int, default=2000)
+    parser.add_argument("--record", metavar="CITY", help="ambil dan simpan payload asli")
+    args = parser.parse_args()
+    if args.record:
+        record(args.record)
+        return
+    for path in args.payloads or sorted(PAYLOAD_DIR.glob("*.json")):
+        bench(path, args.number)
+
+
+if __name__ == "__main__":
+    main()
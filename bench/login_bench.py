@@ -0,0 +1,127 @@
+# bench/login_bench.py
+# Throughput login di bawah konkurensi: N thread login bersamaan (seperti satu
+# kelas login sekaligus) sementara satu thread "probe" mengukur latensi
+# halaman ringan. Dibandingkan untuk beberapa ukuran process pool hashing.
+#
+#   python bench/login_bench.py                              # workers 0 dan 2
+#   python bench/login_bench.py --workers 0,2,4 --concurrency 16
+#   python bench/login_bench.py --method pbkdf2:sha256:600000
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+PASSWORD = "bench-password"
+
+
+def setup(args):
+    # harus sebelum `import app`: konfigurasi dibaca saat modul dimuat
+    tmpdir = tempfile.mkdtemp(prefix="login-bench-")
+    os.environ.update(
+        DATABASE_URL="sqlite:///" + os.path.join(tmpdir, "bench.db"),
+        PASSWORD_HASH_METHOD=args.method,
+        # yang diukur hashing, bukan rate limiter
+        AUTH_RATE_PER_IP="",
+        LOGIN_FAILURE_RATE="",
+    )
+    import app as app_module
+    from werkzeug.security import generate_password_hash
+
+    with app_module.app.app_context():
+        app_module.init_schema()
+        pw_hash = generate_password_hash(PASSWORD, method=app_module.password_hasher.policy.method)
+        app_module.db.session.execute(
+            app_module.User.__table__.insert(),
+            [
+                {"email": f"bench{i}@example.com", "username": f"bench{i}", "password_hash": pw_hash}
+                for i in range(args.concurrency)
+            ],
+        )
+        app_module.db.session.commit()
+    return app_module
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+def run(app_module, workers, args):
+    from passwords import PasswordHasher
+
+    old = app_module.password_hasher
+    hasher = PasswordHasher(old.policy, workers=workers, max_pending=args.concurrency, timeout=60)
+    app_module.password_hasher = hasher
+    if workers:
+        # proses pool dimulai di luar pengukuran
+        hasher.hash(PASSWORD)
+
+    login_times, probe_times = [], []
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def login_user(i):
+        client = app_module.app.test_client()
+        for _ in range(args.logins):
+            started = time.perf_counter()
+            resp = client.post(
+                "/login", data={"email_or_username": f"bench{i}", "password": PASSWORD}
+            )
+            elapsed = time.perf_counter() - started
+            assert resp.status_code == 302, resp.status_code
+            client.get("/logout")
+            with lock:
+                login_times.append(elapsed)
+
+    def probe():
+        client = app_module.app.test_client()
+        while not done.is_set():
+            started = time.perf_counter()
+            client.get("/login")
+            probe_times.append(time.perf_counter() - started)
+            time.sleep(0.005)
+
+    prober = threading.Thread(target=probe)
+    prober.start()
+    threads = [threading.Thread(target=login_user, args=(i,)) for i in range(args.concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    prober.join()
+    hasher.close()
+    app_module.password_hasher = old
+
+    print(
+        f"{workers:>8}{len(login_times) / elapsed:>12.1f}"
+        f"{percentile(login_times, 50) * 1000:>11.1f}{percentile(login_times, 95) * 1000:>11.1f}"
+        f"{percentile(probe_times, 50) * 1000:>12.2f}{percentile(probe_times, 95) * 1000:>12.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark throughput login")
+    parser.add_argument("--workers", default="0,2", help="ukuran process pool, dipisah koma")
+    parser.add_argument("--concurrency", type=int, default=8, help="login bersamaan")
+    parser.add_argument("--logins", type=int, default=3, help="login per thread")
+    parser.add_argument("--method", default="scrypt:32768:8:1", help="PASSWORD_HASH_METHOD")
+    args = parser.parse_args()
+
+    app_module = setup(args)
+    print(f"policy {app_module.password_hasher.policy.method}, {os.cpu_count()} CPU")
+    print(f"{'workers':>8}{'logins/s':>12}{'p50 ms':>11}{'p95 ms':>11}{'probe p50':>12}{'probe p95':>12}")
+    for workers in (int(w) for w in args.workers.split(",")):
+        run(app_module, workers, args)
+
+
+if __name__ == "__main__":
+    main()
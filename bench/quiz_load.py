@@ -0,0 +1,415 @@
+# bench/quiz_load.py
+# Load test siklus kuis lengkap: login -> 20x (GET, POST /quiz) -> selesai,
+# dijalankan oleh beberapa virtual user bersamaan terhadap app Flask.
+# Melaporkan latensi p50/p95/p99, throughput, dan jumlah query SQL per route.
+#
+#   python bench/quiz_load.py --users 50 --questions 500 --vus 10
+#   python bench/quiz_load.py --json baseline.json           # simpan baseline
+#   python bench/quiz_load.py --baseline baseline.json       # gagal jika regresi
+#   python bench/quiz_load.py --mode server                  # lewat server WSGI lokal
+#   python bench/quiz_load.py --check-queries                # gagal jika query > anggaran
+#   python bench/quiz_load.py --flow api                     # kuis lewat API JSON (quiz.js)
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+PAYLOAD = Path(__file__).resolve().parent / "payloads" / "forecast_makassar.json"
+QID_RE = re.compile(r'name="question_id" value="(\d+)"')
+OPT_RE = re.compile(r'name="option_id" value="(\d+)"')
+PASSWORD = "bench-password"
+
+# batas query SQL per request dengan interval cache default (kasus terburuk: QUIZ_STORE=sql)
+QUERY_BUDGET = {
+    "GET /": 0,
+    "GET /api/weather": 0,
+    "POST /login": 1,
+    "GET /quiz/reset": 3,
+    "GET /quiz": 5,
+    "POST /quiz": 5,
+    "POST /api/quiz/answer": 5,
+    "GET /quiz/finish": 2,
+    "GET /leaderboard": 1,
+    # tidak dipanggil alur bench, hanya oleh tests/test_query_counts.py
+    "GET /me/history": 2,
+    "GET /api/me/history": 2,
+    "GET /logout": 1,
+}
+
+
+class OWMStub(BaseHTTPRequestHandler):
+    """Stub OpenWeatherMap: geocoding + forecast dari payload rekaman."""
+
+    forecast = PAYLOAD.read_bytes() if PAYLOAD.exists() else b'{"list": []}'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.endswith("/direct"):
+            city = parse_qs(url.query).get("q", [""])[0]
+            body = json.dumps([{"name": city, "lat": -5.14, "lon": 119.43}]).encode()
+        else:
+            body = self.forecast
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_owm_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OWMStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def configure_env(args):
+    # harus sebelum `import app`: konfigurasi dibaca saat modul dimuat
+    if not args.database_url:
+        tmpdir = tempfile.mkdtemp(prefix="quiz-bench-")
+        args.database_url = "sqlite:///" + os.path.join(tmpdir, "bench.db")
+    stub = start_owm_stub()
+    os.environ.update(
+        DATABASE_URL=args.database_url,
+        OWM_API_KEY="bench",
+        OWM_GEOCODE_URL=stub + "/geo/1.0/direct",
+        OWM_FORECAST_URL=stub + "/data/2.5/forecast",
+    )
+    # semua virtual user login dari 127.0.0.1: rate limit login dimatikan kecuali diminta
+    os.environ.setdefault("AUTH_RATE_PER_IP", "")
+    os.environ.setdefault("LOGIN_FAILURE_RATE", "")
+
+
+class SQLCounter:
+    """Hitung query SQL per request di sisi server (per route)."""
+
+    def __init__(self, app):
+        from flask import request
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        self._local = threading.local()
+        self.per_route = defaultdict(list)
+        self._lock = threading.Lock()
+
+        @event.listens_for(Engine, "before_cursor_execute")
+        def _count(*_):
+            if getattr(self._local, "active", False):
+                self._local.count += 1
+
+        @app.before_request
+        def _start():
+            self._local.active = True
+            self._local.count = 0
+
+        @app.teardown_request
+        def _stop(_exc):
+            if not getattr(self._local, "active", False):
+                return
+            self._local.active = False
+            rule = request.url_rule.rule if request.url_rule else request.path
+            with self._lock:
+                self.per_route[f"{request.method} {rule}"].append(self._local.count)
+
+
+def seed(app_module, n_users, n_questions):
+    from werkzeug.security import generate_password_hash
+    from question_import import QuestionRecord, import_questions
+
+    app, db = app_module.app, app_module.db
+    with app.app_context():
+        app_module.init_schema()
+        records = (
+            QuestionRecord(
+                f"Pertanyaan benchmark {i}?", [f"A{i}", f"B{i}", f"C{i}", f"D{i}"], i % 4
+            )
+            for i in range(n_questions)
+        )
+        import_questions(
+            db.engine, records, app_module.Question.__table__, app_module.AnswerOption.__table__
+        )
+        # satu hash dipakai semua user: seeding tidak perlu menunggu hashing N kali
+        pw_hash = generate_password_hash(
+            PASSWORD, method=app_module.password_hasher.policy.method
+        )
+        existing = {u for (u,) in db.session.query(app_module.User.username)}
+        users = [
+            {"email": f"bench{i}@example.com", "username": f"bench{i}", "password_hash": pw_hash}
+            for i in range(n_users)
+            if f"bench{i}" not in existing
+        ]
+        if users:
+            db.session.execute(app_module.User.__table__.insert(), users)
+        app_module.bump_bank_version()
+        db.session.commit()
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.bytes = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, label, seconds, ok, size=0):
+        with self._lock:
+            self.latencies[label].append(seconds)
+            self.bytes[label] += size
+            if not ok:
+                self.errors[label] += 1
+
+
+class TestClientTransport:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None, json=None):
+        resp = self.client.open(path, method=method, data=data, json=json)
+        return resp.status_code, resp.get_data(as_text=True)
+
+
+class HTTPTransport:
+    def __init__(self, base_url):
+        import requests
+
+        self.base_url = base_url
+        self.session = requests.Session()
+
+    def request(self, method, path, data=None, json=None):
+        resp = self.session.request(
+            method, self.base_url + path, data=data, json=json, allow_redirects=False, timeout=30
+        )
+        return resp.status_code, resp.text
+
+
+def timed(recorder, transport, label, method, path, data=None, json=None):
+    started = time.perf_counter()
+    status, body = transport.request(method, path, data, json)
+    recorder.record(label, time.perf_counter() - started, status < 400, len(body.encode()))
+    return status, body
+
+
+def answer_html(transport, recorder, max_questions):
+    # form biasa: GET soal, POST jawaban, redirect ke GET berikutnya
+    for _ in range(max_questions):
+        status, body = timed(recorder, transport, "GET /quiz", "GET", "/quiz")
+        qid, opts = QID_RE.search(body or ""), OPT_RE.findall(body or "")
+        if status != 200 or not qid or not opts:
+            break
+        timed(
+            recorder,
+            transport,
+            "POST /quiz",
+            "POST",
+            "/quiz",
+            {"question_id": qid.group(1), "option_id": opts[0]},
+        )
+
+
+def answer_api(transport, recorder, max_questions):
+    # static/js/quiz.js: satu halaman /quiz, lalu satu POST JSON per soal
+    status, body = timed(recorder, transport, "GET /quiz", "GET", "/quiz")
+    qid, opts = QID_RE.search(body or ""), OPT_RE.findall(body or "")
+    if status != 200 or not qid or not opts:
+        return
+    question = {"id": int(qid.group(1)), "options": [{"id": int(opts[0])}]}
+    for _ in range(max_questions):
+        status, body = timed(
+            recorder,
+            transport,
+            "POST /api/quiz/answer",
+            "POST",
+            "/api/quiz/answer",
+            json={"question_id": question["id"], "option_id": question["options"][0]["id"]},
+        )
+        question = json.loads(body).get("question") if status == 200 else None
+        if not question:
+            break
+
+
+def run_flow(transport, recorder, username, max_questions, flow="html"):
+    timed(recorder, transport, "GET /", "GET", "/")
+    timed(recorder, transport, "GET /api/weather", "GET", "/api/weather?city=Makassar")
+    timed(
+        recorder,
+        transport,
+        "POST /login",
+        "POST",
+        "/login",
+        {"email_or_username": username, "password": PASSWORD},
+    )
+    timed(recorder, transport, "GET /quiz/reset", "GET", "/quiz/reset")
+    (answer_api if flow == "api" else answer_html)(transport, recorder, max_questions)
+    timed(recorder, transport, "GET /quiz/finish", "GET", "/quiz/finish")
+    timed(recorder, transport, "GET /leaderboard", "GET", "/leaderboard")
+    timed(recorder, transport, "GET /logout", "GET", "/logout")
+
+
+def start_wsgi_server(app):
+    import logging
+
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(recorder, counter, elapsed):
+    routes = {}
+    for label, values in sorted(recorder.latencies.items()):
+        queries = counter.per_route.get(label, [])
+        routes[label] = {
+            "count": len(values),
+            "errors": recorder.errors.get(label, 0),
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "queries_avg": sum(queries) / len(queries) if queries else 0.0,
+            "queries_max": max(queries) if queries else 0,
+            "bytes_avg": recorder.bytes[label] / len(values) if values else 0.0,
+        }
+    total = sum(r["count"] for r in routes.values())
+    total_bytes = sum(recorder.bytes.values())
+    return {
+        "elapsed_s": elapsed,
+        "requests": total,
+        "bytes": total_bytes,
+        "rps": total / elapsed,
+        "routes": routes,
+    }
+
+
+def print_report(report):
+    print(
+        f"{'route':<24}{'n':>7}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        f"{'q avg':>7}{'q max':>7}{'B avg':>8}"
+    )
+    for label, r in report["routes"].items():
+        print(
+            f"{label:<24}{r['count']:>7}{r['errors']:>5}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}"
+            f"{r['p99_ms']:>9.2f}{r['queries_avg']:>7.1f}{r['queries_max']:>7}"
+            f"{r.get('bytes_avg', 0):>8.0f}"
+        )
+    print(
+        f"{report['requests']} requests, {report.get('bytes', 0) / 1024:,.0f} KiB "
+        f"in {report['elapsed_s']:.2f}s ({report['rps']:.1f} req/s)"
+    )
+
+
+def compare(report, baseline, tolerance):
+    failures = []
+    for label, base in baseline["routes"].items():
+        cur = report["routes"].get(label)
+        if cur is None:
+            continue
+        if cur["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            failures.append(f"{label}: p95 {cur['p95_ms']:.2f}ms > baseline {base['p95_ms']:.2f}ms")
+        if cur["queries_max"] > base["queries_max"]:
+            failures.append(f"{label}: {cur['queries_max']} queries > baseline {base['queries_max']}")
+    return failures
+
+
+def check_queries(report):
+    failures = []
+    for label, r in report["routes"].items():
+        budget = QUERY_BUDGET.get(label)
+        if budget is not None and r["queries_max"] > budget:
+            failures.append(f"{label}: {r['queries_max']} queries > budget {budget}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test siklus kuis")
+    parser.add_argument("--users", type=int, default=50, help="jumlah user yang di-seed")
+    parser.add_argument("--questions", type=int, default=200, help="jumlah soal yang di-seed")
+    parser.add_argument("--vus", type=int, default=10, help="virtual user bersamaan")
+    parser.add_argument("--iterations", type=int, default=2, help="siklus kuis per virtual user")
+    parser.add_argument("--mode", choices=["client", "server"], default="client")
+    parser.add_argument(
+        "--flow", choices=["html", "api"], default="html", help="form biasa atau API JSON (quiz.js)"
+    )
+    parser.add_argument("--database-url", help="default: SQLite sementara")
+    parser.add_argument("--json", help="simpan hasil ke file JSON")
+    parser.add_argument("--baseline", help="bandingkan dengan hasil JSON sebelumnya")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="toleransi regresi p95")
+    parser.add_argument(
+        "--check-queries", action="store_true", help="gagal jika query per route melebihi QUERY_BUDGET"
+    )
+    args = parser.parse_args()
+    args.users = max(args.users, args.vus)
+
+    configure_env(args)
+    import app as app_module
+
+    seed(app_module, args.users, args.questions)
+    # seperti wsqi.py: thread bus invalidasi berjalan, publish dari request hanya antre
+    app_module.startup()
+    counter = SQLCounter(app_module.app)
+    recorder = Recorder()
+
+    server = None
+    if args.mode == "server":
+        server, base_url = start_wsgi_server(app_module.app)
+        make_transport = lambda: HTTPTransport(base_url)  # noqa: E731
+    else:
+        make_transport = lambda: TestClientTransport(app_module.app)  # noqa: E731
+
+    def virtual_user(i):
+        transport = make_transport()
+        for _ in range(args.iterations):
+            run_flow(transport, recorder, f"bench{i}", app_module.MAX_QUESTIONS, args.flow)
+
+    threads = [threading.Thread(target=virtual_user, args=(i,)) for i in range(args.vus)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    if server is not None:
+        server.shutdown()
+
+    report = summarize(recorder, counter, elapsed)
+    params = ("users", "questions", "vus", "iterations", "mode", "flow")
+    report["params"] = {k: getattr(args, k) for k in params}
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    failures = []
+    if args.baseline:
+        failures += compare(report, json.loads(Path(args.baseline).read_text()), args.tolerance)
+    if args.check_queries:
+        failures += check_queries(report)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
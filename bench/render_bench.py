@@ -0,0 +1,114 @@
+# bench/render_bench.py
+# Waktu render halaman GET /quiz per request: render penuh (quiz.html, kartu
+# kuis dan form soal setiap kali) vs cache fragmen form soal + shell halaman.
+#
+#   python bench/render_bench.py                          # 20 soal, 50 user
+#   python bench/render_bench.py --questions 500 --reload 0.2
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def setup(args):
+    # harus sebelum `import app`: konfigurasi dibaca saat modul dimuat
+    tmpdir = tempfile.mkdtemp(prefix="render-bench-")
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tmpdir, "bench.db")
+    import app as app_module
+    from question_import import QuestionRecord, import_questions
+
+    with app_module.app.app_context():
+        app_module.init_schema()
+        import_questions(
+            app_module.db.engine,
+            (
+                QuestionRecord(
+                    f"Pertanyaan benchmark {i}: apa fungsi utama lapisan konvolusi?",
+                    [f"Jawaban {c}{i} yang cukup panjang untuk ditampilkan" for c in "ABCD"],
+                    i % 4,
+                )
+                for i in range(args.questions)
+            ),
+            app_module.Question.__table__,
+            app_module.AnswerOption.__table__,
+        )
+        app_module.bump_bank_version()
+        app_module.db.session.commit()
+    return app_module
+
+
+def workload(app_module, args):
+    """Urutan (user, progres, soal, opsi) seperti 20 langkah kuis per user;
+    sebagian langkah dimuat ulang (refresh) dengan soal dan urutan opsi yang sama."""
+    rng = random.Random(args.seed)
+    with app_module.app.app_context():
+        snap = app_module.question_bank.snapshot()
+    steps = []
+    for uid in range(1, args.users + 1):
+        for progress in range(app_module.MAX_QUESTIONS):
+            q = snap.questions[rng.choice(snap.ids)]
+            options = app_module.question_bank.shuffled_options(q, rng)
+            steps.append((uid, progress, q, options))
+            if rng.random() < args.reload:
+                steps.append((uid, progress, q, options))
+    return steps
+
+
+def run(app_module, steps, cached):
+    from flask_login import login_user
+    from identity import UserSnapshot
+
+    app_module.FRAGMENT_CACHE_BYTES = app_module.fragment_cache.max_bytes if cached else 0
+    app_module.QUIZ_SHELL_CACHE_TTL = 60 if cached else 0
+    app_module.fragment_cache.clear()
+    app_module.quiz_shell_cache.clear()
+    timings = []
+    for uid, progress, q, options in steps:
+        with app_module.app.test_request_context("/quiz"):
+            login_user(UserSnapshot(uid, f"bench{uid}", progress, None))
+            started = time.perf_counter()
+            app_module.render_quiz_page(q, options, progress)
+            timings.append(time.perf_counter() - started)
+    return timings
+
+
+def report(label, timings):
+    ordered = sorted(timings)
+    mean = sum(ordered) / len(ordered)
+    p95 = ordered[int(len(ordered) * 0.95)]
+    print(f"{label:<10}{len(ordered):>8}{mean * 1e6:>12.1f}{p95 * 1e6:>12.1f}")
+    return mean
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark render halaman kuis")
+    parser.add_argument("--questions", type=int, default=20, help="jumlah soal di bank")
+    parser.add_argument("--users", type=int, default=50, help="user, masing-masing 20 langkah")
+    parser.add_argument("--reload", type=float, default=0.1, help="peluang refresh per langkah")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    app_module = setup(args)
+    steps = workload(app_module, args)
+    # pemanasan: kompilasi template Jinja tidak ikut diukur
+    run(app_module, steps[:50], cached=False)
+
+    print(f"{'mode':<10}{'renders':>8}{'mean us':>12}{'p95 us':>12}")
+    full = report("full", run(app_module, steps, cached=False))
+    cached = report("cached", run(app_module, steps, cached=True))
+    frag = app_module.fragment_cache
+    total = frag.hits + frag.misses
+    print(
+        f"fragment hit rate {frag.hits / total:.1%} ({len(frag)} entries, {frag.size:,} bytes); "
+        f"speedup {full / cached:.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
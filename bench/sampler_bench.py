@@ -0,0 +1,71 @@
+# bench/sampler_bench.py
+# Biaya seleksi adaptif pada bank soal besar: membangun Fenwick tree bobot
+# dasar (sekali per snapshot) lalu membuat plan 20 soal per attempt untuk
+# user dengan riwayat sepanjang k soal. Tanpa database: bank dibuat sintetis.
+#
+#   python bench/sampler_bench.py                       # 100k soal
+#   python bench/sampler_bench.py --questions 10000 --history 0,100,5000
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from question_bank import QuestionBank  # noqa: E402
+from sampler import AdaptivePolicy  # noqa: E402
+
+
+def make_bank(n, rng):
+    rows = []
+    for qid in range(1, n + 1):
+        difficulty = rng.choice((None, 1, 2, 3, 4, 5))
+        for k in range(4):
+            rows.append((qid, f"Q{qid}", "bench", difficulty, 0, qid * 4 + k, "opsi", k == 0))
+    return QuestionBank(lambda: (1, rows), lambda: 1, check_interval=3600)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sampler soal adaptif")
+    parser.add_argument("--questions", type=int, default=100_000)
+    parser.add_argument("--history", default="0,200,2000", help="panjang riwayat user, dipisah koma")
+    parser.add_argument("--attempts", type=int, default=200, help="plan per ukuran riwayat")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    bank = make_bank(args.questions, rng)
+    policy = AdaptivePolicy()
+    started = time.perf_counter()
+    snap = bank.snapshot()
+    loaded = time.perf_counter()
+    for level in policy.LEVELS:
+        snap.tree("bench", level, policy)
+    built = time.perf_counter()
+    print(
+        f"{args.questions:,} questions: snapshot {1e3 * (loaded - started):.0f} ms, "
+        f"{len(policy.LEVELS)} trees {1e3 * (built - loaded):.0f} ms"
+    )
+
+    print(f"{'history':>8}{'uniform us':>12}{'adaptive us':>13}")
+    for k in (int(h) for h in args.history.split(",")):
+        history = {
+            qid: (rng.randint(1, 4), rng.randint(0, 1)) for qid in rng.sample(snap.ids, k)
+        }
+        timings = []
+        for adaptive in (False, True):
+            started = time.perf_counter()
+            for seed in range(args.attempts):
+                bank.build_plan(
+                    seed, 20, topic="bench",
+                    history=history if adaptive else None,
+                    policy=policy if adaptive else None,
+                )
+            timings.append((time.perf_counter() - started) / args.attempts)
+        print(f"{k:>8}{timings[0] * 1e6:>12.1f}{timings[1] * 1e6:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
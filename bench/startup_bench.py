@@ -0,0 +1,88 @@
+# bench/startup_bench.py
+# Waktu cold start satu worker: import modul app, create_app() dan startup()
+# (cek skema + warm-up cache), masing-masing di proses Python baru, plus
+# laporan `python -X importtime` untuk modul yang paling mahal diimpor.
+#
+#   python bench/startup_bench.py                 # 5 run, 15 modul teratas
+#   python bench/startup_bench.py --runs 10 --top 30
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PHASES = """
+import json, time
+t0 = time.perf_counter()
+import app as app_module
+t1 = time.perf_counter()
+application = app_module.get_app()
+t2 = time.perf_counter()
+app_module.startup(application)
+t3 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "create_app": t2 - t1, "startup": t3 - t2}))
+"""
+
+
+def run_phases(env):
+    out = subprocess.run(
+        [sys.executable, "-c", PHASES], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def import_report(env, top):
+    # baris stderr: "import time: self [us] | cumulative | imported package"
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[12:].split("|")
+        # indentasi nama = kedalaman import; anak dicetak sebelum induknya
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0 and name.strip() != "app":
+            rows = []  # modul dari startup interpreter (site, .pth), bukan dari app
+        elif depth <= 1:
+            rows.append((int(cumulative), int(self_us), depth, name.strip()))
+        if name.strip() == "app":
+            break
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold start worker")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="modul termahal yang ditampilkan")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="startup-bench-")
+    env = dict(
+        os.environ,
+        DATABASE_URL="sqlite:///" + os.path.join(tmpdir, "bench.db"),
+        SCHEMA_AUTO_UPGRADE="1",
+    )
+    # run pertama membuat skema; tidak ikut diukur
+    run_phases(env)
+
+    runs = [run_phases(env) for _ in range(args.runs)]
+    print(f"{'phase':<12}{'median ms':>11}{'min ms':>9}")
+    for phase in ("import", "create_app", "startup"):
+        values = [r[phase] * 1000 for r in runs]
+        print(f"{phase:<12}{statistics.median(values):>11.1f}{min(values):>9.1f}")
+
+    print(f"\n{'cumulative ms':>14}{'self ms':>9}  module (python -X importtime)")
+    for cumulative, self_us, depth, name in import_report(env, args.top):
+        print(f"{cumulative / 1000:>14.1f}{self_us / 1000:>9.1f}  {'  ' * depth}{name}")
+
+
+if __name__ == "__main__":
+    main()
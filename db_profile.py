@@ -0,0 +1,60 @@
+# db_profile.py
+# Profil engine database: pragma SQLite (WAL, busy_timeout, cache) agar penulis
+# kuis yang bersamaan tidak kena "database is locked", dan pengaturan pool untuk
+# MySQL (pool size, overflow, pre-ping, recycle).
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+
+def _env_int(env, name, default):
+    return int(env.get(name, default))
+
+
+def sqlite_pragmas(env):
+    return {
+        "journal_mode": env.get("SQLITE_JOURNAL_MODE", "WAL"),
+        # aman dengan WAL: hanya checkpoint yang di-fsync
+        "synchronous": env.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "busy_timeout": _env_int(env, "SQLITE_BUSY_TIMEOUT", 5000),
+        # nilai negatif = KiB
+        "cache_size": _env_int(env, "SQLITE_CACHE_SIZE", -20000),
+        "mmap_size": _env_int(env, "SQLITE_MMAP_SIZE", 128 * 1024 * 1024),
+    }
+
+
+def engine_options(uri, env):
+    """Opsi untuk SQLALCHEMY_ENGINE_OPTIONS sesuai dialect ``uri``."""
+    if env.get("DB_PROFILE", "tuned") != "tuned":
+        return {}
+    backend = make_url(uri).get_backend_name()
+    if backend == "sqlite":
+        # timeout driver sejalan dengan busy_timeout
+        return {"connect_args": {"timeout": _env_int(env, "SQLITE_BUSY_TIMEOUT", 5000) / 1000}}
+    return {
+        "pool_size": _env_int(env, "DB_POOL_SIZE", 5),
+        "max_overflow": _env_int(env, "DB_MAX_OVERFLOW", 10),
+        "pool_timeout": _env_int(env, "DB_POOL_TIMEOUT", 10),
+        "pool_pre_ping": True,
+        # PythonAnywhere/MySQL memutus koneksi idle setelah ~300 detik
+        "pool_recycle": _env_int(env, "DB_POOL_RECYCLE", 280),
+    }
+
+
+def install_sqlite_pragmas(env):
+    """Pasang pragma ke setiap koneksi SQLite baru (semua engine, termasuk bind replica)."""
+    if env.get("DB_PROFILE", "tuned") != "tuned":
+        return
+    pragmas = sqlite_pragmas(env)
+
+    @event.listens_for(Engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
@@ -0,0 +1,60 @@
+# fragment_cache.py
+# Cache potongan HTML hasil render (form soal kuis). Entri di-key dengan
+# (id soal, urutan opsi) dan dibatasi total ukuran dalam byte; yang paling
+# lama tidak dipakai dibuang lebih dulu.
+import threading
+from collections import OrderedDict
+
+
+class FragmentCache:
+    """LRU dengan anggaran byte.
+
+    Setiap entri menyimpan ``source`` (objek data yang dirender, mis.
+    CachedQuestion dari snapshot bank). ``get`` hanya mengembalikan HTML bila
+    objeknya masih sama persis, jadi setelah bank soal dimuat ulang (soal
+    diedit/dihapus) entri lama otomatis dianggap miss.
+    """
+
+    def __init__(self, max_bytes=4 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, source):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] is not source:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, source, html):
+        size = len(html.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._size -= old[2]
+            self._data[key] = (source, html, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, _, evicted) = self._data.popitem(last=False)
+                self._size -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._size = 0
+
+    @property
+    def size(self):
+        return self._size
+
+    def __len__(self):
+        return len(self._data)
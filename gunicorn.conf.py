@@ -0,0 +1,35 @@
+# gunicorn.conf.py
+# Dibaca otomatis oleh `gunicorn wsqi:application` dari folder ini (atau lewat
+# `python serve.py`). Ukuran worker/thread: lihat serve.server_settings.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from serve import server_settings, worker_env  # noqa: E402
+
+_settings = server_settings()
+
+bind = _settings["bind"]
+workers = _settings["workers"]
+threads = _settings["threads"]
+# gthread: satu thread per request terbuka, termasuk stream SSE /leaderboard/stream.
+# WEB_WORKER_CLASS=gevent (paket gevent) membuat stream murah; app membaca nilai yang sama
+worker_class = os.getenv("WEB_WORKER_CLASS", "gthread")
+# app dimuat di tiap worker, bukan di master: cache, thread latar (bus invalidasi,
+# write-behind) dan koneksi DB dibuat setelah fork. Dengan preload_app, startup()
+# tetap memulai ulang thread latar di tiap worker, tapi koneksi pool ikut ter-fork.
+preload_app = False
+# anggaran upstream cuaca 8 detik; request lebih lama dari ini berarti worker macet
+timeout = int(os.getenv("WEB_TIMEOUT", "30"))
+graceful_timeout = 30
+keepalive = 5
+# daur ulang worker setelah N request (0 = mati), dengan jitter agar tidak serentak
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+accesslog = os.getenv("WEB_ACCESS_LOG") or None
+errorlog = "-"
+
+# diwarisi worker saat fork, sebelum app diimpor
+os.environ.update(worker_env(workers))
+os.environ["WEB_THREADS"] = str(threads)
@@ -0,0 +1,142 @@
+# history.py
+# Riwayat jawaban kuis: cursor keyset untuk paginasi /me/history, statistik
+# per soal (persen benar) yang diperbarui inkremental, dan ekspor streaming
+# CSV/JSON Lines untuk admin.
+import base64
+import csv
+import io
+import json
+from collections import Counter
+from datetime import datetime
+
+import sqlalchemy as sa
+
+EXPORT_COLUMNS = (
+    "id",
+    "user_id",
+    "username",
+    "question_id",
+    "chosen_option_id",
+    "is_correct",
+    "created_at",
+)
+
+
+def encode_cursor(created_at, answer_id):
+    raw = f"{created_at.isoformat()}|{answer_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Kembalikan (created_at, id) atau None bila cursor rusak."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created, _, answer_id = raw.partition("|")
+        return datetime.fromisoformat(created), int(answer_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_before(created_col, id_col, cursor):
+    # baris yang datang setelah cursor pada ORDER BY created_at DESC, id DESC
+    created_at, answer_id = cursor
+    return sa.tuple_(created_col, id_col) < sa.tuple_(created_at, answer_id)
+
+
+class StatDeltas:
+    """Akumulasi (attempts, correct) per soal sebelum ditulis sekaligus."""
+
+    def __init__(self):
+        self.attempts = Counter()
+        self.correct = Counter()
+
+    def add(self, question_id, is_correct):
+        self.attempts[question_id] += 1
+        if is_correct:
+            self.correct[question_id] += 1
+
+    def rows(self):
+        return [
+            {"question_id": qid, "attempts": n, "correct": self.correct[qid]}
+            for qid, n in self.attempts.items()
+        ]
+
+    def __bool__(self):
+        return bool(self.attempts)
+
+
+def upsert_add(conn, table, keys, rows, counters=("attempts", "correct")):
+    """Tambahkan kolom ``counters`` tiap baris ke baris ber-``keys`` sama
+    (atau insert bila belum ada) dengan satu upsert executemany."""
+    if not rows:
+        return
+    dialect = conn.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c[k] for k in keys],
+            set_={c: table.c[c] + stmt.excluded[c] for c in counters},
+        )
+        conn.execute(stmt, rows)
+    elif dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert
+
+        stmt = insert(table)
+        stmt = stmt.on_duplicate_key_update(
+            {c: table.c[c] + stmt.inserted[c] for c in counters}
+        )
+        conn.execute(stmt, rows)
+    else:
+        # dialect lain: update dulu, insert bila barisnya belum ada
+        for row in rows:
+            updated = conn.execute(
+                table.update()
+                .where(*(table.c[k] == row[k] for k in keys))
+                .values({c: table.c[c] + row[c] for c in counters})
+            ).rowcount
+            if not updated:
+                conn.execute(table.insert().values(**row))
+
+
+def upsert_question_stats(conn, table, deltas):
+    upsert_add(conn, table, ("question_id",), deltas.rows())
+
+
+def percent_correct(attempts, correct):
+    return round(100 * correct / attempts) if attempts else None
+
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def stream_csv(rows):
+    """Generator CSV: header lalu baris, di-flush per ~64 KB."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow([_iso(v) for v in row])
+        if buf.tell() >= 65536:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def stream_jsonl(rows):
+    buf = []
+    size = 0
+    for row in rows:
+        line = json.dumps(dict(zip(EXPORT_COLUMNS, map(_iso, row))), separators=(",", ":"))
+        buf.append(line)
+        size += len(line) + 1
+        if size >= 65536:
+            yield "\n".join(buf) + "\n"
+            buf, size = [], 0
+    if buf:
+        yield "\n".join(buf) + "\n"
@@ -0,0 +1,85 @@
+# http_cache.py
+# Cache HTTP untuk halaman yang jarang berubah: ETag/Last-Modified dari versi
+# data (request bersyarat dijawab 304 tanpa render) dan cache HTML hasil render
+# yang berumur pendek.
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+
+def fingerprint_tree(folder):
+    """Hash isi semua file di ``folder`` (mis. templates/) untuk ikut di ETag,
+    agar deploy template baru tidak menghasilkan 304 untuk HTML lama."""
+    h = hashlib.sha1()
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            h.update(os.path.relpath(path, folder).encode())
+            with open(path, "rb") as f:
+                h.update(f.read())
+    return h.hexdigest()[:8]
+
+
+def make_etag(*parts):
+    return hashlib.sha1(":".join(str(p) for p in parts).encode()).hexdigest()[:20]
+
+
+def http_date(timestamp):
+    # Last-Modified hanya berpresisi detik
+    return datetime.fromtimestamp(int(timestamp), timezone.utc)
+
+
+def is_not_modified(request, etag, last_modified):
+    # If-None-Match didahulukan; If-Modified-Since hanya dipakai bila tidak ada
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return since is not None and last_modified is not None and last_modified <= since
+
+
+def set_validators(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # halaman berisi nama user di navbar: hanya cache browser, selalu revalidasi
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add("Cookie")
+    return response
+
+
+class PageCache:
+    """Cache LRU + TTL untuk HTML hasil render; kunci sudah memuat versi datanya."""
+
+    def __init__(self, ttl=5, maxsize=256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            body, stored_at = item
+            if time.monotonic() - stored_at >= self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return body
+
+    def set(self, key, body):
+        with self._lock:
+            self._data[key] = (body, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,92 @@
+# identity.py
+# Cache identitas user yang login. Flask-Login memanggil user_loader di setiap
+# request; di sini hasilnya berupa snapshot ringkas (tanpa password hash) yang
+# disimpan beberapa detik per proses dan diperbarui (atau dibuang) begitu skor
+# user berubah.
+import threading
+import time
+from collections import OrderedDict
+
+from flask_login import UserMixin
+
+
+class UserSnapshot(UserMixin):
+    """Salinan read-only kolom User yang dipakai route dan template."""
+
+    __slots__ = ("id", "username", "total_score", "created_at")
+
+    def __init__(self, id, username, total_score, created_at):
+        self.id = id
+        self.username = username
+        self.total_score = total_score or 0
+        self.created_at = created_at
+
+    def with_score(self, total_score):
+        return UserSnapshot(self.id, self.username, total_score, self.created_at)
+
+    def __repr__(self):
+        return f"<UserSnapshot {self.id} {self.username!r} score={self.total_score}>"
+
+
+class IdentityCache:
+    """Cache LRU + TTL ``user_id -> UserSnapshot``; ``loader(user_id)`` dipanggil saat miss.
+
+    ``ttl`` membatasi seberapa basi skor yang ditulis worker lain; perubahan
+    di proses ini harus memanggil ``invalidate`` setelah commit.
+    """
+
+    def __init__(self, loader, ttl=10, maxsize=4096):
+        self._loader = loader
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # naik setiap invalidate: hasil load yang mulai sebelumnya tidak disimpan
+        self._generation = 0
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(user_id)
+            if item is not None and now - item[1] < self.ttl:
+                self._data.move_to_end(user_id)
+                return item[0]
+            generation = self._generation
+        snapshot = self._loader(user_id)
+        if snapshot is not None:
+            with self._lock:
+                if generation == self._generation:
+                    self._store(snapshot, now)
+        return snapshot
+
+    def put(self, snapshot):
+        with self._lock:
+            self._store(snapshot, time.monotonic())
+
+    def _store(self, snapshot, stored_at):
+        self._data[snapshot.id] = (snapshot, stored_at)
+        self._data.move_to_end(snapshot.id)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def update_score(self, user_id, total_score):
+        """Skor baru yang baru di-commit proses ini: snapshot yang ada diganti, tidak dibuang."""
+        with self._lock:
+            self._generation += 1
+            item = self._data.get(user_id)
+            if item is not None:
+                self._store(item[0].with_score(total_score), time.monotonic())
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            self._generation += 1
+            for uid in user_ids:
+                self._data.pop(uid, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
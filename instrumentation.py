@@ -0,0 +1,319 @@
+# instrumentation.py
+# Instrumentasi opsional per request: jumlah query SQL, total waktu DB dan
+# statement paling lambat, timer bernama (cuaca, render template, hash
+# password), header Server-Timing, profiler sampel 1-dari-N, dan metrik
+# histogram per route dalam format teks Prometheus.
+import cProfile
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=""):
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    """Histogram berlabel gaya Prometheus (bucket kumulatif, _sum, _count)."""
+
+    def __init__(self, name, help, labelnames, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [jumlah per bucket..., +Inf, sum]
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for labels, series in items:
+            for bound, count in zip(self.buckets, series):
+                le = _labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {count}")
+            inf = _labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf} {series[-2]}")
+            plain = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{plain} {series[-1]}")
+            lines.append(f"{self.name}_count{plain} {series[-2]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help, labelnames):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class RequestTimings:
+    __slots__ = ("started", "db_count", "db_time", "slowest", "timers")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_count = 0
+        self.db_time = 0.0
+        # (detik, statement)
+        self.slowest = (0.0, None)
+        self.timers = {}
+
+    def add_timer(self, name, seconds):
+        self.timers[name] = self.timers.get(name, 0.0) + seconds
+
+
+class SamplingProfiler:
+    """Profil 1 dari setiap ``every`` request; hasilnya ditulis ke ``output_dir``.
+
+    ``backend`` "cprofile" (bawaan) menulis file .prof (buka dengan pstats/
+    snakeviz), "pyinstrument" (paket opsional) menulis laporan .html.
+    """
+
+    def __init__(self, every, output_dir, backend="cprofile"):
+        self.every = every
+        self.output_dir = output_dir
+        self.backend = backend
+        if backend == "pyinstrument":
+            import pyinstrument  # noqa: F401  (gagal lebih awal bila belum terpasang)
+        elif backend != "cprofile":
+            raise ValueError(f"unknown profiler backend: {backend!r}")
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def should_sample(self):
+        with self._lock:
+            return next(self._counter) % self.every == 0
+
+    def start(self):
+        try:
+            if self.backend == "pyinstrument":
+                from pyinstrument import Profiler
+
+                profiler = Profiler(async_mode="disabled")
+                profiler.start()
+            else:
+                profiler = cProfile.Profile()
+                profiler.enable()
+        except (RuntimeError, ValueError):
+            # profiler lain sedang aktif di thread lain: lewati sampel ini
+            return None
+        return profiler
+
+    def stop(self, profiler, label):
+        os.makedirs(self.output_dir, exist_ok=True)
+        now = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"{now % 1:.3f}"[1:]
+        name = f"{stamp}-{os.getpid()}-{label}"
+        if self.backend == "pyinstrument":
+            profiler.stop()
+            path = os.path.join(self.output_dir, name + ".html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+        else:
+            profiler.disable()
+            path = os.path.join(self.output_dir, name + ".prof")
+            profiler.dump_stats(path)
+        return path
+
+
+class Instrumentation:
+    """Instrumentasi per request untuk app Flask; tanpa ``init_app`` semua
+    timer menjadi no-op sehingga kode route tidak perlu bercabang."""
+
+    def __init__(self, slow_request_ms=500, profiler=None):
+        self.enabled = False
+        self.slow_request_ms = slow_request_ms
+        self.profiler = profiler
+        self.request_duration = Histogram(
+            "http_request_duration_seconds",
+            "Waktu proses request per route.",
+            ("method", "route"),
+        )
+        self.db_duration = Histogram(
+            "http_request_db_seconds",
+            "Total waktu query SQL per request.",
+            ("method", "route"),
+        )
+        self.requests_total = Counter(
+            "http_requests_total",
+            "Jumlah request per route dan status.",
+            ("method", "route", "status"),
+        )
+        self.db_queries_total = Counter(
+            "db_queries_total", "Jumlah query SQL per route.", ("method", "route")
+        )
+        self.timer_seconds = Counter(
+            "http_request_timer_seconds_total",
+            "Total waktu timer bernama (weather, template, auth) per route.",
+            ("method", "route", "timer"),
+        )
+
+    def init_app(self, app):
+        self.enabled = True
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        # semua engine (termasuk bind replika); query di luar request tidak dihitung
+        event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+
+    @staticmethod
+    def current():
+        if has_request_context():
+            return g.get("_timings")
+        return None
+
+    @contextmanager
+    def timer(self, name):
+        timings = self.current() if self.enabled else None
+        if timings is None:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings.add_timer(name, time.perf_counter() - started)
+
+    # SQL
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_query_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get("_query_started")
+        if not stack:
+            return
+        elapsed = time.perf_counter() - stack.pop()
+        timings = self.current()
+        if timings is None:
+            return
+        timings.db_count += 1
+        timings.db_time += elapsed
+        if elapsed > timings.slowest[0]:
+            timings.slowest = (elapsed, statement)
+
+    # template
+    def _before_render(self, sender, template, context, **extra):
+        timings = self.current()
+        if timings is not None:
+            g._render_started = time.perf_counter()
+
+    def _after_render(self, sender, template, context, **extra):
+        timings = self.current()
+        started = g.pop("_render_started", None)
+        if timings is not None and started is not None:
+            timings.add_timer("template", time.perf_counter() - started)
+
+    # siklus request
+    def _before_request(self):
+        g._timings = RequestTimings()
+        if self.profiler is not None and self.profiler.should_sample():
+            g._profiler = self.profiler.start()
+
+    def _after_request(self, response):
+        timings = g.get("_timings")
+        if timings is None:
+            return response
+        total = time.perf_counter() - timings.started
+        metrics = [f"app;dur={total * 1000:.2f}"]
+        metrics.append(f'db;dur={timings.db_time * 1000:.2f};desc="{timings.db_count} queries"')
+        if timings.slowest[1] is not None:
+            metrics.append(f"db-slowest;dur={timings.slowest[0] * 1000:.2f}")
+        for name, seconds in timings.timers.items():
+            metrics.append(f"{name};dur={seconds * 1000:.2f}")
+        response.headers.add("Server-Timing", ", ".join(metrics))
+        g._status = response.status_code
+        return response
+
+    def _teardown_request(self, exc):
+        timings = g.pop("_timings", None)
+        if timings is None:
+            return
+        total = time.perf_counter() - timings.started
+        # route tak dikenal (404) digabung agar label tidak meledak
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        labels = (request.method, route)
+        self.request_duration.observe(labels, total)
+        self.db_duration.observe(labels, timings.db_time)
+        self.db_queries_total.inc(labels, timings.db_count)
+        status = "500" if exc is not None else str(g.pop("_status", 500))
+        self.requests_total.inc(labels + (status,))
+        for name, seconds in timings.timers.items():
+            self.timer_seconds.inc(labels + (name,), seconds)
+
+        profiler = g.pop("_profiler", None)
+        if profiler is not None:
+            label = f"{request.method}-{(request.endpoint or 'unmatched').replace('.', '_')}"
+            path = self.profiler.stop(profiler, label)
+            logger.info("profile %s %s written to %s", request.method, request.path, path)
+
+        if total * 1000 >= self.slow_request_ms:
+            seconds, statement = timings.slowest
+            logger.warning(
+                "slow request %s %s: %.1fms, %d queries in %.1fms, slowest %.1fms: %s",
+                request.method,
+                request.path,
+                total * 1000,
+                timings.db_count,
+                timings.db_time * 1000,
+                seconds * 1000,
+                " ".join((statement or "-").split())[:300],
+            )
+
+    def render_metrics(self):
+        lines = []
+        for metric in (
+            self.request_duration,
+            self.db_duration,
+            self.requests_total,
+            self.db_queries_total,
+            self.timer_seconds,
+        ):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,290 @@
+# invalidation.py
+# Kanal pub/sub ringan antar worker untuk cache per proses (bank soal,
+# leaderboard memori, snapshot user, forecast cuaca). Setiap worker menerapkan
+# perubahannya sendiri secara lokal lalu mengumumkannya; worker lain menerima
+# event itu dan memperbarui / membuang cache-nya, tanpa query DB per request.
+#
+#   "none"  satu proses, publish tidak melakukan apa-apa
+#   "sql"   tabel invalidation_event di DB aplikasi; di SQLite poller hanya
+#           membaca tabel bila PRAGMA data_version berubah
+#   "redis" PUBLISH/SUBSCRIBE di Redis (atau server yang kompatibel)
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import sqlalchemy as sa
+
+log = logging.getLogger(__name__)
+
+
+class LocalBus:
+    """Dasar semua backend: daftar handler per channel dan identitas proses."""
+
+    def __init__(self):
+        self._handlers = {}
+        self._resync = []
+        self._pid = None
+        self._origin = None
+
+    @property
+    def origin(self):
+        # dibuat ulang setelah fork: worker gunicorn tidak berbagi origin dengan master
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._origin = uuid.uuid4().hex
+        return self._origin
+
+    def subscribe(self, channel, handler):
+        """``handler(payload)`` dipanggil untuk event dari proses lain."""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def on_resync(self, handler):
+        """``handler()`` dipanggil bila event mungkin terlewat (koneksi putus,
+        poller tertinggal); cache yang bergantung pada event harus dimuat ulang."""
+        self._resync.append(handler)
+
+    def publish(self, channel, payload=None):
+        pass
+
+    def start(self):
+        pass
+
+    def close(self):
+        pass
+
+    @property
+    def running(self):
+        return False
+
+    def _dispatch(self, origin, channel, payload):
+        if origin == self.origin:
+            return
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(payload)
+            except Exception:
+                log.exception("invalidation handler for %r failed", channel)
+
+    def _dispatch_resync(self):
+        for handler in self._resync:
+            try:
+                handler()
+            except Exception:
+                log.exception("invalidation resync handler failed")
+
+
+def _encode(payload):
+    return json.dumps(payload, separators=(",", ":"))
+
+
+class _Worker(LocalBus):
+    """Backend dengan thread latar per proses (start idempoten, aman setelah fork)."""
+
+    thread_name = "invalidation"
+
+    def __init__(self):
+        super().__init__()
+        self._thread = None
+        self._thread_pid = None
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+
+    @property
+    def running(self):
+        return (
+            self._thread is not None
+            and self._thread_pid == os.getpid()
+            and self._thread.is_alive()
+        )
+
+    def start(self):
+        with self._start_lock:
+            if self.running:
+                return
+            self._stopping.clear()
+            self._prepare()
+            self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def close(self):
+        self._stopping.set()
+        if self.running:
+            self._thread.join(timeout=5)
+
+    def _prepare(self):
+        pass
+
+    def _run(self):
+        raise NotImplementedError
+
+
+class SqlBus(_Worker):
+    """Event sebagai baris tabel (kolom id, origin, channel, payload, created_at).
+
+    Publish dari request hanya menambah ke antrean; thread latar menulis
+    antrean dalam satu INSERT per ``interval`` lalu membaca event baru dari
+    proses lain. Di SQLite, ``PRAGMA data_version`` pada koneksi milik poller
+    hanya berubah bila proses lain meng-commit sesuatu, jadi worker yang idle
+    tidak membaca tabel sama sekali. Event lebih tua dari ``retain`` detik
+    dihapus; poller yang tertinggal selama itu memicu resync.
+    """
+
+    thread_name = "invalidation-sql"
+
+    def __init__(self, table, engine_fn, interval=0.5, retain=300, lookback=64):
+        super().__init__()
+        self.table = table
+        self._engine_fn = engine_fn
+        self.interval = interval
+        self.retain = retain
+        # MySQL/Postgres: id bisa ter-commit tidak berurutan; baca ulang sebagian id terakhir
+        self.lookback = lookback
+        self._engine = None
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._seen = OrderedDict()
+        self._last_id = 0
+        self._pruned_at = 0.0
+
+    def publish(self, channel, payload=None):
+        row = {
+            "origin": self.origin,
+            "channel": channel,
+            "payload": _encode(payload),
+            "created_at": time.time(),
+        }
+        if not self.running:
+            # proses tanpa thread latar (CLI, skrip): tulis langsung
+            try:
+                with self._engine_fn().begin() as conn:
+                    conn.execute(self.table.insert(), [row])
+            except Exception:
+                log.exception("invalidation publish failed")
+            return
+        with self._pending_lock:
+            self._pending.append(row)
+
+    def _prepare(self):
+        # start() dipanggil dalam app context; thread latar memakai engine yang sama
+        self._engine = self._engine_fn()
+        with self._engine.connect() as conn:
+            self._last_id = conn.execute(sa.select(sa.func.max(self.table.c.id))).scalar() or 0
+
+    def _run(self):
+        engine = self._engine
+        sqlite = engine.dialect.name == "sqlite"
+        watch = engine.connect() if sqlite else None
+        data_version = None
+        polled_at = time.monotonic()
+        try:
+            while not self._stopping.wait(self.interval):
+                try:
+                    self._flush(engine)
+                    if watch is not None:
+                        current = watch.exec_driver_sql("PRAGMA data_version").scalar()
+                        watch.rollback()
+                        if current == data_version:
+                            polled_at = time.monotonic()
+                            continue
+                        data_version = current
+                    if time.monotonic() - polled_at > self.retain:
+                        self._dispatch_resync()
+                    self._poll(engine, lookback=0 if sqlite else self.lookback)
+                    polled_at = time.monotonic()
+                    self._prune(engine)
+                except Exception:
+                    log.exception("invalidation poll failed")
+            self._flush(engine)
+        finally:
+            if watch is not None:
+                watch.close()
+
+    def _flush(self, engine):
+        with self._pending_lock:
+            rows, self._pending = self._pending, []
+        if rows:
+            with engine.begin() as conn:
+                conn.execute(self.table.insert(), rows)
+
+    def _poll(self, engine, lookback):
+        t = self.table
+        with engine.connect() as conn:
+            rows = conn.execute(
+                sa.select(t.c.id, t.c.origin, t.c.channel, t.c.payload)
+                .where(t.c.id > self._last_id - lookback)
+                .order_by(t.c.id)
+            ).all()
+        for row in rows:
+            if row.id in self._seen:
+                continue
+            self._seen[row.id] = None
+            if len(self._seen) > 4 * max(self.lookback, 64):
+                self._seen.popitem(last=False)
+            self._last_id = max(self._last_id, row.id)
+            self._dispatch(row.origin, row.channel, json.loads(row.payload))
+
+    def _prune(self, engine):
+        now = time.time()
+        if now - self._pruned_at < self.retain / 4:
+            return
+        self._pruned_at = now
+        with engine.begin() as conn:
+            conn.execute(self.table.delete().where(self.table.c.created_at < now - self.retain))
+
+
+class RedisBus(_Worker):
+    """PUBLISH langsung dari request; satu thread per proses membaca SUBSCRIBE.
+    Pub/sub Redis tidak menyimpan pesan: setelah koneksi pulih, resync."""
+
+    thread_name = "invalidation-redis"
+
+    def __init__(self, url, prefix="quiz:inval:", retry_delay=1.0):
+        super().__init__()
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.retry_delay = retry_delay
+
+    def publish(self, channel, payload=None):
+        # cache lain tetap punya batas TTL / cek versi: gagal publish tidak menggagalkan request
+        message = _encode({"o": self.origin, "p": payload})
+        try:
+            self._redis.publish(self.prefix + channel, message)
+        except Exception:
+            log.exception("invalidation publish failed")
+
+    def _run(self):
+        connected_before = False
+        while not self._stopping.is_set():
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.psubscribe(self.prefix + "*")
+                if connected_before:
+                    self._dispatch_resync()
+                connected_before = True
+                while not self._stopping.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    channel = message["channel"].decode()[len(self.prefix):]
+                    data = json.loads(message["data"])
+                    self._dispatch(data["o"], channel, data["p"])
+            except Exception:
+                log.exception("invalidation subscriber disconnected")
+                self._stopping.wait(self.retry_delay)
+            finally:
+                pubsub.close()
+
+
+def make_bus(name, table=None, engine_fn=None, redis_url=None, interval=0.5):
+    if name == "sql":
+        return SqlBus(table, engine_fn, interval=interval)
+    if name == "redis":
+        return RedisBus(redis_url or "redis://localhost:6379/0")
+    return LocalBus()
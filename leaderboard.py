@@ -0,0 +1,345 @@
+# leaderboard.py
+# Leaderboard yang dipelihara secara inkremental: urutan (skor desc, created_at asc)
+# disimpan di memori (atau di Redis untuk deployment multi-worker), sehingga
+# /leaderboard dan cek "masuk top 20" tidak perlu mengurutkan tabel user.
+import hashlib
+import json
+import threading
+import time
+import uuid
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+LeaderboardEntry = namedtuple("LeaderboardEntry", "user_id username total_score created_ts")
+# version berubah di setiap perubahan isi; modified_at = epoch detik perubahan terakhir
+LeaderboardState = namedtuple("LeaderboardState", "version modified_at")
+
+
+def _sort_key(entry):
+    return (-(entry.total_score or 0), entry.created_ts, entry.user_id)
+
+
+class MemoryLeaderboardBackend:
+    """Daftar terurut semua user di proses ini; rank dicari dengan bisect (O(log n))."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = []
+        self._entries = {}
+        self.loaded = False
+        # id instance: versi dari proses lain tidak pernah dianggap sama
+        self._instance = uuid.uuid4().hex[:8]
+        self._version = 0
+        self._modified_at = time.time()
+
+    def _touch(self):
+        self._version += 1
+        self._modified_at = time.time()
+
+    def state(self):
+        with self._lock:
+            return LeaderboardState(f"{self._instance}.{self._version}", self._modified_at)
+
+    def load(self, entries):
+        with self._lock:
+            self._entries = {e.user_id: e for e in entries}
+            self._keys = sorted(_sort_key(e) for e in self._entries.values())
+            self.loaded = True
+            self._touch()
+
+    def clear(self):
+        with self._lock:
+            self._keys = []
+            self._entries = {}
+            self.loaded = False
+            self._touch()
+
+    def upsert(self, entry):
+        with self._lock:
+            old = self._entries.get(entry.user_id)
+            if old is not None:
+                i = bisect_left(self._keys, _sort_key(old))
+                if i < len(self._keys) and self._keys[i] == _sort_key(old):
+                    del self._keys[i]
+            self._entries[entry.user_id] = entry
+            insort(self._keys, _sort_key(entry))
+            self._touch()
+
+    def increment(self, user_id, delta):
+        with self._lock:
+            old = self._entries.get(user_id)
+            if old is None:
+                return
+            i = bisect_left(self._keys, _sort_key(old))
+            if i < len(self._keys) and self._keys[i] == _sort_key(old):
+                del self._keys[i]
+            entry = old._replace(total_score=(old.total_score or 0) + delta)
+            self._entries[user_id] = entry
+            insort(self._keys, _sort_key(entry))
+            self._touch()
+
+    def remove(self, user_id):
+        with self._lock:
+            old = self._entries.pop(user_id, None)
+            if old is not None:
+                i = bisect_left(self._keys, _sort_key(old))
+                if i < len(self._keys) and self._keys[i] == _sort_key(old):
+                    del self._keys[i]
+                self._touch()
+
+    def get(self, user_id):
+        return self._entries.get(user_id)
+
+    def rank(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        return bisect_left(self._keys, _sort_key(entry)) + 1
+
+    def top(self, n):
+        with self._lock:
+            keys = self._keys[:n]
+            return [self._entries[k[2]] for k in keys]
+
+
+class RedisLeaderboardBackend:
+    """Backend bersama berbasis sorted set Redis (atau server yang kompatibel).
+
+    Skor disimpan negatif dan member diawali created_ts berlebar tetap, jadi
+    ZRANK menghasilkan urutan yang sama dengan query aslinya. Hash hanya
+    menyimpan data yang tidak berubah (username, created_ts).
+    """
+
+    def __init__(self, url, prefix="leaderboard"):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self._zkey = f"{prefix}:rank"
+        self._hkey = f"{prefix}:users"
+        self._loaded_key = f"{prefix}:loaded"
+        self._version_key = f"{prefix}:version"
+
+    def _touch(self, pipe):
+        # dalam pipeline yang sama dengan perubahannya
+        pipe.hincrby(self._version_key, "v", 1)
+        pipe.hset(self._version_key, "t", time.time())
+
+    def state(self):
+        version, modified_at = self._redis.hmget(self._version_key, "v", "t")
+        return LeaderboardState(
+            f"r.{int(version or 0)}", float(modified_at) if modified_at else 0.0
+        )
+
+    @property
+    def loaded(self):
+        return bool(self._redis.exists(self._loaded_key))
+
+    @staticmethod
+    def _member(user_id, created_ts):
+        return f"{created_ts:020.6f}:{user_id}"
+
+    def load(self, entries):
+        pipe = self._redis.pipeline()
+        pipe.delete(self._zkey, self._hkey)
+        for e in entries:
+            pipe.zadd(self._zkey, {self._member(e.user_id, e.created_ts): -(e.total_score or 0)})
+            pipe.hset(self._hkey, e.user_id, json.dumps([e.username, e.created_ts]))
+        pipe.set(self._loaded_key, 1)
+        self._touch(pipe)
+        pipe.execute()
+
+    def clear(self):
+        pipe = self._redis.pipeline()
+        pipe.delete(self._zkey, self._hkey, self._loaded_key)
+        self._touch(pipe)
+        pipe.execute()
+
+    def upsert(self, entry):
+        pipe = self._redis.pipeline()
+        pipe.zadd(self._zkey, {self._member(entry.user_id, entry.created_ts): -(entry.total_score or 0)})
+        pipe.hset(self._hkey, entry.user_id, json.dumps([entry.username, entry.created_ts]))
+        self._touch(pipe)
+        pipe.execute()
+
+    def increment(self, user_id, delta):
+        info = self._info(user_id)
+        if info is not None:
+            pipe = self._redis.pipeline()
+            pipe.zincrby(self._zkey, -delta, self._member(user_id, info[1]))
+            self._touch(pipe)
+            pipe.execute()
+
+    def remove(self, user_id):
+        info = self._info(user_id)
+        if info is not None:
+            pipe = self._redis.pipeline()
+            pipe.zrem(self._zkey, self._member(user_id, info[1]))
+            pipe.hdel(self._hkey, user_id)
+            self._touch(pipe)
+            pipe.execute()
+
+    def _info(self, user_id):
+        raw = self._redis.hget(self._hkey, user_id)
+        return json.loads(raw) if raw else None
+
+    def get(self, user_id):
+        info = self._info(user_id)
+        if info is None:
+            return None
+        score = self._redis.zscore(self._zkey, self._member(user_id, info[1]))
+        return LeaderboardEntry(user_id, info[0], int(-(score or 0)), info[1])
+
+    def rank(self, user_id):
+        info = self._info(user_id)
+        if info is None:
+            return None
+        r = self._redis.zrank(self._zkey, self._member(user_id, info[1]))
+        return None if r is None else r + 1
+
+    def top(self, n):
+        members = self._redis.zrange(self._zkey, 0, n - 1, withscores=True)
+        if not members:
+            return []
+        ids = [int(m.decode().rsplit(":", 1)[1]) for m, _ in members]
+        infos = self._redis.hmget(self._hkey, ids)
+        entries = []
+        for uid, (_, score), raw in zip(ids, members, infos):
+            if raw:
+                username, created_ts = json.loads(raw)
+                entries.append(LeaderboardEntry(uid, username, int(-score), created_ts))
+        return entries
+
+
+class Leaderboard:
+    """Fasad di atas backend; ``loader`` mengembalikan semua LeaderboardEntry dari DB.
+
+    ``entries_fn(user_ids)`` membaca entri user tertentu dari DB untuk
+    ``refresh``. Semua perubahan memegang ``_load_lock`` yang sama dengan load
+    dan refresh, jadi nilai yang dibaca dari DB tidak bisa menimpa perubahan
+    yang terjadi sesudahnya.
+    """
+
+    def __init__(self, backend, loader, size=20, entries_fn=None):
+        self.backend = backend
+        self._loader = loader
+        self._entries_fn = entries_fn
+        self.size = size
+        self._load_lock = threading.Lock()
+        # (state.version, digest) terakhir: hash isi top N dihitung sekali per versi
+        self._digest = None
+        # fn() dipanggil setelah setiap perubahan lewat fasad ini (mis. stream SSE)
+        self.listeners = []
+
+    def _changed(self):
+        for listener in self.listeners:
+            listener()
+
+    def ensure_loaded(self):
+        if self.backend.loaded:
+            return
+        with self._load_lock:
+            if not self.backend.loaded:
+                self.backend.load(self._loader())
+
+    def reload(self, loader=None):
+        with self._load_lock:
+            self.backend.load((loader or self._loader)())
+        self._changed()
+
+    def top(self, n=None):
+        self.ensure_loaded()
+        return self.backend.top(n or self.size)
+
+    def rank(self, user_id):
+        self.ensure_loaded()
+        return self.backend.rank(user_id)
+
+    def state(self):
+        # validator HTTP untuk /leaderboard (ETag / Last-Modified)
+        self.ensure_loaded()
+        return self.backend.state()
+
+    def digest(self):
+        """Hash isi top N (user, nama, skor) untuk ETag /leaderboard.
+
+        ``state().version`` hanya berlaku di satu proses (backend memori); hash ini
+        sama di semua worker yang isinya sama, jadi request bersyarat dapat 304
+        di worker mana pun.
+        """
+        version = self.state().version
+        cached = self._digest
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        rows = [[e.user_id, e.username, e.total_score] for e in self.top()]
+        value = hashlib.sha1(json.dumps(rows, separators=(",", ":")).encode()).hexdigest()[:16]
+        self._digest = (version, value)
+        return value
+
+    def in_top(self, user_id):
+        rank = self.rank(user_id)
+        return rank is not None and rank <= self.size
+
+    def update(self, user_id, username, total_score, created_ts):
+        # backend belum dimuat: biarkan load berikutnya membaca nilai terbaru dari DB
+        with self._load_lock:
+            if not self.backend.loaded:
+                return
+            self.backend.upsert(LeaderboardEntry(user_id, username, total_score or 0, created_ts))
+        self._changed()
+
+    def increment(self, user_id, delta):
+        with self._load_lock:
+            if not self.backend.loaded:
+                return
+            self.backend.increment(user_id, delta)
+        self._changed()
+
+    def set_total(self, user_id, total_score):
+        """Set skor yang sudah di-commit untuk user yang sudah ada di leaderboard."""
+        with self._load_lock:
+            old = self.backend.get(user_id) if self.backend.loaded else None
+            if old is None or old.total_score == total_score:
+                return
+            self.backend.upsert(old._replace(total_score=total_score))
+        self._changed()
+
+    def refresh(self, user_ids):
+        """Salin entri ``user_ids`` dari DB (user yang sudah tidak ada dihapus).
+
+        Idempoten dan tidak bergantung urutan: dipanggil dua kali, atau untuk
+        perubahan yang sudah termasuk di snapshot, hasilnya tetap nilai DB.
+        """
+        changed = False
+        with self._load_lock:
+            if not self.backend.loaded or not user_ids:
+                return
+            entries = {e.user_id: e for e in self._entries_fn(sorted(user_ids))}
+            for user_id in user_ids:
+                entry = entries.get(user_id)
+                old = self.backend.get(user_id)
+                if entry is None:
+                    if old is not None:
+                        self.backend.remove(user_id)
+                        changed = True
+                elif old != entry:
+                    self.backend.upsert(entry)
+                    changed = True
+        if changed:
+            self._changed()
+
+    def get(self, user_id):
+        self.ensure_loaded()
+        return self.backend.get(user_id)
+
+    def remove(self, user_id):
+        with self._load_lock:
+            if not self.backend.loaded:
+                return
+            self.backend.remove(user_id)
+        self._changed()
+
+
+def make_backend(name, redis_url=None):
+    if name == "redis":
+        return RedisLeaderboardBackend(redis_url or "redis://localhost:6379/0")
+    return MemoryLeaderboardBackend()
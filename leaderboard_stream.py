@@ -0,0 +1,182 @@
+# leaderboard_stream.py
+# Push leaderboard lewat Server-Sent Events. Satu thread produsen per proses
+# membaca top N hanya saat leaderboard berubah, menghitung diff peringkat
+# terhadap pembacaan sebelumnya, lalu menaruh event yang sudah di-encode ke
+# antrean setiap subscriber. Biaya per perubahan tetap satu pembacaan, berapa
+# pun jumlah penontonnya.
+import json
+import queue
+import threading
+import time
+
+
+class StreamFull(Exception):
+    """Jumlah subscriber sudah mencapai ``max_subscribers``."""
+
+
+def sse(event, data, event_id=None):
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, separators=(",", ":")))
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+HEARTBEAT = b": ping\n\n"
+
+
+def entry_rows(entries):
+    """LeaderboardEntry terurut -> [rank, user_id, username, score]."""
+    return [
+        [rank, e.user_id, e.username, e.total_score or 0] for rank, e in enumerate(entries, 1)
+    ]
+
+
+def diff_rows(old, new):
+    """Baris ``new`` yang baru atau berubah (rank/skor/nama) dan user_id yang keluar."""
+    before = {row[1]: row for row in old}
+    changed = [row for row in new if before.get(row[1]) != row]
+    current = {row[1] for row in new}
+    removed = [uid for uid in before if uid not in current]
+    return changed, removed
+
+
+class Subscriber:
+    __slots__ = ("queue",)
+
+    def __init__(self, size):
+        self.queue = queue.Queue(maxsize=size)
+
+
+class LeaderboardStream:
+    """Fan-out snapshot + diff leaderboard ke subscriber SSE.
+
+    ``top_fn()`` mengembalikan LeaderboardEntry terurut, ``state_fn()`` versi
+    leaderboard saat ini. ``notify()`` membangunkan produsen; tanpa notifikasi
+    versi tetap dicek tiap ``poll_interval`` detik (perubahan dari worker lain
+    di backend Redis). Perubahan dalam ``min_interval`` detik digabung menjadi
+    satu diff. Subscriber yang antreannya penuh (klien lambat) kehilangan diff
+    yang antre dan menerima snapshot penuh sebagai gantinya.
+    """
+
+    def __init__(
+        self,
+        top_fn,
+        state_fn,
+        max_subscribers=100,
+        queue_size=8,
+        heartbeat=15,
+        min_interval=0.25,
+        poll_interval=5,
+        max_age=300,
+    ):
+        self._top_fn = top_fn
+        self._state_fn = state_fn
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self.min_interval = min_interval
+        self.poll_interval = poll_interval
+        # koneksi ditutup setelah ini (detik); EventSource menyambung ulang sendiri
+        self.max_age = max_age
+        self._subs = set()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._changed = threading.Event()
+        self._thread = None
+        self._rows = None
+        self._snapshot = None
+        self._version = None
+        self._seq = 0
+        self.refreshes = 0
+        self.resets = 0
+
+    def __len__(self):
+        return len(self._subs)
+
+    def notify(self):
+        self._changed.set()
+
+    def subscribe(self):
+        with self._refresh_lock:
+            with self._lock:
+                if len(self._subs) >= self.max_subscribers:
+                    raise StreamFull()
+            if self._snapshot is None:
+                self._refresh(self._state_fn())
+            sub = Subscriber(self.queue_size)
+            # snapshot dan pendaftaran di bawah refresh_lock: tidak ada diff yang
+            # terlewat atau terkirim dua kali di antaranya
+            sub.queue.put_nowait(self._snapshot)
+            with self._lock:
+                self._subs.add(sub)
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="leaderboard-stream", daemon=True
+                    )
+                    self._thread.start()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subs.discard(sub)
+
+    def events(self, sub):
+        """Generator body response: event dari antrean, heartbeat saat idle."""
+        deadline = time.monotonic() + self.max_age
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    yield sub.queue.get(timeout=min(self.heartbeat, remaining))
+                except queue.Empty:
+                    yield HEARTBEAT
+        finally:
+            self.unsubscribe(sub)
+
+    def _refresh(self, state):
+        # dipanggil dengan _refresh_lock dipegang
+        rows = entry_rows(self._top_fn())
+        self.refreshes += 1
+        self._version = state.version
+        old, self._rows = self._rows, rows
+        self._seq += 1
+        self._snapshot = sse("snapshot", {"rows": rows}, self._seq)
+        if old is None:
+            return
+        changed, removed = diff_rows(old, rows)
+        if changed or removed:
+            self._broadcast(sse("diff", {"rows": changed, "removed": removed}, self._seq))
+
+    def _broadcast(self, data):
+        with self._lock:
+            subs = list(self._subs)
+        for sub in subs:
+            try:
+                sub.queue.put_nowait(data)
+            except queue.Full:
+                # klien lambat: diff yang antre sudah tidak berguna, ganti dengan snapshot
+                with sub.queue.mutex:
+                    sub.queue.queue.clear()
+                sub.queue.put_nowait(self._snapshot)
+                self.resets += 1
+
+    def _run(self):
+        while True:
+            triggered = self._changed.wait(self.poll_interval)
+            with self._refresh_lock:
+                with self._lock:
+                    if not self._subs:
+                        # tanpa penonton: berhenti, snapshot dibaca ulang saat subscriber berikutnya
+                        self._thread = None
+                        self._rows = self._snapshot = self._version = None
+                        return
+                if triggered:
+                    self._changed.clear()
+                state = self._state_fn()
+                if state.version != self._version:
+                    self._refresh(state)
+            # perubahan yang datang selama jeda ini digabung ke diff berikutnya
+            time.sleep(self.min_interval)
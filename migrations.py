@@ -0,0 +1,189 @@
+# migrations.py
+# Migrasi skema ringan untuk database yang sudah ada. db.create_all() hanya
+# membuat tabel baru, tidak menambah kolom/index ke tabel lama; langkah di sini
+# dijalankan berurutan dan versinya dicatat di app_meta (key "schema").
+import sqlalchemy as sa
+
+from question_import import question_hash
+
+SCHEMA_VERSION_KEY = "schema"
+
+MIGRATIONS = []
+
+
+def migration(version):
+    def decorator(fn):
+        MIGRATIONS.append((version, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+
+    return decorator
+
+
+def _columns(conn, table):
+    return {c["name"] for c in sa.inspect(conn).get_columns(table)}
+
+
+def _indexes(conn, table):
+    return {i["name"] for i in sa.inspect(conn).get_indexes(table)}
+
+
+@migration(1)
+def add_question_content_hash(conn):
+    if "content_hash" not in _columns(conn, "question"):
+        conn.execute(sa.text("ALTER TABLE question ADD COLUMN content_hash VARCHAR(40)"))
+
+    # isi hash untuk soal lama; duplikat (hash sama) dibiarkan NULL agar unique index bisa dibuat
+    rows = conn.execute(
+        sa.text(
+            "SELECT q.id, q.text, o.text, o.is_correct FROM question q "
+            "JOIN answer_option o ON o.question_id = q.id "
+            "WHERE q.content_hash IS NULL ORDER BY q.id, o.id"
+        )
+    ).all()
+    grouped = {}
+    for qid, qtext, otext, is_correct in rows:
+        text, options, correct = grouped.setdefault(qid, [qtext, [], -1])
+        if is_correct and correct < 0:
+            grouped[qid][2] = len(options)
+        options.append(otext)
+    seen = set(
+        conn.execute(
+            sa.text("SELECT content_hash FROM question WHERE content_hash IS NOT NULL")
+        ).scalars()
+    )
+    updates = []
+    for qid, (text, options, correct) in grouped.items():
+        h = question_hash(text, options, correct)
+        if h not in seen:
+            seen.add(h)
+            updates.append({"b_id": qid, "b_hash": h})
+    if updates:
+        conn.execute(
+            sa.text("UPDATE question SET content_hash = :b_hash WHERE id = :b_id"), updates
+        )
+
+    if "ix_question_content_hash" not in _indexes(conn, "question"):
+        conn.execute(
+            sa.text("CREATE UNIQUE INDEX ix_question_content_hash ON question (content_hash)")
+        )
+
+
+@migration(2)
+def add_user_score_rank_index(conn):
+    # leaderboard: ORDER BY total_score DESC, created_at
+    if "ix_user_score_rank" not in _indexes(conn, "user"):
+        user = conn.dialect.identifier_preparer.quote("user")
+        conn.execute(
+            sa.text(f"CREATE INDEX ix_user_score_rank ON {user} (total_score DESC, created_at)")
+        )
+
+
+@migration(3)
+def add_answer_history_indexes(conn):
+    # /me/history: WHERE user_id ORDER BY created_at DESC, id DESC
+    indexes = _indexes(conn, "user_answer")
+    if "ix_user_answer_user_created" not in indexes:
+        conn.execute(
+            sa.text(
+                "CREATE INDEX ix_user_answer_user_created "
+                "ON user_answer (user_id, created_at, id)"
+            )
+        )
+    if "ix_user_answer_question" not in indexes:
+        conn.execute(
+            sa.text("CREATE INDEX ix_user_answer_question ON user_answer (question_id, is_correct)")
+        )
+
+    # question_stat dibuat db.create_all(); isi dari jawaban yang sudah ada
+    conn.execute(sa.text("DELETE FROM question_stat"))
+    conn.execute(
+        sa.text(
+            "INSERT INTO question_stat (question_id, attempts, correct) "
+            "SELECT question_id, COUNT(*), SUM(CASE WHEN is_correct THEN 1 ELSE 0 END) "
+            "FROM user_answer GROUP BY question_id"
+        )
+    )
+
+
+@migration(4)
+def add_answer_created_index(conn):
+    # retensi: SELECT/DELETE jawaban per rentang created_at
+    if "ix_user_answer_created" not in _indexes(conn, "user_answer"):
+        conn.execute(sa.text("CREATE INDEX ix_user_answer_created ON user_answer (created_at)"))
+
+
+@migration(5)
+def add_question_topic_difficulty(conn):
+    columns = _columns(conn, "question")
+    if "topic" not in columns:
+        conn.execute(sa.text("ALTER TABLE question ADD COLUMN topic VARCHAR(64)"))
+    if "difficulty" not in columns:
+        conn.execute(sa.text("ALTER TABLE question ADD COLUMN difficulty SMALLINT"))
+    if "ix_question_topic" not in _indexes(conn, "question"):
+        conn.execute(sa.text("CREATE INDEX ix_question_topic ON question (topic)"))
+
+
+@migration(6)
+def add_invalidation_event_table(conn):
+    # antrean event antar worker (INVALIDATION_BACKEND=sql); sama dengan model InvalidationEvent
+    table = sa.Table(
+        "invalidation_event",
+        sa.MetaData(),
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("origin", sa.String(32), nullable=False),
+        sa.Column("channel", sa.String(32), nullable=False),
+        sa.Column("payload", sa.Text, nullable=False),
+        sa.Column("created_at", sa.Float, nullable=False, index=True),
+    )
+    table.create(conn, checkfirst=True)
+
+
+@migration(7)
+def add_question_retired_version(conn):
+    # editor admin: soft delete dan versi bank per soal
+    columns = _columns(conn, "question")
+    if "retired_at" not in columns:
+        # DATETIME di SQLite/MySQL, TIMESTAMP di PostgreSQL
+        datetime_type = sa.DateTime().compile(dialect=conn.dialect)
+        conn.execute(sa.text(f"ALTER TABLE question ADD COLUMN retired_at {datetime_type}"))
+    if "version" not in columns:
+        conn.execute(
+            sa.text("ALTER TABLE question ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        )
+
+
+def latest_version():
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def current_version(conn, meta_table):
+    row = conn.execute(
+        meta_table.select().where(meta_table.c.key == SCHEMA_VERSION_KEY)
+    ).first()
+    return row.version if row else 0
+
+
+def upgrade(engine, meta_table):
+    """Jalankan migrasi yang belum tercatat; kembalikan daftar versi yang diterapkan."""
+    applied = []
+    with engine.begin() as conn:
+        version = current_version(conn, meta_table)
+    for target, fn in MIGRATIONS:
+        if target <= version:
+            continue
+        with engine.begin() as conn:
+            fn(conn)
+            _stamp(conn, meta_table, target)
+        applied.append(target)
+    return applied
+
+
+def _stamp(conn, meta_table, version):
+    updated = conn.execute(
+        meta_table.update()
+        .where(meta_table.c.key == SCHEMA_VERSION_KEY)
+        .values(version=version)
+    ).rowcount
+    if not updated:
+        conn.execute(meta_table.insert().values(key=SCHEMA_VERSION_KEY, version=version))
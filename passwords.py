@@ -0,0 +1,108 @@
+# passwords.py
+# Kebijakan hash password yang bisa dikonfigurasi (metode + parameter Werkzeug),
+# rehash otomatis saat login bila parameternya berubah, dan eksekusi hash di
+# process pool terbatas agar lonjakan login tidak menghabiskan thread request.
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherBusy(Exception):
+    """Antrean hashing penuh atau hash tidak selesai dalam batas waktu."""
+
+
+class HashPolicy:
+    """``method`` dalam format Werkzeug, mis. "scrypt:32768:8:1" atau
+    "pbkdf2:sha256:600000"; parameter yang dihilangkan memakai default Werkzeug."""
+
+    def __init__(self, method="scrypt:32768:8:1", salt_length=16):
+        self.salt_length = salt_length
+        self._requested = method
+        self._method = None
+
+    @property
+    def method(self):
+        # bentuk kanonik (parameter lengkap) seperti yang tertulis di hash tersimpan;
+        # dihitung dari satu hash contoh saat pertama dipakai, bukan saat import
+        if self._method is None:
+            sample = generate_password_hash(
+                "", method=self._requested, salt_length=self.salt_length
+            )
+            self._method = sample.split("$", 1)[0]
+        return self._method
+
+    def needs_rehash(self, pwhash):
+        return pwhash.split("$", 1)[0] != self.method
+
+    def __repr__(self):
+        return f"<HashPolicy {self.method}>"
+
+
+def _hash(password, method, salt_length):
+    return generate_password_hash(password, method=method, salt_length=salt_length)
+
+
+class PasswordHasher:
+    """Hash/verifikasi password di process pool berisi ``workers`` proses.
+
+    ``workers=0`` menjalankan hash langsung di thread pemanggil. Pool dibuat
+    saat pertama dipakai; paling banyak ``workers + max_pending`` operasi
+    berjalan atau antre, selebihnya langsung ditolak dengan HasherBusy.
+    """
+
+    def __init__(self, policy, workers=2, max_pending=8, timeout=10):
+        self.policy = policy
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + max_pending) if workers else None
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _executor(self):
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: aman dipakai dari server multi-thread (fork dengan thread berjalan tidak)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy("too many pending password hashes")
+        try:
+            future = self._executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout as e:
+            raise HasherBusy("password hash timed out") from e
+
+    def hash(self, password):
+        return self._run(_hash, password, self.policy.method, self.policy.salt_length)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        return self.policy.needs_rehash(pwhash)
+
+    def warm_up(self):
+        # hitung bentuk kanonik policy dan jalankan proses pool sebelum login pertama
+        self.policy.method
+        if self.workers:
+            self._executor().submit(int).result(timeout=self.timeout)
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
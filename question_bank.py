@@ -0,0 +1,230 @@
+# question_bank.py
+# Cache bank soal per-proses: semua soal + opsi dimuat sekali dalam satu query,
+# lalu disimpan ringkas (namedtuple) dan di-invalidate lewat nomor versi bank.
+import random
+import threading
+import time
+from collections import namedtuple
+
+from sampler import FenwickTree, WeightedSampler
+
+# version: versi bank saat soal terakhir diubah lewat editor admin (0 = belum pernah)
+CachedQuestion = namedtuple(
+    "CachedQuestion", "id text options topic difficulty version", defaults=(0,)
+)
+CachedOption = namedtuple("CachedOption", "id question_id text is_correct")
+
+# rejection sampling hanya dipakai selama porsi soal yang dikecualikan kecil
+_MAX_REJECTION_TRIES = 8
+
+
+class BankSnapshot:
+    __slots__ = ("version", "ids", "questions", "options", "topics", "_positions", "_trees")
+
+    def __init__(self, version, questions):
+        self.version = version
+        self.questions = {q.id: q for q in questions}
+        self.ids = tuple(sorted(self.questions))
+        self.options = {o.id: o for q in questions for o in q.options}
+        by_topic = {}
+        for qid in self.ids:
+            by_topic.setdefault(self.questions[qid].topic, []).append(qid)
+        self.topics = {topic: tuple(ids) for topic, ids in by_topic.items()}
+        self._positions = {}
+        self._trees = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def topic_ids(self, topic=None):
+        # None = semua topik
+        if topic is None:
+            return self.ids
+        return self.topics.get(topic, ())
+
+    def positions(self, topic=None):
+        # qid -> indeks di topic_ids(topic), untuk memetakan soal ke node sampler
+        pos = self._positions.get(topic)
+        if pos is None:
+            pos = {qid: i for i, qid in enumerate(self.topic_ids(topic))}
+            self._positions[topic] = pos
+        return pos
+
+    def tree(self, topic, level, policy):
+        """Fenwick tree bobot dasar per (topik, level); dibangun sekali per snapshot.
+        Pembuatan ganda dari dua thread tidak masalah: hasilnya sama."""
+        key = (topic, level)
+        tree = self._trees.get(key)
+        if tree is None:
+            tree = FenwickTree(
+                policy.base_weight(self.questions[qid].difficulty, level)
+                for qid in self.topic_ids(topic)
+            )
+            self._trees[key] = tree
+        return tree
+
+
+class QuestionBank:
+    """Snapshot bank soal yang dibagi semua request di proses ini.
+
+    ``loader`` mengembalikan ``(versi, baris)``: baris (qid, qtext, topic,
+    difficulty, version, oid, otext, is_correct) terurut per soal, dan versi
+    bank yang dibaca di koneksi yang sama *sebelum* barisnya, jadi barisnya
+    tidak pernah lebih tua dari versi snapshot (mis. replika yang tertinggal).
+    ``version_fn`` membaca versi bank terbaru dari DB utama; bila lebih baru
+    dari snapshot, bank dimuat ulang. Versi hanya dicek paling sering sekali per
+    ``check_interval`` detik, jadi melayani soal tidak butuh round trip ke
+    database. Saat dimuat ulang, soal yang isinya tidak berubah memakai objek
+    lama, sehingga cache yang di-key dengan objek soal (FragmentCache) hanya
+    miss untuk soal yang benar-benar berubah.
+    """
+
+    def __init__(self, loader, version_fn, check_interval=5.0):
+        self._loader = loader
+        self._version_fn = version_fn
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked_at = 0.0
+
+    def snapshot(self):
+        snap = self._snapshot
+        now = time.monotonic()
+        if snap is not None and now - self._checked_at < self.check_interval:
+            return snap
+        with self._lock:
+            snap = self._snapshot
+            if snap is not None and now - self._checked_at < self.check_interval:
+                return snap
+            version = self._version_fn()
+            if snap is None or snap.version != version:
+                # versi dari loader, bukan dari version_fn: replika bisa masih di versi lama;
+                # snapshot itu lalu dimuat ulang lagi pada cek berikutnya
+                loaded_version, rows = self._loader()
+                snap = BankSnapshot(loaded_version, self._build(rows, snap))
+                self._snapshot = snap
+            self._checked_at = now
+        return snap
+
+    def invalidate(self):
+        # paksa cek versi (dan muat ulang bila berubah) pada akses berikutnya
+        self._checked_at = 0.0
+
+    def clear(self):
+        with self._lock:
+            self._snapshot = None
+            self._checked_at = 0.0
+
+    @staticmethod
+    def _build(rows, previous=None):
+        old = previous.questions if previous is not None else {}
+        questions = []
+
+        def add(head, opts):
+            question = CachedQuestion(*head[:2], tuple(opts), *head[2:])
+            # isi sama persis (termasuk opsi): pakai objek dari snapshot sebelumnya
+            same = old.get(question.id)
+            questions.append(same if same == question else question)
+
+        head, opts = None, []
+        for qid, qtext, topic, difficulty, version, oid, otext, is_correct in rows:
+            if head is None or qid != head[0]:
+                if head is not None:
+                    add(head, opts)
+                head, opts = (qid, qtext, topic, difficulty, version or 0), []
+            opts.append(CachedOption(oid, qid, otext, bool(is_correct)))
+        if head is not None:
+            add(head, opts)
+        return questions
+
+    def get(self, qid):
+        return self.snapshot().questions.get(qid)
+
+    def get_option(self, oid):
+        return self.snapshot().options.get(oid)
+
+    def topics(self):
+        return sorted(t for t in self.snapshot().topics if t is not None)
+
+    def pick(self, exclude=(), rng=random, topic=None):
+        """Ambil satu soal acak (dari ``topic`` bila diisi) yang id-nya tidak ada di ``exclude`` (set)."""
+        snap = self.snapshot()
+        ids = snap.topic_ids(topic)
+        n = len(ids)
+        if n == 0:
+            return None
+        # O(1) expected: coba acak langsung selama sebagian besar soal masih tersedia
+        if len(exclude) * 2 < n:
+            for _ in range(_MAX_REJECTION_TRIES):
+                qid = ids[rng.randrange(n)]
+                if qid not in exclude:
+                    return snap.questions[qid]
+        remaining = [qid for qid in ids if qid not in exclude]
+        if not remaining:
+            return None
+        return snap.questions[rng.choice(remaining)]
+
+    @staticmethod
+    def shuffled_options(question, rng=random):
+        options = list(question.options)
+        rng.shuffle(options)
+        return options
+
+    def build_plan(self, seed, size, topic=None, history=None, policy=None):
+        """Urutan soal + urutan opsi untuk satu attempt, deterministik dari ``seed``.
+
+        Seed yang sama pada versi bank yang sama selalu menghasilkan plan yang
+        sama, jadi attempt bisa direproduksi untuk audit. Dengan ``policy``
+        (AdaptivePolicy) soal diambil berbobot tanpa pengembalian; ``history``
+        adalah {qid: (attempts, correct)} jawaban user sebelumnya, sehingga
+        plan adaptif juga bergantung pada riwayat saat plan dibuat.
+        """
+        snap = self.snapshot()
+        rng = random.Random(seed)
+        if policy is None:
+            ids = snap.topic_ids(topic)
+            ids = rng.sample(ids, min(size, len(ids)))
+        else:
+            ids = self._weighted_ids(snap, rng, size, topic, history or {}, policy)
+        plan = []
+        for qid in ids:
+            option_ids = [o.id for o in snap.questions[qid].options]
+            rng.shuffle(option_ids)
+            plan.append((qid, tuple(option_ids)))
+        return snap.version, plan
+
+    @staticmethod
+    def _weighted_ids(snap, rng, size, topic, history, policy):
+        attempts = sum(a for a, _ in history.values())
+        correct = sum(c for _, c in history.values())
+        level = policy.level(attempts, correct)
+        tree = snap.tree(topic, level, policy)
+        sampler = WeightedSampler(tree)
+        positions = snap.positions(topic)
+        # hanya soal yang pernah dijawab user yang bobotnya berubah
+        for qid, (a, c) in history.items():
+            i = positions.get(qid)
+            if i is not None:
+                sampler.set(i, tree.weights[i] * policy.factor(a, c))
+        ids = snap.topic_ids(topic)
+        picked = []
+        while len(picked) < size:
+            i = sampler.pop(rng)
+            if i is None:
+                break
+            picked.append(ids[i])
+        return picked
+
+    def planned_question(self, item, plan_version=None):
+        # soal + opsi dalam urutan plan; None jika soal sudah tidak ada di bank (atau dipensiunkan)
+        qid, option_ids = item
+        snap = self.snapshot()
+        question = snap.questions.get(qid)
+        if question is None:
+            return None, []
+        options = [snap.options[oid] for oid in option_ids if oid in snap.options]
+        if plan_version is not None and question.version > plan_version:
+            # soal diedit setelah plan dibuat: opsi yang baru ditambahkan ikut di belakang
+            planned = set(option_ids)
+            options += [o for o in question.options if o.id not in planned]
+        return question, options
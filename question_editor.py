@@ -0,0 +1,132 @@
+# question_editor.py
+# Perubahan bank soal dari editor admin: buat, edit, pensiunkan / pulihkan dan
+# ubah topik soal. Setiap fungsi berjalan di koneksi (transaksi) milik pemanggil
+# dan menandai soal yang diubah dengan ``version``: versi bank baru yang dibuat
+# pemanggil di transaksi yang sama. Soal tidak pernah dihapus (retired_at), jadi
+# foreign key user_answer ke soal dan opsinya tetap valid.
+from collections import namedtuple
+
+import sqlalchemy as sa
+
+from question_import import question_hash
+
+EditorTables = namedtuple("EditorTables", "questions options answers")
+
+
+class EditError(ValueError):
+    """Perubahan ditolak; pesannya ditampilkan ke admin."""
+
+
+def _check_hash(conn, q, content_hash, exclude_id=None):
+    stmt = sa.select(q.c.id).where(q.c.content_hash == content_hash)
+    if exclude_id is not None:
+        stmt = stmt.where(q.c.id != exclude_id)
+    other = conn.execute(stmt).scalar()
+    if other is not None:
+        raise EditError(f"Soal dengan teks dan opsi yang sama sudah ada (id {other}).")
+
+
+def create_question(conn, tables, record, version):
+    """Insert satu QuestionRecord; kembalikan id soal baru."""
+    q, o = tables.questions, tables.options
+    content_hash = question_hash(record.text, record.options, record.correct)
+    _check_hash(conn, q, content_hash)
+    qid = conn.execute(
+        q.insert().values(
+            text=record.text,
+            content_hash=content_hash,
+            topic=record.topic,
+            difficulty=record.difficulty,
+            version=version,
+        )
+    ).inserted_primary_key[0]
+    conn.execute(
+        o.insert(),
+        [
+            {"question_id": qid, "text": text, "is_correct": i == record.correct}
+            for i, text in enumerate(record.options)
+        ],
+    )
+    return qid
+
+
+def update_question(conn, tables, qid, record, option_ids, version):
+    """Ganti isi soal ``qid`` dengan ``record``; kembalikan ``qid``.
+
+    ``option_ids`` sejajar dengan ``record.options``: id opsi yang diedit di
+    tempat, atau None untuk opsi baru. Opsi lama yang tidak disebut dihapus,
+    kecuali pernah dipilih di user_answer.
+    """
+    q, o, a = tables.questions, tables.options, tables.answers
+    if conn.execute(sa.select(q.c.id).where(q.c.id == qid)).first() is None:
+        raise EditError(f"Soal {qid} tidak ditemukan.")
+    content_hash = question_hash(record.text, record.options, record.correct)
+    _check_hash(conn, q, content_hash, exclude_id=qid)
+
+    existing = set(conn.execute(sa.select(o.c.id).where(o.c.question_id == qid)).scalars())
+    kept = {oid for oid in option_ids if oid is not None}
+    if not kept <= existing:
+        raise EditError("Opsi tidak dikenal untuk soal ini.")
+    dropped = existing - kept
+    if dropped:
+        used = conn.execute(
+            sa.select(a.c.chosen_option_id).where(a.c.chosen_option_id.in_(dropped)).limit(1)
+        ).first()
+        if used is not None:
+            raise EditError(
+                "Opsi yang sudah pernah dipilih pengguna tidak bisa dihapus; "
+                "ubah teksnya, atau pensiunkan soal ini dan buat soal baru."
+            )
+        conn.execute(o.delete().where(o.c.id.in_(dropped)))
+
+    updates, inserts = [], []
+    for i, (oid, text) in enumerate(zip(option_ids, record.options)):
+        values = {"text": text, "is_correct": i == record.correct}
+        if oid is None:
+            inserts.append(dict(values, question_id=qid))
+        else:
+            updates.append(dict(values, b_id=oid))
+    if updates:
+        conn.execute(o.update().where(o.c.id == sa.bindparam("b_id")), updates)
+    if inserts:
+        conn.execute(o.insert(), inserts)
+    conn.execute(
+        q.update()
+        .where(q.c.id == qid)
+        .values(
+            text=record.text,
+            content_hash=content_hash,
+            topic=record.topic,
+            difficulty=record.difficulty,
+            version=version,
+        )
+    )
+    return qid
+
+
+def set_retired(conn, tables, ids, retired_at, version):
+    """Pensiunkan soal ``ids`` (``retired_at`` diisi) atau pulihkan (None).
+    Kembalikan jumlah soal yang statusnya berubah."""
+    q = tables.questions
+    if not ids:
+        return 0
+    if retired_at is None:
+        status = q.c.retired_at.is_not(None)
+    else:
+        status = q.c.retired_at.is_(None)
+    return conn.execute(
+        q.update()
+        .where(q.c.id.in_(ids), status)
+        .values(retired_at=retired_at, version=version)
+    ).rowcount
+
+
+def retag_questions(conn, tables, ids, version, **values):
+    """Set topic dan/atau difficulty untuk banyak soal sekaligus."""
+    q = tables.questions
+    values = {k: v for k, v in values.items() if k in ("topic", "difficulty")}
+    if not ids or not values:
+        return 0
+    return conn.execute(
+        q.update().where(q.c.id.in_(ids)).values(version=version, **values)
+    ).rowcount
@@ -0,0 +1,186 @@
+# question_import.py
+# Import bank soal secara bulk dan idempotent: soal dibaca streaming dari file
+# JSON Lines / CSV, di-dedupe lewat content_hash, lalu ditulis per chunk dengan
+# executemany (satu transaksi per chunk).
+import csv
+import hashlib
+import io
+import json
+import time
+from collections import namedtuple
+from itertools import islice
+
+import sqlalchemy as sa
+
+# topic/difficulty opsional: metadata, bukan bagian dari identitas soal (content_hash)
+QuestionRecord = namedtuple(
+    "QuestionRecord", "text options correct topic difficulty", defaults=(None, None)
+)
+
+
+def _normalize(text):
+    return " ".join(str(text).split())
+
+
+def question_hash(text, options, correct):
+    # teks + opsi + indeks jawaban benar; spasi berlebih diabaikan
+    h = hashlib.sha1()
+    h.update(_normalize(text).encode("utf-8"))
+    for i, opt in enumerate(options):
+        h.update(b"\x1f")
+        if i == correct:
+            h.update(b"*")
+        h.update(_normalize(opt).encode("utf-8"))
+    return h.hexdigest()
+
+
+def make_record(text, options, correct, topic=None, difficulty=None):
+    options = [o for o in (str(o).strip() for o in options) if o]
+    correct = int(correct)
+    if not str(text).strip() or len(options) < 2 or not 0 <= correct < len(options):
+        raise ValueError(f"invalid question: {text!r}")
+    topic = (str(topic).strip() or None) if topic is not None else None
+    difficulty = int(difficulty) if difficulty not in (None, "") else None
+    if difficulty is not None and not 1 <= difficulty <= 5:
+        raise ValueError(f"difficulty must be 1-5: {text!r}")
+    return QuestionRecord(str(text).strip(), options, correct, topic, difficulty)
+
+
+def parse_jsonl(f):
+    # satu objek per baris: {"text": ..., "options": [...], "correct": 1,
+    # "topic": "computer-vision", "difficulty": 2} (dua kunci terakhir opsional)
+    for line in f:
+        line = line.strip()
+        if line:
+            data = json.loads(line)
+            yield make_record(
+                data["text"],
+                data["options"],
+                data["correct"],
+                data.get("topic"),
+                data.get("difficulty"),
+            )
+
+
+def parse_csv(f):
+    # header: text, correct, option_1, option_2, ... (kolom opsi diawali "option"),
+    # plus kolom opsional topic dan difficulty
+    reader = csv.DictReader(f)
+    option_cols = [c for c in reader.fieldnames or [] if c.lower().startswith("option")]
+    for row in reader:
+        yield make_record(
+            row["text"],
+            [row[c] for c in option_cols],
+            row["correct"],
+            row.get("topic"),
+            row.get("difficulty"),
+        )
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        yield from parse_jsonl(f)
+
+
+def read_csv(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        yield from parse_csv(f)
+
+
+def read_questions(path, fmt=None):
+    fmt = fmt or ("csv" if str(path).lower().endswith(".csv") else "jsonl")
+    return read_csv(path) if fmt == "csv" else read_jsonl(path)
+
+
+def read_stream(stream, fmt):
+    """Seperti read_questions, tapi dari stream biner yang sudah terbuka (mis. upload)."""
+    f = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    return parse_csv(f) if fmt == "csv" else parse_jsonl(f)
+
+
+ImportStats = namedtuple("ImportStats", "read inserted skipped updated seconds")
+
+
+def import_questions(engine, records, question_table, option_table, chunk_size=500, progress=None):
+    """Insert soal yang belum ada; aman dijalankan berulang pada file yang sama.
+
+    Soal yang sudah ada hanya diperbarui topic/difficulty-nya bila file
+    mengisinya dan nilainya berbeda (``updated``). ``progress(read, inserted,
+    updated)`` dipanggil setelah setiap chunk di-commit.
+    """
+    q, o = question_table, option_table
+    read = inserted = updated = 0
+    started = time.perf_counter()
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+        read += len(chunk)
+        by_hash = {}
+        for rec in chunk:
+            by_hash.setdefault(question_hash(rec.text, rec.options, rec.correct), rec)
+
+        with engine.begin() as conn:
+            existing = {
+                h: (topic, difficulty)
+                for h, topic, difficulty in conn.execute(
+                    q.select()
+                    .with_only_columns(q.c.content_hash, q.c.topic, q.c.difficulty)
+                    .where(q.c.content_hash.in_(list(by_hash)))
+                )
+            }
+            # per kolom: nilai None di file berarti "tidak diisi", bukan "kosongkan"
+            retagged = set()
+            for i, column in enumerate(("topic", "difficulty")):
+                params = [
+                    {"b_hash": h, column: getattr(rec, column)}
+                    for h, rec in by_hash.items()
+                    if h in existing
+                    and getattr(rec, column) is not None
+                    and getattr(rec, column) != existing[h][i]
+                ]
+                if params:
+                    conn.execute(
+                        q.update().where(q.c.content_hash == sa.bindparam("b_hash")),
+                        params,
+                    )
+                    retagged.update(p["b_hash"] for p in params)
+            updated += len(retagged)
+            new = {h: rec for h, rec in by_hash.items() if h not in existing}
+            if new:
+                conn.execute(
+                    q.insert(),
+                    [
+                        {
+                            "text": rec.text,
+                            "content_hash": h,
+                            "topic": rec.topic,
+                            "difficulty": rec.difficulty,
+                        }
+                        for h, rec in new.items()
+                    ],
+                )
+                ids = dict(
+                    conn.execute(
+                        q.select().with_only_columns(q.c.content_hash, q.c.id).where(
+                            q.c.content_hash.in_(list(new))
+                        )
+                    ).all()
+                )
+                conn.execute(
+                    o.insert(),
+                    [
+                        {
+                            "question_id": ids[h],
+                            "text": text,
+                            "is_correct": i == rec.correct,
+                        }
+                        for h, rec in new.items()
+                        for i, text in enumerate(rec.options)
+                    ],
+                )
+        inserted += len(new)
+        if progress:
+            progress(read, inserted, updated)
+    return ImportStats(read, inserted, read - inserted, updated, time.perf_counter() - started)
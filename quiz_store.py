@@ -0,0 +1,235 @@
+# quiz_store.py
+# Penyimpanan sesi kuis di sisi server. Cookie hanya membawa attempt id;
+# progres (jumlah soal, jawaban benar, id soal yang sudah tampil) ada di sini.
+import json
+import threading
+import time
+import uuid
+
+
+class QuizAttempt:
+    __slots__ = (
+        "id",
+        "user_id",
+        "count",
+        "correct",
+        "seen",
+        "updated_at",
+        "seed",
+        "bank_version",
+        "plan",
+        "plan_pos",
+        "topic",
+        "stored",
+    )
+
+    def __init__(
+        self,
+        id,
+        user_id,
+        count=0,
+        correct=0,
+        seen=None,
+        updated_at=None,
+        seed=None,
+        bank_version=None,
+        plan=None,
+        plan_pos=0,
+        topic=None,
+    ):
+        self.id = id
+        self.user_id = user_id
+        self.count = count
+        self.correct = correct
+        # set id soal yang sudah tampil: cek keanggotaan O(1)
+        self.seen = set(seen or ())
+        self.updated_at = updated_at or time.time()
+        # mode plan: urutan soal/opsi ditentukan sekali di awal attempt
+        self.seed = seed
+        self.bank_version = bank_version
+        self.plan = [(qid, tuple(opts)) for qid, opts in plan] if plan is not None else None
+        self.plan_pos = plan_pos
+        # topik bank soal yang dipilih (None = semua)
+        self.topic = topic
+        # False sampai disimpan pertama kali: backend SQL langsung INSERT tanpa UPDATE dulu
+        self.stored = False
+
+    def current_plan_item(self):
+        if self.plan is None or self.plan_pos >= len(self.plan):
+            return None
+        return self.plan[self.plan_pos]
+
+    @classmethod
+    def new(cls, user_id, topic=None):
+        return cls(uuid.uuid4().hex, user_id, topic=topic)
+
+    def dumps(self):
+        data = {
+            "u": self.user_id,
+            "c": self.count,
+            "k": self.correct,
+            "s": sorted(self.seen),
+        }
+        if self.plan is not None:
+            data.update(r=self.seed, v=self.bank_version, p=self.plan, i=self.plan_pos)
+        if self.topic is not None:
+            data["t"] = self.topic
+        return json.dumps(data, separators=(",", ":"))
+
+    @classmethod
+    def loads(cls, attempt_id, raw, updated_at=None):
+        data = json.loads(raw)
+        attempt = cls(
+            attempt_id,
+            data["u"],
+            data["c"],
+            data["k"],
+            data["s"],
+            updated_at,
+            seed=data.get("r"),
+            bank_version=data.get("v"),
+            plan=data.get("p"),
+            plan_pos=data.get("i", 0),
+            topic=data.get("t"),
+        )
+        attempt.stored = True
+        return attempt
+
+
+class MemoryAttemptStore:
+    """Backend per proses; attempt yang idle lebih dari ``ttl`` detik dibuang."""
+
+    def __init__(self, ttl=6 * 3600, purge_interval=60):
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._data = {}
+        self._lock = threading.Lock()
+        self._purged_at = time.monotonic()
+
+    def get(self, attempt_id):
+        with self._lock:
+            attempt = self._data.get(attempt_id)
+            if attempt is None:
+                return None
+            if time.time() - attempt.updated_at > self.ttl:
+                del self._data[attempt_id]
+                return None
+            return attempt
+
+    def save(self, attempt):
+        attempt.updated_at = time.time()
+        with self._lock:
+            self._data[attempt.id] = attempt
+        self._maybe_purge()
+
+    def delete(self, attempt_id):
+        with self._lock:
+            self._data.pop(attempt_id, None)
+
+    def _maybe_purge(self):
+        now = time.monotonic()
+        if now - self._purged_at < self.purge_interval:
+            return
+        self._purged_at = now
+        self.purge_expired()
+
+    def purge_expired(self):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [k for k, a in self._data.items() if a.updated_at < cutoff]
+            for k in expired:
+                del self._data[k]
+        return len(expired)
+
+
+class SqlAttemptStore:
+    """Backend bersama di tabel database aplikasi (SQLite/MySQL).
+
+    ``table`` punya kolom id, user_id, data, updated_at; ``engine_fn``
+    mengembalikan engine SQLAlchemy yang dipakai.
+    """
+
+    def __init__(self, table, engine_fn, ttl=6 * 3600, purge_interval=60):
+        self.table = table
+        self._engine_fn = engine_fn
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._purged_at = time.monotonic()
+
+    def get(self, attempt_id):
+        t = self.table
+        with self._engine_fn().connect() as conn:
+            row = conn.execute(
+                t.select().where(t.c.id == attempt_id)
+            ).first()
+        if row is None or time.time() - row.updated_at > self.ttl:
+            return None
+        return QuizAttempt.loads(row.id, row.data, row.updated_at)
+
+    def save(self, attempt):
+        t = self.table
+        attempt.updated_at = time.time()
+        values = {
+            "user_id": attempt.user_id,
+            "data": attempt.dumps(),
+            "updated_at": attempt.updated_at,
+        }
+        with self._engine_fn().begin() as conn:
+            updated = attempt.stored and conn.execute(
+                t.update().where(t.c.id == attempt.id).values(**values)
+            ).rowcount
+            if not updated:
+                # attempt baru, atau barisnya sudah di-purge
+                conn.execute(t.insert().values(id=attempt.id, **values))
+        attempt.stored = True
+        self._maybe_purge()
+
+    def delete(self, attempt_id):
+        t = self.table
+        with self._engine_fn().begin() as conn:
+            conn.execute(t.delete().where(t.c.id == attempt_id))
+
+    def _maybe_purge(self):
+        now = time.monotonic()
+        if now - self._purged_at < self.purge_interval:
+            return
+        self._purged_at = now
+        self.purge_expired()
+
+    def purge_expired(self):
+        t = self.table
+        with self._engine_fn().begin() as conn:
+            return conn.execute(
+                t.delete().where(t.c.updated_at < time.time() - self.ttl)
+            ).rowcount
+
+
+class RedisAttemptStore:
+    """Backend bersama di Redis (atau server yang kompatibel); expiry lewat TTL key."""
+
+    def __init__(self, url, ttl=6 * 3600, prefix="quiz:attempt"):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _key(self, attempt_id):
+        return f"{self.prefix}:{attempt_id}"
+
+    def get(self, attempt_id):
+        raw = self._redis.get(self._key(attempt_id))
+        if raw is None:
+            return None
+        return QuizAttempt.loads(attempt_id, raw)
+
+    def save(self, attempt):
+        attempt.updated_at = time.time()
+        self._redis.set(self._key(attempt.id), attempt.dumps(), ex=int(self.ttl))
+
+    def delete(self, attempt_id):
+        self._redis.delete(self._key(attempt_id))
+
+    def purge_expired(self):
+        # Redis membuang key kadaluarsa sendiri
+        return 0
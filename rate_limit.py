@@ -0,0 +1,148 @@
+# rate_limit.py
+# Token bucket untuk membatasi percobaan login per IP dan login gagal per akun. Backend
+# "memory" berlaku per proses; "redis" dibagi semua worker (skrip Lua atomik).
+import math
+import threading
+import time
+from collections import namedtuple
+
+RateLimitResult = namedtuple("RateLimitResult", "allowed retry_after")
+
+
+def parse_rate(value):
+    """ "20/60" -> (kapasitas 20, isi ulang 20 token per 60 detik)."""
+    count, _, seconds = str(value).partition("/")
+    count, seconds = int(count), float(seconds or 60)
+    return count, count / seconds
+
+
+class MemoryRateLimitBackend:
+    def __init__(self, purge_interval=60):
+        # key -> (token, waktu update terakhir, waktu bucket penuh lagi)
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.purge_interval = purge_interval
+        self._purged_at = time.monotonic()
+
+    def take(self, key, capacity, refill_rate, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            full_at = now + (capacity - tokens) / refill_rate
+            self._buckets[key] = (tokens, now, full_at)
+            if now - self._purged_at >= self.purge_interval:
+                self._purge(now)
+        if allowed:
+            return RateLimitResult(True, 0.0)
+        return RateLimitResult(False, (cost - tokens) / refill_rate)
+
+    def peek(self, key, capacity, refill_rate):
+        # seperti take(), tapi tanpa memakai token: masih ada minimal satu?
+        now = time.monotonic()
+        with self._lock:
+            state = self._buckets.get(key)
+        if state is None:
+            return RateLimitResult(True, 0.0)
+        tokens, updated, _ = state
+        tokens = min(capacity, tokens + (now - updated) * refill_rate)
+        if tokens >= 1:
+            return RateLimitResult(True, 0.0)
+        return RateLimitResult(False, (1 - tokens) / refill_rate)
+
+    def _purge(self, now):
+        # bucket yang sudah penuh lagi sama dengan bucket yang belum pernah dipakai
+        self._purged_at = now
+        stale = [k for k, (_, _, full_at) in self._buckets.items() if full_at <= now]
+        for k in stale:
+            del self._buckets[k]
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 't', 'u')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'u', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisRateLimitBackend:
+    """Bucket di hash Redis; dibaca-ubah-tulis atomik lewat satu skrip Lua."""
+
+    def __init__(self, url, prefix="ratelimit"):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self._take = self._redis.register_script(_TAKE_SCRIPT)
+        self.prefix = prefix
+
+    def take(self, key, capacity, refill_rate, cost=1):
+        allowed, tokens = self._take(
+            keys=[f"{self.prefix}:{key}"], args=[capacity, refill_rate, time.time(), cost]
+        )
+        if allowed:
+            return RateLimitResult(True, 0.0)
+        return RateLimitResult(False, (cost - float(tokens)) / refill_rate)
+
+    def peek(self, key, capacity, refill_rate):
+        tokens, updated = self._redis.hmget(f"{self.prefix}:{key}", "t", "u")
+        if tokens is None:
+            return RateLimitResult(True, 0.0)
+        elapsed = max(0.0, time.time() - float(updated or 0))
+        tokens = min(capacity, float(tokens) + elapsed * refill_rate)
+        if tokens >= 1:
+            return RateLimitResult(True, 0.0)
+        return RateLimitResult(False, (1 - tokens) / refill_rate)
+
+    def reset(self, key):
+        self._redis.delete(f"{self.prefix}:{key}")
+
+
+class RateLimiter:
+    """Satu aturan token bucket, mis. ``RateLimiter(backend, "login-ip", "20/60")``."""
+
+    def __init__(self, backend, name, rate):
+        self.backend = backend
+        self.name = name
+        self.capacity, self.refill_rate = parse_rate(rate)
+
+    def hit(self, key):
+        return self.backend.take(f"{self.name}:{key}", self.capacity, self.refill_rate)
+
+    def check(self, key):
+        """Ditolak bila bucket sudah kosong, tanpa memakai token (mis. hanya
+        kegagalan login yang dihitung lewat ``hit``)."""
+        return self.backend.peek(f"{self.name}:{key}", self.capacity, self.refill_rate)
+
+    def reset(self, key):
+        self.backend.reset(f"{self.name}:{key}")
+
+
+def retry_after_header(result):
+    # detik bulat ke atas, untuk header Retry-After
+    return str(max(1, math.ceil(result.retry_after)))
+
+
+def make_backend(name, redis_url=None):
+    if name == "redis":
+        return RedisRateLimitBackend(redis_url or "redis://localhost:6379/0")
+    return MemoryRateLimitBackend()
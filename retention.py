@@ -0,0 +1,198 @@
+# retention.py
+# Retensi user_answer: jawaban yang lebih tua dari jendela "hot" diringkas ke
+# agregat per soal/hari dan per user/hari, baris mentahnya diarsip ke file
+# JSON Lines gzip per hari, lalu dihapus dari tabel. Riwayat user membaca
+# tabel hot dulu dan melanjutkan ke arsip (lewat user_daily_stat) bila perlu.
+import gzip
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, namedtuple
+from datetime import datetime, time as dtime, timedelta
+from itertools import groupby
+
+import sqlalchemy as sa
+
+from history import upsert_add
+
+RetentionTables = namedtuple(
+    "RetentionTables", "answers question_daily user_daily archive_files"
+)
+ArchiveStats = namedtuple("ArchiveStats", "days rows files seconds")
+ArchivedAnswer = namedtuple(
+    "ArchivedAnswer", "id user_id question_id chosen_option_id is_correct created_at"
+)
+
+DELETE_CHUNK = 500
+
+
+def retention_cutoff(days, now=None):
+    """Awal hari (UTC) ``days`` hari lalu; jawaban sebelum ini diarsip."""
+    now = now or datetime.utcnow()
+    return datetime.combine(now.date() - timedelta(days=days), dtime.min)
+
+
+def _encode(row):
+    data = row._asdict()
+    data["created_at"] = row.created_at.isoformat()
+    data["is_correct"] = bool(row.is_correct)
+    return (json.dumps(data, separators=(",", ":")) + "\n").encode()
+
+
+def _decode(line):
+    data = json.loads(line)
+    data["created_at"] = datetime.fromisoformat(data["created_at"])
+    return ArchivedAnswer(**data)
+
+
+def _write_archive(path, rows):
+    # tulis ke .tmp lalu rename: file arsip tidak pernah terlihat setengah jadi
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+            for row in rows:
+                gz.write(_encode(row))
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(tmp, path)
+
+
+def _daily_rows(rows, key, day):
+    attempts, correct = {}, {}
+    for row in rows:
+        k = getattr(row, key)
+        attempts[k] = attempts.get(k, 0) + 1
+        correct[k] = correct.get(k, 0) + (1 if row.is_correct else 0)
+    return [
+        {key: k, "day": day, "attempts": n, "correct": correct[k]}
+        for k, n in attempts.items()
+    ]
+
+
+def _archive_day(engine, tables, archive_dir, day, start, end, dry_run):
+    a = tables.answers
+    with engine.connect() as conn:
+        rows = conn.execute(
+            sa.select(*(a.c[f] for f in ArchivedAnswer._fields))
+            .where(a.c.created_at >= start, a.c.created_at < end)
+            .order_by(a.c.user_id, a.c.created_at, a.c.id)
+        ).all()
+    if dry_run or not rows:
+        return len(rows), None
+
+    filename = f"answers-{day:%Y-%m-%d}-{uuid.uuid4().hex[:8]}.jsonl.gz"
+    path = os.path.join(archive_dir, filename)
+    _write_archive(path, rows)
+    try:
+        # agregat, katalog dan penghapusan dalam satu transaksi
+        with engine.begin() as conn:
+            upsert_add(
+                conn, tables.question_daily, ("question_id", "day"),
+                _daily_rows(rows, "question_id", day),
+            )
+            upsert_add(
+                conn, tables.user_daily, ("user_id", "day"), _daily_rows(rows, "user_id", day)
+            )
+            conn.execute(
+                tables.archive_files.insert().values(
+                    day=day, filename=filename, rows=len(rows), created_at=datetime.utcnow()
+                )
+            )
+            ids = [row.id for row in rows]
+            for i in range(0, len(ids), DELETE_CHUNK):
+                conn.execute(a.delete().where(a.c.id.in_(ids[i : i + DELETE_CHUNK])))
+    except BaseException:
+        os.remove(path)
+        raise
+    return len(rows), filename
+
+
+def archive_answers(engine, tables, archive_dir, cutoff, dry_run=False, progress=None):
+    """Arsipkan jawaban dengan created_at < ``cutoff``, satu hari per transaksi.
+
+    Aman diulang: hari yang sudah diarsip tidak punya baris lagi di tabel hot,
+    dan sisa baris yang datang terlambat menjadi file bagian baru di hari itu.
+    """
+    a = tables.answers
+    if not dry_run:
+        os.makedirs(archive_dir, exist_ok=True)
+    started = time.perf_counter()
+    days = total = files = 0
+    lower = None
+    while True:
+        with engine.connect() as conn:
+            stmt = sa.select(sa.func.min(a.c.created_at)).where(a.c.created_at < cutoff)
+            if lower is not None:
+                stmt = stmt.where(a.c.created_at >= lower)
+            first = conn.execute(stmt).scalar()
+        if first is None:
+            break
+        day = first.date()
+        start = datetime.combine(day, dtime.min)
+        end = min(cutoff, start + timedelta(days=1))
+        count, filename = _archive_day(engine, tables, archive_dir, day, start, end, dry_run)
+        days += 1
+        total += count
+        files += 1 if filename else 0
+        lower = end
+        if progress:
+            progress(day, count, filename)
+    return ArchiveStats(days, total, files, time.perf_counter() - started)
+
+
+class ArchiveReader:
+    """Baca jawaban arsip per user. Isi file yang terakhir dibaca disimpan
+    (dikelompokkan per user) untuk ``max_files`` file, LRU."""
+
+    def __init__(self, archive_dir, max_files=8):
+        self.archive_dir = archive_dir
+        self.max_files = max_files
+        self._files = OrderedDict()
+        self._lock = threading.Lock()
+
+    def rows(self, filename):
+        with gzip.open(os.path.join(self.archive_dir, filename), "rb") as f:
+            for line in f:
+                yield _decode(line)
+
+    def user_rows(self, filename, user_id):
+        with self._lock:
+            by_user = self._files.get(filename)
+            if by_user is not None:
+                self._files.move_to_end(filename)
+        if by_user is None:
+            by_user = {}
+            for row in self.rows(filename):
+                by_user.setdefault(row.user_id, []).append(row)
+            with self._lock:
+                self._files[filename] = by_user
+                while len(self._files) > self.max_files:
+                    self._files.popitem(last=False)
+        return by_user.get(user_id, ())
+
+
+def archived_history(conn, tables, reader, user_id, cursor, limit):
+    """Sampai ``limit`` jawaban arsip user, terbaru dulu, setelah ``cursor``
+    (created_at, id) pada urutan menurun. Hanya file di hari yang tercatat
+    di user_daily_stat untuk user ini yang dibuka."""
+    ud, af = tables.user_daily, tables.archive_files
+    stmt = (
+        sa.select(af.c.day, af.c.filename)
+        .join(ud, ud.c.day == af.c.day)
+        .where(ud.c.user_id == user_id)
+        .order_by(af.c.day.desc(), af.c.id)
+    )
+    if cursor:
+        stmt = stmt.where(af.c.day <= cursor[0].date())
+    found = []
+    for _, files in groupby(conn.execute(stmt).all(), key=lambda r: r.day):
+        rows = [row for f in files for row in reader.user_rows(f.filename, user_id)]
+        if cursor:
+            rows = [row for row in rows if (row.created_at, row.id) < cursor]
+        rows.sort(key=lambda row: (row.created_at, row.id), reverse=True)
+        found.extend(rows)
+        if len(found) >= limit:
+            break
+    return found[:limit]
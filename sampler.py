@@ -0,0 +1,120 @@
+# sampler.py
+# Sampling berbobot tanpa pengembalian dalam O(log n) per ambilan. Bobot dasar
+# disimpan di Fenwick tree yang dibagi semua request (dibangun sekali per
+# snapshot bank); bobot per user ditumpuk di atasnya sebagai perubahan jarang,
+# jadi menyiapkan sampler untuk satu user hanya O(k log n) untuk k soal yang
+# bobotnya berbeda, bukan O(n).
+import random
+
+
+class FenwickTree:
+    """Prefix sum bobot ``weights`` (indeks 0..n-1); tidak diubah setelah dibuat."""
+
+    __slots__ = ("weights", "total", "_tree", "_top")
+
+    def __init__(self, weights):
+        self.weights = list(weights)
+        n = len(self.weights)
+        # build O(n): setiap node meneruskan jumlahnya ke parent
+        tree = [0.0] + [float(w) for w in self.weights]
+        for i in range(1, n + 1):
+            parent = i + (i & -i)
+            if parent <= n:
+                tree[parent] += tree[i]
+        self._tree = tree
+        self.total = float(sum(self.weights))
+        self._top = 1 << (n.bit_length() - 1) if n else 0
+
+    def __len__(self):
+        return len(self.weights)
+
+    def find(self, r, delta=None):
+        """Indeks terkecil i dengan prefix_sum(i) > r; ``delta`` menambahkan
+        perubahan jarang {node: selisih} ke node tree selama pencarian."""
+        tree = self._tree
+        n = len(tree) - 1
+        pos = 0
+        step = self._top
+        while step:
+            nxt = pos + step
+            if nxt <= n:
+                value = tree[nxt]
+                if delta:
+                    value += delta.get(nxt, 0.0)
+                if value <= r:
+                    r -= value
+                    pos = nxt
+            step >>= 1
+        return pos
+
+
+class WeightedSampler:
+    """Pandangan per user atas FenwickTree bersama: ``set`` mengubah bobot
+    satu indeks, ``pop`` mengambil satu indeks sesuai bobot lalu menolkannya."""
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.total = tree.total
+        self._weights = {}
+        self._delta = {}
+
+    def weight(self, i):
+        return self._weights.get(i, self.tree.weights[i])
+
+    def set(self, i, weight):
+        diff = weight - self.weight(i)
+        if not diff:
+            return
+        self._weights[i] = weight
+        self.total += diff
+        n = len(self.tree)
+        j = i + 1
+        while j <= n:
+            self._delta[j] = self._delta.get(j, 0.0) + diff
+            j += j & -j
+
+    def pop(self, rng=random):
+        # galat floating point bisa membuat total sedikit di atas nol / indeks
+        # jatuh ke bobot nol; dicoba ulang beberapa kali sebelum menyerah
+        n = len(self.tree)
+        for _ in range(4):
+            if self.total <= 1e-12:
+                return None
+            i = min(self.tree.find(rng.random() * self.total, self._delta), n - 1)
+            if self.weight(i) > 0:
+                self.set(i, 0.0)
+                return i
+        return None
+
+
+class AdaptivePolicy:
+    """Bobot seleksi adaptif.
+
+    Bobot dasar soal tergantung jarak ``difficulty`` (1-5) ke level user;
+    level naik seiring akurasi user. Soal yang sudah pernah dijawab dikali
+    faktor antara ``mastered`` (selalu benar) dan ``missed`` (selalu salah),
+    soal yang belum pernah dijawab tetap 1, jadi soal baru dan soal yang
+    sering salah lebih sering muncul.
+    """
+
+    LEVELS = (1, 2, 3, 4, 5)
+
+    def __init__(self, missed=0.8, mastered=0.1, min_answers=10):
+        self.missed = missed
+        self.mastered = mastered
+        self.min_answers = min_answers
+
+    def level(self, attempts, correct):
+        if attempts < self.min_answers:
+            return 3
+        return 1 + round(4 * correct / attempts)
+
+    @staticmethod
+    def base_weight(difficulty, level):
+        # soal tanpa difficulty dianggap sedang (3)
+        return 1.0 / (1 + abs((difficulty or 3) - level))
+
+    def factor(self, attempts, correct):
+        if not attempts:
+            return 1.0
+        return self.mastered + (self.missed - self.mastered) * (1 - correct / attempts)
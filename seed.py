@@ -1,24 +1,18 @@
 # seed.py
-from app import db, Question, AnswerOption, app
+from app import db, Question, AnswerOption, app, bump_bank_version, init_schema
+from question_import import QuestionRecord, import_questions
+
+QUESTIONS = []
+TOPIC = "computer-vision"
 
 
 def add_q(t, opts, correct_idx):
-    # hindari duplikasi berdasarkan teks pertanyaan
-    existing = Question.query.filter_by(text=t).first()
-    if existing:
-        return
-    q = Question(text=t)
-    db.session.add(q)
-    db.session.flush()  # dapatkan q.id
-    for i, txt in enumerate(opts):
-        db.session.add(
-            AnswerOption(question_id=q.id, text=txt, is_correct=(i == correct_idx))
-        )
-    db.session.commit()
+    # dikumpulkan dulu, lalu ditulis sekaligus lewat import_questions
+    QUESTIONS.append(QuestionRecord(t, opts, correct_idx, TOPIC))
 
 
 with app.app_context():
-    db.create_all()
+    init_schema()
 
     # 1
     add_q(
@@ -241,4 +235,14 @@ with app.app_context():
         0,
     )
 
-print("Seeding completed: 20 computer vision questions added if not already present.")
+    # hindari duplikasi lewat content_hash (teks + opsi), satu transaksi untuk semua
+    stats = import_questions(
+        db.engine, QUESTIONS, Question.__table__, AnswerOption.__table__
+    )
+
+    # beri tahu cache bank soal di proses web bahwa isi bank berubah
+    if stats.inserted or stats.updated:
+        bump_bank_version()
+        db.session.commit()
+
+print(f"Seeding completed: {stats.inserted} of {stats.read} computer vision questions added (the rest were already present).")
@@ -0,0 +1,95 @@
+# serve.py
+# Runner produksi: jumlah worker/thread dihitung dari jumlah CPU (bisa ditimpa
+# lewat env), lalu app dijalankan dengan gunicorn (Linux/macOS, multi-proses,
+# membaca gunicorn.conf.py) atau waitress (semua OS, satu proses multi-thread).
+#
+#   python serve.py                          # gunicorn bila terpasang, selain itu waitress
+#   python serve.py --workers 3 --threads 4
+#   python serve.py --server waitress --bind 127.0.0.1:8000
+#   gunicorn wsqi:application                # sama, tanpa serve.py
+import argparse
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+
+
+def server_settings(environ=os.environ, cpus=None):
+    """bind, workers dan threads per worker dari env (WEB_CONCURRENCY,
+    WEB_THREADS, BIND/PORT) atau dari jumlah CPU."""
+    cpus = cpus or os.cpu_count() or 1
+    # request kebanyakan menunggu I/O (DB, OpenWeatherMap): 2 x CPU + 1 proses, dibatasi
+    # karena tiap worker menyimpan bank soal, leaderboard dan cache sendiri
+    workers = int(environ.get("WEB_CONCURRENCY") or min(2 * cpus + 1, 9))
+    threads = int(environ.get("WEB_THREADS") or 4)
+    bind = environ.get("BIND") or f"0.0.0.0:{environ.get('PORT', '8000')}"
+    return {"bind": bind, "workers": workers, "threads": threads}
+
+
+def worker_env(workers, environ=os.environ):
+    """Default env app untuk lebih dari satu worker; nilai yang sudah diset tidak diubah."""
+    if workers <= 1:
+        return {}
+    shared = "redis" if environ.get("REDIS_URL") else "sql"
+    defaults = {
+        # cache per proses tetap konsisten lewat kanal invalidasi
+        "INVALIDATION_BACKEND": shared,
+        # request berikutnya bisa jatuh ke worker lain: attempt kuis harus dibagi
+        "QUIZ_STORE": shared,
+        # worker sudah memakai semua CPU; hashlib.scrypt melepas GIL di thread request
+        "PASSWORD_HASH_WORKERS": "0",
+    }
+    return {key: value for key, value in defaults.items() if key not in environ}
+
+
+def run_gunicorn():
+    os.chdir(ROOT)
+    config = str(ROOT / "gunicorn.conf.py")
+    os.execv(sys.executable, [sys.executable, "-m", "gunicorn", "-c", config, "wsqi:application"])
+
+
+def run_waitress(settings):
+    from waitress import serve
+
+    # satu proses: semua thread berbagi cache, bus invalidasi tidak diperlukan
+    os.environ.update(worker_env(1))
+    # anggaran thread yang dilihat app (mis. batas penonton SSE) adalah total satu proses
+    os.environ["WEB_THREADS"] = str(settings["workers"] * settings["threads"])
+    sys.path.insert(0, str(ROOT))
+    from wsqi import application
+
+    serve(application, listen=settings["bind"], threads=settings["workers"] * settings["threads"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jalankan app dengan server WSGI produksi")
+    parser.add_argument("--server", choices=["auto", "gunicorn", "waitress"], default="auto")
+    parser.add_argument("--bind", help="host:port (default: BIND atau 0.0.0.0:$PORT)")
+    parser.add_argument("--workers", type=int, help="default: WEB_CONCURRENCY atau 2 x CPU + 1")
+    parser.add_argument("--threads", type=int, help="per worker (default: WEB_THREADS atau 4)")
+    args = parser.parse_args()
+
+    # diteruskan lewat env agar gunicorn.conf.py memakai nilai yang sama
+    overrides = {"BIND": args.bind, "WEB_CONCURRENCY": args.workers, "WEB_THREADS": args.threads}
+    for name, value in overrides.items():
+        if value:
+            os.environ[name] = str(value)
+
+    server = args.server
+    if server == "auto":
+        has_gunicorn = os.name == "posix" and importlib.util.find_spec("gunicorn") is not None
+        server = "gunicorn" if has_gunicorn else "waitress"
+    settings = server_settings()
+    if server == "gunicorn":
+        print(f"gunicorn: {settings['bind']}, {settings['workers']} x {settings['threads']} threads")
+        sys.stdout.flush()
+        run_gunicorn()
+    else:
+        print(f"waitress: {settings['bind']}, {settings['workers'] * settings['threads']} threads")
+        run_waitress(settings)
+
+
+if __name__ == "__main__":
+    main()
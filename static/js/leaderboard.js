@@ -0,0 +1,131 @@
+// Leaderboard realtime: snapshot + diff peringkat dari /leaderboard/stream (SSE).
+// Tanpa EventSource, saat stream mati atau penuh: polling /leaderboard dengan
+// If-None-Match (304 selama tidak ada perubahan) setiap data-poll-interval detik.
+document.addEventListener('DOMContentLoaded', function() {
+  const container = document.querySelector('.lb-container[data-poll-url]');
+  if (!container) return;
+  const MEDALS = ['🥇', '🥈', '🥉'];
+  let rows = {}; // user_id -> [rank, user_id, username, score]
+
+  function list() {
+    let ul = container.querySelector('ul.leaderboard');
+    if (!ul) {
+      const empty = container.querySelector('p');
+      if (empty) empty.remove();
+      ul = document.createElement('ul');
+      ul.className = 'leaderboard';
+      container.appendChild(ul);
+    }
+    return ul;
+  }
+
+  function createItem(userId) {
+    const li = document.createElement('li');
+    li.dataset.userId = userId;
+    ['rank', 'avatar', 'info', 'score'].forEach(function(name) {
+      const div = document.createElement('div');
+      div.className = name;
+      li.appendChild(div);
+    });
+    li.querySelector('.info').innerHTML =
+      '<div class="name"></div><div class="bar" aria-hidden="true"><div class="fill"></div></div>';
+    return li;
+  }
+
+  function render() {
+    const ul = list();
+    const sorted = Object.values(rows).sort(function(a, b) { return a[0] - b[0]; });
+    const maxScore = sorted.reduce(function(m, r) { return Math.max(m, r[3]); }, 0) || 1;
+    const items = {};
+    ul.querySelectorAll('li[data-user-id]').forEach(function(li) {
+      items[li.dataset.userId] = li;
+    });
+    sorted.forEach(function(row, i) {
+      const [rank, userId, username, score] = row;
+      const li = items[userId] || createItem(userId);
+      delete items[userId];
+      li.className = 'item' + (rank <= 3 ? ' top' : '');
+      li.querySelector('.rank').textContent = MEDALS[rank - 1] || rank;
+      li.querySelector('.avatar').textContent = username.charAt(0).toUpperCase();
+      li.querySelector('.name').textContent = username;
+      li.querySelector('.fill').style.width = Math.round((score / maxScore) * 100) + '%';
+      li.querySelector('.score').textContent = score;
+      // hanya dipindah bila posisinya berubah
+      if (ul.children[i] !== li) ul.insertBefore(li, ul.children[i] || null);
+    });
+    Object.values(items).forEach(function(li) { li.remove(); });
+  }
+
+  let pollTimer = null;
+  let etag = null;
+
+  function readRows(doc) {
+    const fresh = {};
+    doc.querySelectorAll('ul.leaderboard li[data-user-id]').forEach(function(li, i) {
+      const userId = li.dataset.userId;
+      fresh[userId] = [
+        i + 1,
+        Number(userId),
+        li.querySelector('.name').textContent,
+        Number(li.querySelector('.score').textContent),
+      ];
+    });
+    return fresh;
+  }
+
+  function poll() {
+    if (document.hidden) return;
+    const headers = etag ? { 'If-None-Match': etag } : {};
+    fetch(container.dataset.pollUrl, { headers: headers, cache: 'no-store', credentials: 'same-origin' })
+      .then(function(res) {
+        if (res.status !== 200) return; // 304: tidak berubah
+        etag = res.headers.get('ETag');
+        return res.text().then(function(html) {
+          rows = readRows(new DOMParser().parseFromString(html, 'text/html'));
+          render();
+        });
+      })
+      .catch(function() {});
+  }
+
+  function startPolling() {
+    const interval = parseFloat(container.dataset.pollInterval) * 1000;
+    if (pollTimer || !(interval > 0)) return;
+    pollTimer = setInterval(poll, interval);
+  }
+
+  function stopPolling() {
+    clearInterval(pollTimer);
+    pollTimer = null;
+  }
+
+  function connect() {
+    const source = new EventSource(container.dataset.streamUrl);
+    source.addEventListener('snapshot', function(e) {
+      stopPolling();
+      rows = {};
+      JSON.parse(e.data).rows.forEach(function(row) { rows[row[1]] = row; });
+      render();
+    });
+    source.addEventListener('diff', function(e) {
+      const data = JSON.parse(e.data);
+      data.removed.forEach(function(userId) { delete rows[userId]; });
+      data.rows.forEach(function(row) { rows[row[1]] = row; });
+      render();
+    });
+    source.addEventListener('error', function() {
+      // CLOSED: server menolak (mis. 503 stream penuh); polling dulu, coba lagi nanti.
+      // Selain itu EventSource menyambung ulang sendiri.
+      if (source.readyState === EventSource.CLOSED) {
+        startPolling();
+        setTimeout(connect, 60000);
+      }
+    });
+  }
+
+  if (container.dataset.streamUrl && window.EventSource) {
+    connect();
+  } else {
+    startPolling();
+  }
+});
@@ -0,0 +1,81 @@
+// Kuis tanpa reload halaman: jawaban dikirim ke /api/quiz/answer dan responsnya
+// (hasil + soal berikutnya) mengganti isi kartu kuis di tempat, satu request
+// per soal. Tanpa fetch, form biasa (POST /quiz lalu redirect) tetap dipakai.
+document.addEventListener('DOMContentLoaded', function() {
+  const card = document.getElementById('quizCard');
+  if (!card || !window.fetch) return;
+  let busy = false;
+
+  function renderProgress(state) {
+    const wrap = card.querySelector('.progress-wrap');
+    const current = Math.min(state.progress + 1, state.max_questions);
+    wrap.firstChild.nodeValue = 'Soal ke ' + current + ' dari ' + state.max_questions;
+    const percent = (state.progress / state.max_questions) * 100;
+    wrap.querySelector('.progress-bar').style.setProperty('--progress', percent + '%');
+  }
+
+  function renderQuestion(form, question) {
+    form.querySelector('p').textContent = question.text;
+    form.elements.question_id.value = question.id;
+    form.querySelectorAll('label.option').forEach(function(label) { label.remove(); });
+    const spacer = form.querySelector('input[type="hidden"] ~ div');
+    question.options.forEach(function(opt) {
+      const label = document.createElement('label');
+      label.className = 'option';
+      const input = document.createElement('input');
+      input.type = 'radio';
+      input.name = 'option_id';
+      input.value = opt.id;
+      input.required = true;
+      const span = document.createElement('span');
+      span.textContent = opt.text;
+      label.appendChild(input);
+      label.appendChild(span);
+      form.insertBefore(label, spacer);
+    });
+  }
+
+  card.addEventListener('submit', function(e) {
+    const form = e.target;
+    if (!form.dataset.answerUrl) return;
+    const chosen = form.querySelector('input[name="option_id"]:checked');
+    if (!chosen) return;
+    e.preventDefault();
+    if (busy) return;
+    busy = true;
+    const button = form.querySelector('button[type="submit"]');
+    button.disabled = true;
+
+    fetch(form.dataset.answerUrl, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', Accept: 'application/json' },
+      body: JSON.stringify({
+        question_id: Number(form.elements.question_id.value),
+        option_id: Number(chosen.value)
+      })
+    })
+      .then(function(resp) {
+        const type = resp.headers.get('Content-Type') || '';
+        // mis. sesi login habis (redirect ke halaman login): muat ulang halaman
+        if (!resp.ok || type.indexOf('application/json') === -1) throw new Error(resp.status);
+        return resp.json();
+      })
+      .then(function(state) {
+        if (state.redirect) {
+          window.location.assign(state.redirect);
+          return;
+        }
+        renderProgress(state);
+        renderQuestion(form, state.question);
+        card.scrollIntoView({ block: 'nearest' });
+      })
+      .catch(function() {
+        // jawaban mungkin sudah tercatat: jangan kirim ulang form, tampilkan keadaan server
+        window.location.reload();
+      })
+      .finally(function() {
+        busy = false;
+        button.disabled = false;
+      });
+  });
+});
@@ -0,0 +1,63 @@
+document.addEventListener('DOMContentLoaded', function() {
+  const form = document.getElementById('weatherForm');
+  if (!form) return;
+  const input = form.querySelector('input[name="city"]');
+  const button = form.querySelector('button[type="submit"]');
+  const result = document.getElementById('weatherResult');
+  const rowsEl = document.getElementById('weatherRows');
+  const alerts = document.getElementById('weatherAlerts');
+
+  function showAlert(message, category) {
+    alerts.innerHTML = '';
+    const li = document.createElement('li');
+    li.className = category || 'warning';
+    li.textContent = message;
+    alerts.appendChild(li);
+    alerts.hidden = false;
+  }
+
+  function renderRows(rows) {
+    rowsEl.innerHTML = '';
+    rows.forEach(function(row) {
+      const tr = document.createElement('tr');
+      [row.day, row.date, row.day_temp, row.night_temp].forEach(function(value) {
+        const td = document.createElement('td');
+        td.textContent = value;
+        tr.appendChild(td);
+      });
+      rowsEl.appendChild(tr);
+    });
+    result.hidden = rows.length === 0;
+  }
+
+  form.addEventListener('submit', function(e) {
+    const city = input.value.trim();
+    if (!city || !window.fetch) return; // biarkan form dikirim biasa
+    e.preventDefault();
+
+    alerts.hidden = true;
+    button.disabled = true;
+    button.textContent = 'Memuat...';
+
+    fetch(form.dataset.endpoint + '?city=' + encodeURIComponent(city), {
+      headers: { Accept: 'application/json' }
+    })
+      .then(function(resp) {
+        return resp.json().then(function(data) {
+          if (!resp.ok) throw new Error(data.error || 'Terjadi error.');
+          return data;
+        });
+      })
+      .then(function(data) {
+        renderRows(data.rows || []);
+      })
+      .catch(function(err) {
+        result.hidden = true;
+        showAlert(err.message || 'Terjadi error saat mengambil data cuaca.', 'warning');
+      })
+      .finally(function() {
+        button.disabled = false;
+        button.textContent = 'Lihat';
+      });
+  });
+});
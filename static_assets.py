@@ -0,0 +1,126 @@
+# static_assets.py
+# URL static dengan sidik jari isi file (?v=<hash>) agar browser boleh
+# menyimpannya "selamanya", plus varian gzip/brotli yang dikompres sekali
+# (flask --app app assets compress) lalu disajikan sesuai Accept-Encoding.
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from flask import request, send_from_directory
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # brotli opsional: tanpa paket ini hanya varian .gz
+    brotli = None
+
+# satu tahun; URL berubah sendiri begitu isi file berubah
+FAR_FUTURE = 365 * 24 * 3600
+# hanya tipe teks yang layak dikompres (png/jpg sudah terkompres)
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".html", ".map", ".ico"}
+# urutan preferensi saat browser menerima keduanya
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class StaticAssets:
+    """Sidik jari dan varian terkompres untuk file di ``folder``."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        # filename -> (mtime, hash); mtime dicek ulang agar edit lokal langsung terlihat
+        self._versions = {}
+
+    def _path(self, filename):
+        path = safe_join(self.folder, filename)
+        return path if path and os.path.isfile(path) else None
+
+    def version(self, filename):
+        path = self._path(filename)
+        if path is None:
+            return None
+        mtime = os.stat(path).st_mtime_ns
+        cached = self._versions.get(filename)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(65536), b""):
+                h.update(block)
+        digest = h.hexdigest()[:12]
+        self._versions[filename] = (mtime, digest)
+        return digest
+
+    def url_defaults(self, endpoint, values):
+        # url_for("static", filename=...) -> /static/...?v=<hash>
+        if endpoint == "static" and "filename" in values and "v" not in values:
+            version = self.version(values["filename"])
+            if version:
+                values["v"] = version
+
+    def _variant(self, filename):
+        path = self._path(filename)
+        if path is None or os.path.splitext(filename)[1].lower() not in COMPRESSIBLE:
+            return None, None
+        mtime = os.stat(path).st_mtime_ns
+        for encoding, ext in ENCODINGS:
+            if not request.accept_encodings[encoding]:
+                continue
+            variant = path + ext
+            # varian lebih lama dari file aslinya = basi, abaikan
+            if os.path.isfile(variant) and os.stat(variant).st_mtime_ns >= mtime:
+                return encoding, filename + ext
+        return None, None
+
+    def send(self, filename):
+        """Pengganti view ``static`` bawaan Flask."""
+        version = request.args.get("v")
+        fingerprinted = bool(version) and version == self.version(filename)
+        max_age = FAR_FUTURE if fingerprinted else None
+        encoding, variant = self._variant(filename)
+        if encoding:
+            mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            response = send_from_directory(
+                self.folder, variant, mimetype=mimetype, max_age=max_age
+            )
+            response.headers["Content-Encoding"] = encoding
+        else:
+            response = send_from_directory(self.folder, filename, max_age=max_age)
+        if os.path.splitext(filename)[1].lower() in COMPRESSIBLE:
+            response.vary.add("Accept-Encoding")
+        if fingerprinted:
+            response.cache_control.public = True
+            response.cache_control.immutable = True
+        return response
+
+    def init_app(self, app):
+        app.url_defaults(self.url_defaults)
+        app.view_functions["static"] = self.send
+
+    def compress(self, min_size=256):
+        """Tulis varian .gz (dan .br bila paket brotli ada) untuk file teks.
+
+        Kembalikan list (filename, encoding, ukuran asli, ukuran terkompres).
+        """
+        results = []
+        for root, _dirs, files in os.walk(self.folder):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                if os.path.splitext(name)[1].lower() not in COMPRESSIBLE:
+                    continue
+                with open(path, "rb") as f:
+                    data = f.read()
+                if len(data) < min_size:
+                    continue
+                rel = os.path.relpath(path, self.folder).replace(os.sep, "/")
+                variants = [("gzip", ".gz", gzip.compress(data, 9, mtime=0))]
+                if brotli is not None:
+                    variants.append(("br", ".br", brotli.compress(data, quality=11)))
+                for encoding, ext, blob in variants:
+                    # tidak ada gunanya menyimpan varian yang tidak lebih kecil
+                    if len(blob) >= len(data):
+                        continue
+                    with open(path + ext, "wb") as f:
+                        f.write(blob)
+                    results.append((rel, encoding, len(data), len(blob)))
+        return results
@@ -0,0 +1,36 @@
+# tests/conftest.py
+# App dimuat sekali per sesi test dengan database SQLite sementara. Konfigurasi
+# dibaca saat `import app`, jadi env diisi di fixture sebelum modul diimpor.
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "bench"))
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    db_path = tmp_path_factory.mktemp("db") / "test.db"
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{db_path}",
+        # semua request datang dari 127.0.0.1
+        AUTH_RATE_PER_IP="",
+        LOGIN_FAILURE_RATE="",
+        PASSWORD_HASH_METHOD="pbkdf2:sha256:1000",
+        # refresh berbasis waktu dimatikan: jumlah query per request tidak bergantung
+        # pada kapan test berjalan (perubahan di proses ini tetap langsung terlihat)
+        QUESTION_BANK_CHECK_INTERVAL="3600",
+        IDENTITY_CACHE_TTL="3600",
+        LEADERBOARD_HTML_TTL="3600",
+        WARM_UP="0",
+    )
+    import app
+    import quiz_load
+
+    quiz_load.seed(app, n_users=60, n_questions=80)
+    app.startup()
+    return app
@@ -0,0 +1,34 @@
+# tests/test_bank_version.py
+# Versi bank soal naik atomik: dua perubahan yang berjalan bersamaan tidak saling menimpa.
+import threading
+
+
+def test_concurrent_bumps_are_distinct(app_module):
+    key = app_module.BANK_VERSION_KEY
+    results = []
+
+    def other_request():
+        with app_module.app.app_context():
+            results.append(app_module.bump_meta_version(key))
+            app_module.db.session.commit()
+
+    with app_module.app.app_context():
+        start = app_module.get_meta_version(key)
+        results.append(app_module.bump_meta_version(key))
+        # request lain menaikkan versi sebelum transaksi ini di-commit
+        other = threading.Thread(target=other_request)
+        other.start()
+        other.join(timeout=0.5)
+        app_module.db.session.commit()
+    other.join()
+    assert sorted(results) == [start + 1, start + 2]
+    with app_module.app.app_context():
+        assert app_module.get_meta_version(key) == start + 2
+
+
+def test_bump_creates_missing_key(app_module):
+    with app_module.app.app_context():
+        assert app_module.bump_meta_version("test-missing-key") == 1
+        assert app_module.bump_meta_version("test-missing-key") == 2
+        app_module.db.session.commit()
+        assert app_module.get_meta_version("test-missing-key") == 2
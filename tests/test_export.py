@@ -0,0 +1,66 @@
+# tests/test_export.py
+# Export jawaban membaca arsip dengan username dicari per EXPORT_BATCH_SIZE
+# baris, bukan satu dict berisi semua user.
+import json
+import os
+from datetime import date, datetime
+
+from sqlalchemy import event
+
+import retention
+from quiz_load import PASSWORD
+
+ADMIN = "bench59"
+
+
+def test_export_archive_resolves_usernames_per_chunk(app_module, monkeypatch, tmp_path):
+    app, db = app_module.app, app_module.db
+    with app.app_context():
+        users = db.session.execute(
+            db.select(app_module.User.id, app_module.User.username).order_by(app_module.User.id)
+        ).all()[:7]
+        archived = [
+            retention.ArchivedAnswer(10_000_000 + i, uid, 1, 1, True, datetime(2020, 1, 1))
+            for i, (uid, _) in enumerate(users)
+        ]
+        filename = "export-test.jsonl.gz"
+        retention._write_archive(os.path.join(tmp_path, filename), archived)
+        day = date(2020, 1, 1)
+        db.session.add(app_module.AnswerArchiveFile(day=day, filename=filename, rows=len(archived)))
+        db.session.commit()
+        engine = db.engine
+
+    monkeypatch.setattr(app_module, "answer_archive", retention.ArchiveReader(str(tmp_path)))
+    monkeypatch.setattr(app_module, "ADMIN_USERS", {ADMIN})
+    monkeypatch.setattr(app_module, "EXPORT_BATCH_SIZE", 3)
+
+    lookups = []
+
+    def count(conn, cursor, statement, parameters, *args):
+        if "WHERE user.id IN" in statement:
+            lookups.append(len(parameters))
+
+    client = app.test_client()
+    r = client.post("/login", data={"email_or_username": ADMIN, "password": PASSWORD})
+    assert r.status_code == 302
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        body = client.get("/admin/export/answers.jsonl").get_data(as_text=True)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+        with app.app_context():
+            db.session.execute(
+                db.delete(app_module.AnswerArchiveFile).where(
+                    app_module.AnswerArchiveFile.filename == filename
+                )
+            )
+            db.session.commit()
+
+    exported = {}
+    for line in body.splitlines():
+        row = json.loads(line)
+        if row["id"] >= 10_000_000:
+            exported[row["user_id"]] = row["username"]
+    assert exported == dict(users)
+    # 7 baris arsip, 3 per batch: 3 lookup, masing-masing paling banyak 3 user
+    assert len(lookups) == 3 and max(lookups) <= 3
@@ -0,0 +1,39 @@
+# tests/test_leaderboard_etag.py
+# ETag /leaderboard sama di semua worker yang isi top N-nya sama.
+from leaderboard import Leaderboard, LeaderboardEntry, MemoryLeaderboardBackend
+
+ENTRIES = [
+    LeaderboardEntry(1, "ani", 30, 1.0),
+    LeaderboardEntry(2, "budi", 20, 2.0),
+    LeaderboardEntry(3, "citra", 10, 3.0),
+]
+
+
+def worker():
+    # satu worker = satu backend memori dengan versi sendiri
+    return Leaderboard(MemoryLeaderboardBackend(), lambda: list(ENTRIES), size=2)
+
+
+def test_digest_is_shared_across_workers():
+    a, b = worker(), worker()
+    b.increment(3, 1)  # versi b berubah, top 2 tetap sama
+    assert a.state().version != b.state().version
+    assert a.digest() == b.digest()
+
+    b.increment(2, 15)
+    assert a.digest() != b.digest()
+    a.increment(2, 15)
+    assert a.digest() == b.digest()
+
+
+def test_leaderboard_304_from_another_worker(app_module, monkeypatch):
+    client = app_module.app.test_client()
+    first = client.get("/leaderboard")
+    assert first.status_code == 200
+
+    # worker lain: backend baru dengan isi yang sama dari DB
+    other = Leaderboard(MemoryLeaderboardBackend(), app_module.load_leaderboard_entries,
+                        size=app_module.leaderboard_store.size)
+    monkeypatch.setattr(app_module, "leaderboard_store", other)
+    second = client.get("/leaderboard", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 304
@@ -0,0 +1,132 @@
+# tests/test_query_counts.py
+# Jumlah statement SQL per route tetap di bawah QUERY_BUDGET (bench/quiz_load.py)
+# untuk setiap backend attempt dan mode pemilihan soal. Yang dihitung hanya
+# statement dari thread request, bukan thread latar (bus invalidasi, writer).
+import itertools
+import threading
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from quiz_load import OPT_RE, PASSWORD, QID_RE, QUERY_BUDGET
+
+# (QUIZ_STORE, QUIZ_PLAN_MODE, QUIZ_SELECTION)
+MODES = [
+    pytest.param((store, plan, selection), id=f"{store}-{name}")
+    for store in ("memory", "sql")
+    for name, plan, selection in (
+        ("uniform", False, "uniform"),
+        ("plan", True, "uniform"),
+        ("adaptive", False, "adaptive"),
+    )
+]
+
+# setiap test memakai user baru: user yang sudah masuk leaderboard langsung diarahkan ke hasil
+_usernames = (f"bench{i}" for i in itertools.count())
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.statements = None
+        self._thread = None
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, conn, cursor, statement, *args):
+        if self.statements is not None and threading.get_ident() == self._thread:
+            self.statements.append(statement)
+
+    @contextmanager
+    def measure(self):
+        self.statements, self._thread = [], threading.get_ident()
+        try:
+            yield self
+        finally:
+            self._thread = None
+
+
+@pytest.fixture(scope="session")
+def counter(app_module):
+    with app_module.app.app_context():
+        return QueryCounter(app_module.db.engine)
+
+
+@pytest.fixture(params=MODES)
+def quiz_mode(request, app_module, monkeypatch):
+    store, plan, selection = request.param
+    monkeypatch.setattr(app_module, "QUIZ_STORE", store)
+    monkeypatch.setattr(app_module, "QUIZ_PLAN_MODE", plan)
+    monkeypatch.setattr(app_module, "QUIZ_SELECTION", selection)
+    monkeypatch.setattr(app_module, "attempt_store", app_module.make_attempt_store())
+    return request.param
+
+
+@pytest.fixture
+def client(app_module, quiz_mode):
+    client = app_module.app.test_client()
+    r = client.post("/login", data={"email_or_username": next(_usernames), "password": PASSWORD})
+    assert r.status_code == 302
+    client.get("/quiz/reset")
+    return client
+
+
+def request_within_budget(counter, client, label, **kwargs):
+    method, path = label.split(" ", 1)
+    with counter.measure() as measured:
+        response = client.open(path, method=method, **kwargs)
+    statements = measured.statements
+    assert response.status_code < 400, f"{label}: {response.status_code}"
+    assert len(statements) <= QUERY_BUDGET[label], (
+        f"{label}: {len(statements)} queries > budget {QUERY_BUDGET[label]}\n"
+        + "\n".join(statements)
+    )
+    return response
+
+
+def answer_form(counter, client, max_questions):
+    answered = 0
+    for _ in range(max_questions):
+        body = request_within_budget(counter, client, "GET /quiz").get_data(as_text=True)
+        qid, opts = QID_RE.search(body), OPT_RE.findall(body)
+        if not qid:
+            break
+        request_within_budget(
+            counter,
+            client,
+            "POST /quiz",
+            data={"question_id": qid.group(1), "option_id": opts[answered % len(opts)]},
+        )
+        answered += 1
+    return answered
+
+
+def test_quiz_form(app_module, counter, client):
+    assert answer_form(counter, client, app_module.MAX_QUESTIONS) == app_module.MAX_QUESTIONS
+
+
+def test_quiz_api(app_module, counter, client):
+    body = request_within_budget(counter, client, "GET /quiz").get_data(as_text=True)
+    question = {
+        "id": int(QID_RE.search(body).group(1)),
+        "options": [{"id": int(oid)} for oid in OPT_RE.findall(body)],
+    }
+    answered = 0
+    while question:
+        option = question["options"][answered % len(question["options"])]
+        data = request_within_budget(
+            counter,
+            client,
+            "POST /api/quiz/answer",
+            json={"question_id": question["id"], "option_id": option["id"]},
+        ).get_json()
+        assert data["result"] is not None
+        answered += 1
+        question = data["question"]
+    assert answered == app_module.MAX_QUESTIONS
+
+
+def test_leaderboard_and_history(app_module, counter, client):
+    answer_form(counter, client, 5)
+    request_within_budget(counter, client, "GET /leaderboard")
+    request_within_budget(counter, client, "GET /me/history")
+    request_within_budget(counter, client, "GET /api/me/history")
@@ -0,0 +1,29 @@
+# tests/test_question_bank.py
+# Snapshot bank soal dari replika yang tertinggal tidak disimpan dengan versi DB utama.
+from question_bank import QuestionBank
+
+
+def rows_for(text):
+    return [(1, text, None, None, 0, 10, "a", True), (1, text, None, None, 0, 11, "b", False)]
+
+
+def test_lagging_replica_is_reloaded():
+    primary = {"version": 2}
+    replica = {"version": 1, "rows": rows_for("lama")}
+    bank = QuestionBank(
+        lambda: (replica["version"], replica["rows"]),
+        lambda: primary["version"],
+        check_interval=0,
+    )
+
+    # DB utama sudah di versi 2, replika masih memberi versi 1
+    snap = bank.snapshot()
+    assert snap.version == 1
+    assert snap.questions[1].text == "lama"
+
+    # replika menyusul: cek berikutnya memuat ulang, bukan tetap di snapshot lama
+    replica.update(version=2, rows=rows_for("baru"))
+    snap = bank.snapshot()
+    assert snap.version == 2
+    assert snap.questions[1].text == "baru"
+    assert bank.snapshot() is snap
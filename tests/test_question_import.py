@@ -0,0 +1,53 @@
+# tests/test_question_import.py
+# Import ulang soal yang sudah ada hanya mengubah kolom yang diisi file.
+import io
+
+from question_import import QuestionRecord, import_questions, read_stream
+
+
+def engine(app_module):
+    with app_module.app.app_context():
+        return app_module.db.engine
+
+
+def stored(app_module, text):
+    q = app_module.Question.__table__
+    with engine(app_module).connect() as conn:
+        return conn.execute(
+            q.select().with_only_columns(q.c.topic, q.c.difficulty).where(q.c.text == text)
+        ).one()
+
+
+def run_import(app_module, records):
+    return import_questions(
+        engine(app_module),
+        records,
+        app_module.Question.__table__,
+        app_module.AnswerOption.__table__,
+    )
+
+
+def test_reimport_keeps_fields_not_in_file(app_module):
+    text = "Import ulang: kolom kosong?"
+    run_import(app_module, [QuestionRecord(text, ["a", "b"], 0, "cv", 4)])
+
+    # seed.py hanya mengisi topic; difficulty yang diset admin harus tetap ada
+    stats = run_import(app_module, [QuestionRecord(text, ["a", "b"], 0, "cv", None)])
+    assert stats.updated == 0
+    assert tuple(stored(app_module, text)) == ("cv", 4)
+
+    stats = run_import(app_module, [QuestionRecord(text, ["a", "b"], 0, None, 2)])
+    assert stats.updated == 1
+    assert tuple(stored(app_module, text)) == ("cv", 2)
+
+
+def test_reimport_csv_with_empty_cell(app_module):
+    text = "Import ulang CSV: sel kosong?"
+    run_import(app_module, [QuestionRecord(text, ["a", "b"], 1, "nlp", 3)])
+
+    upload = io.BytesIO(
+        f"text,correct,option_1,option_2,topic,difficulty\n{text},1,a,b,vision,\n".encode()
+    )
+    stats = run_import(app_module, read_stream(upload, "csv"))
+    assert stats.updated == 1
+    assert tuple(stored(app_module, text)) == ("vision", 3)
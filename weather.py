@@ -0,0 +1,449 @@
+# weather.py
+# Layanan cuaca OpenWeatherMap: koneksi HTTP yang dipakai ulang, cache geocoding
+# dan hasil forecast, penggabungan request yang sama (single-flight), serta
+# stale-while-revalidate agar upstream yang lambat tidak menahan worker.
+import importlib.util
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import date, datetime
+
+log = logging.getLogger(__name__)
+
+# requests dan NumPy (opsional) berat untuk diimpor: dimuat saat pertama dipakai,
+# bukan saat worker start
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+ID_DAYS = ["Senin", "Selasa", "Rabu", "Kamis", "Jumat", "Sabtu", "Minggu"]
+
+
+class WeatherError(Exception):
+    pass
+
+
+class CityNotFound(WeatherError):
+    pass
+
+
+class UpstreamUnavailable(WeatherError):
+    """Upstream error/timeout, anggaran waktu habis, atau circuit breaker terbuka."""
+
+
+class CircuitBreaker:
+    """Buka sirkuit setelah ``failure_threshold`` kegagalan beruntun; setelah
+    ``reset_timeout`` detik satu request percobaan (half-open) diizinkan lewat."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class TTLCache:
+    """Cache LRU dengan TTL; entri kadaluarsa masih bisa dibaca sebagai "stale"."""
+
+    def __init__(self, maxsize=1024, ttl=600, stale_ttl=0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Kembalikan (value, fresh); (None, False) jika tidak ada atau sudah terlalu lama."""
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None, False
+            value, stored_at = item
+            age = now - stored_at
+            if age >= self.ttl + self.stale_ttl:
+                del self._data[key]
+                return None, False
+            self._data.move_to_end(key)
+            return value, age < self.ttl
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Pemanggilan serentak dengan key yang sama hanya menjalankan ``fn`` sekali."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+# di atas ukuran ini agregasi memakai NumPy (bila terpasang); forecast 5 hari/3 jam
+# OWM hanya 40 item, jadi jalur pure-Python biasanya lebih cepat
+NUMPY_MIN_ITEMS = 256
+
+_SECONDS_PER_DAY = 86400
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _local_offset():
+    # fallback bila respons tidak membawa city.timezone: zona waktu server
+    return int(datetime.now().astimezone().utcoffset().total_seconds())
+
+
+def _is_day_hour(hour):
+    # suhu siang (12:00-15:00)
+    return 12 <= hour <= 15
+
+
+def _is_night_hour(hour):
+    # suhu malam (21:00-03:00)
+    return hour >= 21 or hour <= 3
+
+
+def _bucket_python(timestamps, temps, offset):
+    # satu lintasan: per hari simpan [maks siang, min malam, maks harian, min harian]
+    buckets = {}
+    for ts, temp in zip(timestamps, temps):
+        local = ts + offset
+        day = local // _SECONDS_PER_DAY
+        hour = (local % _SECONDS_PER_DAY) // 3600
+        acc = buckets.get(day)
+        if acc is None:
+            acc = buckets[day] = [None, None, temp, temp]
+        else:
+            if temp > acc[2]:
+                acc[2] = temp
+            if temp < acc[3]:
+                acc[3] = temp
+        if _is_day_hour(hour):
+            if acc[0] is None or temp > acc[0]:
+                acc[0] = temp
+        elif _is_night_hour(hour):
+            if acc[1] is None or temp < acc[1]:
+                acc[1] = temp
+    return [(day, buckets[day]) for day in sorted(buckets)[:3]]
+
+
+def _bucket_numpy(timestamps, temps, offset):
+    import numpy as np
+
+    local = np.asarray(timestamps, dtype=np.int64) + offset
+    temps = np.asarray(temps, dtype=np.float64)
+    days = local // _SECONDS_PER_DAY
+    hours = (local % _SECONDS_PER_DAY) // 3600
+    day_mask = (hours >= 12) & (hours <= 15)
+    night_mask = (hours >= 21) | (hours <= 3)
+    result = []
+    for day in np.unique(days)[:3]:
+        in_day = days == day
+        day_temps = temps[in_day & day_mask]
+        night_temps = temps[in_day & night_mask]
+        all_temps = temps[in_day]
+        result.append(
+            (
+                int(day),
+                [
+                    float(day_temps.max()) if day_temps.size else None,
+                    float(night_temps.min()) if night_temps.size else None,
+                    float(all_temps.max()),
+                    float(all_temps.min()),
+                ],
+            )
+        )
+    return result
+
+
+def summarize_forecast(forecast_list, tz_offset=None, use_numpy=None):
+    """Ringkas list forecast OWM menjadi 3 baris harian (hari, tanggal, siang, malam).
+
+    ``tz_offset`` adalah ``city.timezone`` dari respons (detik dari UTC), jadi
+    pembagian siang/malam mengikuti waktu lokal kota, bukan waktu server.
+    """
+    if not forecast_list:
+        return []
+    offset = _local_offset() if tz_offset is None else int(tz_offset)
+    timestamps = [item["dt"] for item in forecast_list]
+    temps = [item["main"]["temp"] for item in forecast_list]
+
+    if use_numpy is None:
+        use_numpy = HAS_NUMPY and len(timestamps) >= NUMPY_MIN_ITEMS
+    bucketed = (_bucket_numpy if use_numpy else _bucket_python)(timestamps, temps, offset)
+
+    rows = []
+    for day, (day_max, night_min, all_max, all_min) in bucketed:
+        date_key = date.fromordinal(_EPOCH_ORDINAL + day)
+        # jika tidak ada data spesifik, gunakan max/min dari hari itu
+        rows.append(
+            {
+                "day": ID_DAYS[date_key.weekday()],
+                "date": date_key.strftime("%Y-%m-%d"),
+                "day_temp": round(day_max if day_max is not None else all_max),
+                "night_temp": round(night_min if night_min is not None else all_min),
+            }
+        )
+    return rows
+
+
+class WeatherService:
+    def __init__(
+        self,
+        api_key,
+        geocode_url,
+        forecast_url,
+        timeout=10,
+        budget=8,
+        geocode_ttl=7 * 24 * 3600,
+        forecast_ttl=600,
+        stale_ttl=3600,
+        cache_size=512,
+        breaker=None,
+        session=None,
+        on_load=None,
+    ):
+        self.api_key = api_key
+        self.geocode_url = geocode_url
+        self.forecast_url = forecast_url
+        # timeout per panggilan upstream, dan anggaran total untuk geocode + forecast
+        self.timeout = timeout
+        self.budget = budget
+        self._session = session
+        # koordinat kota praktis tidak pernah berubah
+        self.geocode_cache = TTLCache(maxsize=cache_size, ttl=geocode_ttl)
+        self.forecast_cache = TTLCache(maxsize=cache_size, ttl=forecast_ttl, stale_ttl=stale_ttl)
+        self.breaker = breaker or CircuitBreaker()
+        self._flight = SingleFlight()
+        # on_load(key, rows): dipanggil setelah forecast baru dimuat dari upstream
+        self.on_load = on_load
+
+    @property
+    def session(self):
+        # dibuat saat lookup pertama; race dua thread hanya membuat satu session ekstra
+        if self._session is None:
+            self._session = self._make_session()
+        return self._session
+
+    @staticmethod
+    def _make_session():
+        # keep-alive + pool koneksi untuk host OpenWeatherMap
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @staticmethod
+    def _key(city_name):
+        return " ".join(city_name.split()).lower()
+
+    def _upstream_get(self, url, params, deadline):
+        import requests
+
+        timeout = min(self.timeout, deadline - time.monotonic())
+        if timeout <= 0:
+            raise UpstreamUnavailable("timeout budget exhausted")
+        if not self.breaker.allow():
+            raise UpstreamUnavailable("circuit open")
+        try:
+            resp = self.session.get(url, params=params, timeout=timeout)
+        except requests.RequestException as e:
+            self.breaker.record_failure()
+            raise UpstreamUnavailable(str(e)) from e
+        if resp.status_code >= 500 or resp.status_code == 429:
+            self.breaker.record_failure()
+            raise UpstreamUnavailable(f"{resp.status_code} - {resp.text}")
+        self.breaker.record_success()
+        if resp.status_code != 200:
+            raise WeatherError(f"{resp.status_code} - {resp.text}")
+        return resp.json()
+
+    def geocode(self, city_name, deadline):
+        key = self._key(city_name)
+        coords, _ = self.geocode_cache.get(key)
+        if coords is not None:
+            return coords
+        geo_params = {"q": city_name, "limit": 1, "appid": self.api_key}
+        results = self._upstream_get(self.geocode_url, geo_params, deadline)
+        if not results:
+            raise CityNotFound(city_name)
+        coords = (results[0]["lat"], results[0]["lon"])
+        self.geocode_cache.set(key, coords)
+        return coords
+
+    def fetch_forecast(self, lat, lon, deadline):
+        forecast_params = {
+            "lat": lat,
+            "lon": lon,
+            "units": "metric",
+            "appid": self.api_key,
+        }
+        return self._upstream_get(self.forecast_url, forecast_params, deadline)
+
+    def _load(self, city_name):
+        deadline = time.monotonic() + self.budget
+        coords = self.geocode(city_name, deadline)
+        data = self.fetch_forecast(*coords, deadline)
+        forecast_list = data.get("list", [])
+        if not forecast_list:
+            raise WeatherError("empty forecast")
+        rows = summarize_forecast(forecast_list, data.get("city", {}).get("timezone"))
+        key = self._key(city_name)
+        self.forecast_cache.set(key, rows)
+        if self.on_load is not None:
+            self.on_load(key, rows)
+        return rows
+
+    def prime(self, key, rows):
+        """Isi cache forecast dengan rows yang dimuat proses lain."""
+        self.forecast_cache.set(key, rows)
+
+    def _load_coalesced(self, city_name):
+        return self._flight.do(self._key(city_name), lambda: self._load(city_name))
+
+    def _refresh_in_background(self, city_name):
+        if self._flight.in_flight(self._key(city_name)):
+            return
+
+        def run():
+            try:
+                self._load_coalesced(city_name)
+            except Exception:
+                log.exception("weather refresh for %r failed", city_name)
+
+        threading.Thread(target=run, name="weather-refresh", daemon=True).start()
+
+    def cached(self, city_name):
+        """Rows dari cache (segar atau stale) tanpa menunggu upstream, atau None."""
+        rows, fresh = self.forecast_cache.get(self._key(city_name))
+        if rows is not None and not fresh:
+            # sajikan data lama sekarang, perbarui di belakang layar
+            self._refresh_in_background(city_name)
+        return rows
+
+    def lookup(self, city_name):
+        """Seperti get_forecast, tapi melempar WeatherError alih-alih mengembalikan None."""
+        if not self.api_key:
+            raise UpstreamUnavailable("OWM_API_KEY is not set")
+        rows = self.cached(city_name)
+        if rows is not None:
+            return rows
+        return self._load_coalesced(city_name)
+
+    def get_forecast(self, city_name):
+        if not self.api_key or not city_name:
+            return None
+        try:
+            return self.lookup(city_name)
+        except CityNotFound:
+            log.warning("city %r not found in geocoding", city_name)
+        except Exception:
+            log.exception("weather lookup for %r failed", city_name)
+        return None
+
+
+class WeatherFetcher:
+    """Menjalankan lookup di thread pool terbatas; request web hanya menunggu
+    paling lama ``wait_timeout`` detik dan ditolak cepat saat antrean penuh."""
+
+    def __init__(self, service, max_workers=4, max_pending=16, wait_timeout=8):
+        self.service = service
+        self.wait_timeout = wait_timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="weather")
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def fetch(self, city_name):
+        rows = self.service.cached(city_name)
+        if rows is not None:
+            return rows
+        if not self._slots.acquire(blocking=False):
+            raise UpstreamUnavailable("too many pending weather lookups")
+        future = self._pool.submit(self.service.lookup, city_name)
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.wait_timeout)
+        except FutureTimeout as e:
+            # lookup tetap berjalan dan mengisi cache untuk request berikutnya
+            raise UpstreamUnavailable("weather lookup timed out") from e
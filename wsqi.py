@@ -7,4 +7,7 @@ project_path = "/home/Halip26/quiz-app"
 if project_path not in sys.path:
     sys.path.append(project_path)
 
-from app import app as application
+from app import startup
+
+# cek versi skema + isi cache sekali per worker, sebelum request pertama
+application = startup()